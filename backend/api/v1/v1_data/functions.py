@@ -1,32 +1,29 @@
-import re
 import base64
 from django.core.cache import cache
-from datetime import datetime
 from datetime import timedelta
 from api.v1.v1_forms.constants import QuestionTypes
 from api.v1.v1_forms.models import Questions
 from api.v1.v1_data.models import Answers, FormData
 from api.v1.v1_profile.models import Entity, EntityData
+from utils.tiered_cache import get_cache_key
 from faker import Faker
 
 fake = Faker()
 
 
-def get_cache(name):
-    name = re.sub(r"[\W_]+", "_", name)
-    today = datetime.now().strftime("%Y%m%d")
-    cache_name = f"{today}-{name}"
-    data = cache.get(cache_name)
+def get_cache(name, scopes: tuple = ()):
+    """
+    Cached response stored by create_cache, None once any of the
+    scopes has been invalidated (see utils.tiered_cache.CacheScopes)
+    """
+    data = cache.get(get_cache_key(name, scopes=scopes))
     if data:
         return data
     return None
 
 
-def create_cache(name, resp, timeout=None):
-    name = re.sub(r"[\W_]+", "_", name)
-    today = datetime.now().strftime("%Y%m%d")
-    cache_name = f"{today}-{name}"
-    cache.add(cache_name, resp, timeout=timeout)
+def create_cache(name, resp, timeout=None, scopes: tuple = ()):
+    cache.add(get_cache_key(name, scopes=scopes), resp, timeout=timeout)
 
 
 def set_answer_data(
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-17 02:10
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0002_formdata_is_draft'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='formdata',
+            index=models.Index(django.db.models.functions.comparison.Greatest('created', 'updated', 'deleted_at'), django.db.models.expressions.F('id'), name='data_sync_key_idx'),
+        ),
+    ]
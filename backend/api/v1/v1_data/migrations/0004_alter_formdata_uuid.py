@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-17 02:19
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0003_formdata_data_sync_key_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formdata',
+            name='uuid',
+            field=models.CharField(db_index=True, default=uuid.uuid4, max_length=255, null=True),
+        ),
+    ]
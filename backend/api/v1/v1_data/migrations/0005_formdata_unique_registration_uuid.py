@@ -0,0 +1,44 @@
+# Generated by Django 4.0.4 on 2026-10-17 04:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_registrations(apps, schema_editor):
+    # duplicates have to be merged by an operator, their monitoring data,
+    # answers and approvals can't be moved automatically
+    FormData = apps.get_model("v1_data", "FormData")
+    duplicates = FormData.objects.filter(
+        parent__isnull=True,
+        is_draft=False,
+        deleted_at__isnull=True,
+        uuid__isnull=False,
+    ).values("form_id", "uuid").annotate(
+        total=Count("id")
+    ).filter(total__gt=1).order_by("form_id", "uuid")
+    if duplicates:
+        conflicts = "\n".join([
+            f"form {d['form_id']}, uuid {d['uuid']}: {d['total']} rows"
+            for d in duplicates
+        ])
+        raise RuntimeError(
+            "Registrations sharing a uuid have to be merged or soft "
+            f"deleted before the unique constraint is added:\n{conflicts}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0004_alter_formdata_uuid'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_duplicate_registrations, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='formdata',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True), ('is_draft', False), ('parent__isnull', True)), fields=('form', 'uuid'), name='unique_registration_uuid'),
+        ),
+    ]
@@ -2,12 +2,15 @@ import os
 import uuid
 import json
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from api.v1.v1_forms.constants import QuestionTypes
 from api.v1.v1_forms.models import Forms, Questions
 from api.v1.v1_profile.models import (
     Administration,
     UserRole,
     DataAccessTypes,
+    administration_tree,
 )
 from api.v1.v1_users.models import SystemUser
 from utils.soft_deletes_model import SoftDeletes
@@ -33,7 +36,9 @@ class FormData(SoftDeletes, Draft):
         related_name="administration_form_data",
     )
     geo = models.JSONField(null=True, default=None)
-    uuid = models.CharField(max_length=255, default=uuid.uuid4, null=True)
+    uuid = models.CharField(
+        max_length=255, default=uuid.uuid4, null=True, db_index=True
+    )
     created_by = models.ForeignKey(
         to=SystemUser,
         on_delete=models.CASCADE,
@@ -92,11 +97,11 @@ class FormData(SoftDeletes, Draft):
             data.update(a.to_data_frame)
         return data
 
-    @property
-    def save_to_file(self):
-        # If the data is a child of another form, do not save to file
-        if self.form.parent:
-            return None
+    def to_datapoint(self, answers: list = None) -> dict:
+        """
+        Datapoint as downloaded by mobile devices; answers can be given
+        already ordered by question group and question order.
+        """
         admin_id = self.administration_id
         if isinstance(admin_id, Administration):
             admin_id = admin_id.id
@@ -107,13 +112,22 @@ class FormData(SoftDeletes, Draft):
             "uuid": str(self.uuid),
             "geolocation": self.geo,
         }
-        answers = {}
+        if answers is None:
+            answers = self.data_answer.select_related("question").order_by(
+                "question__question_group_id", "question__order"
+            )
+        data_answers = {}
+        for a in answers:
+            data_answers.update(a.to_key)
+        data.update({"answers": data_answers})
+        return data
 
-        for a in self.data_answer.order_by(
-            "question__question_group_id", "question__order"
-        ).all():
-            answers.update(a.to_key)
-        data.update({"answers": answers})
+    @property
+    def save_to_file(self):
+        # If the data is a child of another form, do not save to file
+        if self.form.parent:
+            return None
+        data = self.to_datapoint()
         json_data = json.dumps(data)
         file_name = f"{str(self.uuid)}.json"
         # write to json file
@@ -159,6 +173,28 @@ class FormData(SoftDeletes, Draft):
 
     class Meta:
         db_table = "data"
+        indexes = [
+            # keyset of the mobile datapoint sync (v1_mobile.functions)
+            models.Index(
+                Greatest("created", "updated", "deleted_at"),
+                F("id"),
+                name="data_sync_key_idx",
+            ),
+        ]
+        constraints = [
+            # a registration uuid is stored once per form, monitoring
+            # data shares the uuid of its parent; pending registrations
+            # are covered too, approval publishes the same row
+            models.UniqueConstraint(
+                fields=["form", "uuid"],
+                condition=Q(
+                    parent__isnull=True,
+                    is_draft=False,
+                    deleted_at__isnull=True,
+                ),
+                name="unique_registration_uuid",
+            ),
+        ]
 
 
 class Answers(models.Model):
@@ -204,9 +240,16 @@ class Answers(models.Model):
         ]:
             answer = self.name
         elif q.type == QuestionTypes.administration:
-            answer = Administration.objects.filter(pk=self.value).first()
-            if answer:
-                answer = answer.administration_column
+            answer = None
+            if self.value:
+                answer = administration_tree.get().get_path_name(
+                    int(self.value)
+                )
+            if self.value and answer is None:
+                # created after the tree was loaded
+                answer = Administration.objects.filter(pk=self.value).first()
+                if answer:
+                    answer = answer.administration_column
         else:
             answer = self.value
         if self.index:
@@ -1,4 +1,4 @@
-import requests
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django_q.tasks import async_task
@@ -17,8 +17,7 @@ from api.v1.v1_forms.constants import QuestionTypes
 from api.v1.v1_forms.models import (
     Questions,
 )
-from api.v1.v1_profile.models import Administration, EntityData
-from api.v1.v1_users.models import Organisation
+from api.v1.v1_profile.models import Administration
 from utils.custom_serializer_fields import (
     CustomPrimaryKeyRelatedField,
     UnvalidatedField,
@@ -26,9 +25,15 @@ from utils.custom_serializer_fields import (
     CustomCharField,
     CustomIntegerField,
 )
+from utils.cascade_resolver import resolve_cascade_names
 from utils.functions import update_date_time_format, get_answer_value
 from utils.functions import get_answer_history
 
+# a registration uuid is stored once per form (unique_registration_uuid)
+DUPLICATE_REGISTRATION_MESSAGE = (
+    "A datapoint with this uuid has already been submitted."
+)
+
 
 class SubmitFormDataSerializer(serializers.ModelSerializer):
     administration = CustomPrimaryKeyRelatedField(
@@ -210,6 +215,11 @@ class SubmitFormSerializer(serializers.Serializer):
         # - autofield = 10 #name
         # - attachment = 11 #name
 
+        cascade_names = resolve_cascade_names([
+            (answer.get("question"), answer.get("value"))
+            for answer in validated_data.get("answer")
+            if answer.get("question").type == QuestionTypes.cascade
+        ])
         for answer in validated_data.get("answer"):
             name = None
             value = None
@@ -232,21 +242,9 @@ class SubmitFormSerializer(serializers.Serializer):
             ]:
                 name = answer.get("value")
             elif answer.get("question").type == QuestionTypes.cascade:
-                id = answer.get("value")
-                ep = answer.get("question").api.get("endpoint")
-                val = None
-                if "organisation" in ep:
-                    val = Organisation.objects.filter(pk=id).first()
-                    val = val.name
-                if "entity-data" in ep:
-                    val = EntityData.objects.filter(pk=id).first()
-                    val = val.name
-                if "entity-data" not in ep and "organisation" not in ep:
-                    ep = ep.split("?")[0]
-                    ep = f"{ep}?id={id}"
-                    val = requests.get(ep).json()
-                    val = val[0].get("name")
-                name = val
+                name = cascade_names.get(
+                    (answer.get("question").id, answer.get("value"))
+                )
             else:
                 # for administration,number question type
                 value = answer.get("value")
@@ -259,8 +257,12 @@ class SubmitFormSerializer(serializers.Serializer):
                 options=option,
                 created_by=self.context.get("user"),
             )
-        # Refresh materialized view via async task
-        async_task("api.v1.v1_data.tasks.seed_approved_data", obj_data)
+        # Refresh materialized view via async task, once the data is saved
+        transaction.on_commit(
+            lambda: async_task(
+                "api.v1.v1_data.tasks.seed_approved_data", obj_data
+            )
+        )
 
         return object
 
@@ -551,6 +553,11 @@ class SubmitPendingFormSerializer(serializers.Serializer):
         is_super_admin = user.is_superuser
 
         direct_to_data = is_super_admin
+        if is_draft:
+            # stored as a draft from the start, a draft may reuse the
+            # uuid of a registration (see unique_registration_uuid)
+            data["is_draft"] = True
+            direct_to_data = False
 
         obj_data = self.fields.get("data").create(data)
         # If the form is a child form, it should have a parent
@@ -573,14 +580,37 @@ class SubmitPendingFormSerializer(serializers.Serializer):
             obj_data.is_pending = True
             obj_data.save()
 
-        if is_draft:
-            # Mark as draft
-            obj_data.mark_as_draft()
-            direct_to_data = False
+        answers = self.get_answers(
+            instance=obj_data, answers=validated_data.get("answer")
+        )
+        Answers.objects.bulk_create(answers)
 
-        answers = []
+        if (
+            not is_draft and
+            not obj_data.is_pending
+        ):
+            # Refresh materialized view via async task, once the data
+            # is saved (submissions of a batch are saved in a transaction)
+            transaction.on_commit(
+                lambda: async_task(
+                    "api.v1.v1_data.tasks.seed_approved_data", obj_data
+                )
+            )
 
-        for answer in validated_data.get("answer"):
+        return obj_data
+
+    def get_answers(self, instance: FormData, answers: list) -> list:
+        """
+        Answers objects of the validated answers; the names of cascade
+        answers are resolved in bulk (see utils.cascade_resolver).
+        """
+        cascade_names = resolve_cascade_names([
+            (answer.get("question"), answer.get("value"))
+            for answer in answers
+            if answer.get("question").type == QuestionTypes.cascade
+        ])
+        objects = []
+        for answer in answers:
             question = answer.get("question")
             name = None
             value = None
@@ -603,37 +633,13 @@ class SubmitPendingFormSerializer(serializers.Serializer):
             ]:
                 name = answer.get("value")
             elif question.type == QuestionTypes.cascade:
-                id = answer.get("value")
-                val = None
-                if question.api:
-                    ep = question.api.get("endpoint")
-                    if "organisation" in ep:
-                        name = Organisation.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                    if "entity-data" in ep:
-                        name = EntityData.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                    if "entity-data" not in ep and "organisation" not in ep:
-                        ep = ep.split("?")[0]
-                        ep = f"{ep}?id={id}"
-                        val = requests.get(ep).json()
-                        val = val[0].get("name")
-
-                if question.extra:
-                    cs_type = question.extra.get("type")
-                    if cs_type == "entity":
-                        name = EntityData.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                name = val
+                name = cascade_names.get((question.id, answer.get("value")))
             else:
                 # for administration,number question type
                 value = answer.get("value")
 
-            answers.append(Answers(
-                data=obj_data,
+            objects.append(Answers(
+                data=instance,
                 question=question,
                 name=name,
                 value=value,
@@ -641,17 +647,7 @@ class SubmitPendingFormSerializer(serializers.Serializer):
                 created_by=self.context.get("user"),
                 index=answer.get("index", 0)
             ))
-
-        Answers.objects.bulk_create(answers)
-
-        if (
-            not is_draft and
-            not obj_data.is_pending
-        ):
-            # Refresh materialized view via async task
-            async_task("api.v1.v1_data.tasks.seed_approved_data", obj_data)
-
-        return obj_data
+        return objects
 
     def represent(self, instance, validated_data):
         """
@@ -702,69 +698,9 @@ class SubmitUpdateDraftFormSerializer(SubmitPendingFormSerializer):
         # Clear existing answers and create new ones
         instance.data_answer.all().delete()
 
-        answers = []
-        for answer in validated_data.get("answer"):
-            question = answer.get("question")
-            name = None
-            value = None
-            option = None
-
-            if question.type in [
-                QuestionTypes.geo,
-                QuestionTypes.option,
-                QuestionTypes.multiple_option,
-            ]:
-                option = answer.get("value")
-            elif question.type in [
-                QuestionTypes.input,
-                QuestionTypes.text,
-                QuestionTypes.photo,
-                QuestionTypes.date,
-                QuestionTypes.autofield,
-                QuestionTypes.attachment,
-                QuestionTypes.signature,
-            ]:
-                name = answer.get("value")
-            elif question.type == QuestionTypes.cascade:
-                id = answer.get("value")
-                val = None
-                if question.api:
-                    ep = question.api.get("endpoint")
-                    if "organisation" in ep:
-                        name = Organisation.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                    if "entity-data" in ep:
-                        name = EntityData.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                    if "entity-data" not in ep and "organisation" not in ep:
-                        ep = ep.split("?")[0]
-                        ep = f"{ep}?id={id}"
-                        val = requests.get(ep).json()
-                        val = val[0].get("name")
-
-                if question.extra:
-                    cs_type = question.extra.get("type")
-                    if cs_type == "entity":
-                        name = EntityData.objects.filter(pk=id).values_list(
-                            'name', flat=True).first()
-                        val = name
-                name = val
-            else:
-                # for administration,number question type
-                value = answer.get("value")
-
-            answers.append(Answers(
-                data=instance,
-                question=question,
-                name=name,
-                value=value,
-                options=option,
-                created_by=self.context.get("user"),
-                index=answer.get("index", 0)
-            ))
-
+        answers = self.get_answers(
+            instance=instance, answers=validated_data.get("answer")
+        )
         Answers.objects.bulk_create(answers)
         return instance
 
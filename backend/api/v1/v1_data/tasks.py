@@ -1,7 +1,10 @@
 from django.utils import timezone
 from api.v1.v1_data.models import FormData
 from django.conf import settings
-from api.v1.v1_visualization.functions import refresh_materialized_data
+from api.v1.v1_visualization.functions import (
+    refresh_data_options,
+    invalidate_formdata_stats,
+)
 
 
 def seed_approved_data(data: FormData):
@@ -17,7 +20,8 @@ def seed_approved_data(data: FormData):
     if not data.form.parent and not settings.TEST_ENV:
         # If the form is a parent form, save to file
         data.save_to_file
-    # Refresh materialized view after saving data
-    refresh_materialized_data()
+    # Refresh the option statistics of this monitoring datapoint
+    refresh_data_options(parent_id=data.parent_id, form_id=data.form_id)
+    invalidate_formdata_stats(form_id=data.form_id)
 
     return data
@@ -0,0 +1,148 @@
+from unittest.mock import patch, MagicMock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Questions
+from api.v1.v1_profile.models import Administration, Entity, EntityData
+from api.v1.v1_users.models import Organisation
+from utils.cascade_resolver import (
+    CASCADE_REMOTE_TIMEOUT,
+    get_cascade_source,
+    register_cascade_resolver,
+    resolve_cascade_names,
+)
+
+
+@override_settings(USE_TZ=False)
+class CascadeResolverTestCase(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        adm = Administration.objects.filter(parent__isnull=True).first()
+        entity = Entity.objects.create(name="School")
+        self.entity_data = [
+            EntityData.objects.create(
+                name=f"School {i}", entity=entity, administration=adm
+            )
+            for i in range(3)
+        ]
+        self.organisations = [
+            Organisation.objects.create(name=f"Org {i}") for i in range(2)
+        ]
+        self.entity_question = Questions(
+            id=1,
+            type=QuestionTypes.cascade,
+            api={"endpoint": "/api/v1/entity-data/1/list/"},
+        )
+        self.organisation_question = Questions(
+            id=2,
+            type=QuestionTypes.cascade,
+            api={"endpoint": "/api/v1/organisation/"},
+        )
+        self.remote_question = Questions(
+            id=3,
+            type=QuestionTypes.cascade,
+            api={"endpoint": "https://example.com/api/list?level=1"},
+        )
+
+    def count_lookups(self, ctx) -> int:
+        return len([
+            q for q in ctx.captured_queries
+            if 'FROM "entity_data"' in q["sql"]
+            or 'FROM "organisation"' in q["sql"]
+        ])
+
+    def test_cascade_source(self):
+        self.assertEqual(
+            get_cascade_source(self.entity_question),
+            ("entity", "/api/v1/entity-data/1/list/"),
+        )
+        self.assertEqual(
+            get_cascade_source(self.organisation_question)[0],
+            "organisation",
+        )
+        self.assertEqual(get_cascade_source(self.remote_question)[0], "remote")
+        question = Questions(
+            type=QuestionTypes.cascade, extra={"type": "entity"}
+        )
+        self.assertEqual(get_cascade_source(question), ("entity", None))
+        self.assertEqual(
+            get_cascade_source(Questions(type=QuestionTypes.cascade)),
+            (None, None),
+        )
+
+    def test_resolve_names_in_bulk_and_cache(self):
+        answers = [
+            (self.entity_question, ed.id) for ed in self.entity_data
+        ] + [
+            (self.organisation_question, org.id)
+            for org in self.organisations
+        ]
+        expected = {
+            **{(1, ed.id): ed.name for ed in self.entity_data},
+            **{(2, org.id): org.name for org in self.organisations},
+        }
+        # one query per source, none once the names are cached
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(resolve_cascade_names(answers), expected)
+        self.assertEqual(self.count_lookups(ctx), 2)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(resolve_cascade_names(answers), expected)
+        self.assertEqual(self.count_lookups(ctx), 0)
+
+        # renamed entity data are resolved again
+        self.entity_data[0].name = "Renamed"
+        self.entity_data[0].save()
+        names = resolve_cascade_names(answers)
+        self.assertEqual(names[(1, self.entity_data[0].id)], "Renamed")
+
+    def test_resolve_string_ids(self):
+        entity_data, organisation = self.entity_data[0], self.organisations[0]
+        answers = [
+            (self.entity_question, str(entity_data.id)),
+            (self.entity_question, f"{entity_data.id}.0"),
+            (self.organisation_question, str(organisation.id)),
+            (self.organisation_question, "unknown"),
+        ]
+        self.assertEqual(
+            resolve_cascade_names(answers),
+            {
+                (1, str(entity_data.id)): entity_data.name,
+                (1, f"{entity_data.id}.0"): entity_data.name,
+                (2, str(organisation.id)): organisation.name,
+                (2, "unknown"): None,
+            },
+        )
+
+    def test_resolve_remote_names(self):
+        response = MagicMock()
+        response.json.return_value = [{"id": 7, "name": "Remote 7"}]
+        with patch(
+            "utils.cascade_resolver.requests.get", return_value=response
+        ) as mock_get:
+            names = resolve_cascade_names([
+                (self.remote_question, 7),
+                (self.remote_question, 7),
+            ])
+            resolve_cascade_names([(self.remote_question, 7)])
+        self.assertEqual(names, {(3, 7): "Remote 7"})
+        mock_get.assert_called_once_with(
+            "https://example.com/api/list?id=7",
+            timeout=CASCADE_REMOTE_TIMEOUT,
+        )
+
+    def test_register_cascade_resolver(self):
+        @register_cascade_resolver("remote")
+        def resolve_remote(ids, endpoint=None):
+            return {id: f"local {id}" for id in ids}
+
+        from utils import cascade_resolver
+        self.addCleanup(
+            register_cascade_resolver("remote"),
+            cascade_resolver.resolve_remote,
+        )
+        names = resolve_cascade_names([(self.remote_question, 5)])
+        self.assertEqual(names, {(3, 5): "local 5"})
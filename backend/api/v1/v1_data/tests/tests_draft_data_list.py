@@ -1,9 +1,11 @@
 from io import StringIO
 from django.core.management import call_command
+from django.db.models import Count
 from django.test import TestCase
 from django.test.utils import override_settings
 
 from api.v1.v1_data.models import FormData
+from api.v1.v1_profile.models import Administration
 from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
 
 
@@ -90,6 +92,33 @@ class DraftFormDataListTestCase(TestCase, ProfileTestHelperMixin):
             ]
         )
 
+    def test_administration_filter_excludes_siblings(self):
+        parent = Administration.objects.annotate(
+            children=Count("parent_administration")
+        ).filter(children__gt=1).first()
+        adm, sibling = parent.parent_administration.order_by("id")[:2]
+        adm_data, sibling_data = [
+            FormData.objects.create(
+                name=f"draft {a.name}",
+                form=self.form,
+                administration=a,
+                created_by=self.user,
+                is_draft=True,
+            )
+            for a in [adm, sibling]
+        ]
+        response = self.client.get(
+            (
+                f"/api/v1/draft-submissions/{self.form.id}/"
+                f"?administration={adm.id}"
+            ),
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, 200)
+        ids = [data["id"] for data in response.json()["data"]]
+        self.assertIn(adm_data.id, ids)
+        self.assertNotIn(sibling_data.id, ids)
+
     def test_unauthorized_draft_form_data_list(self):
         response = self.client.get(
             f"/api/v1/draft-submissions/{self.form.id}/",
@@ -190,3 +190,29 @@ class PublishDraftFormDataTestCase(TestCase, ProfileTestHelperMixin):
             response.json()["detail"],
             "You do not have permission to perform this action."
         )
+
+    def test_publish_draft_of_registered_uuid(self):
+        # a second draft of the same registration
+        other_draft = FormData.objects.get(pk=self.draft_data.id)
+        other_draft.pk = None
+        other_draft.save()
+        response = self.client.post(
+            self.url,
+            content_type="application/json",
+            **{'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(
+            f"/api/v1/publish-draft-submission/{other_draft.id}",
+            content_type="application/json",
+            **{'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["message"],
+            "A datapoint with this uuid has already been submitted."
+        )
+        self.assertTrue(
+            FormData.objects_draft.filter(pk=other_draft.id).exists()
+        )
@@ -7,7 +7,7 @@ from math import ceil
 from wsgiref.util import FileWrapper
 from django.utils import timezone
 from django.http import HttpResponse
-from django.db.models import Q
+from django.db import IntegrityError, transaction
 from django_q.tasks import async_task
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
@@ -37,6 +37,7 @@ from api.v1.v1_data.serializers import (
     ListPendingDataAnswerSerializer,
     ListPendingFormDataSerializer,
     SubmitPendingFormSerializer,
+    DUPLICATE_REGISTRATION_MESSAGE,
     SubmitUpdateDraftFormSerializer,
     SubmitFormDataAnswerSerializer,
     FormDataSerializer,
@@ -47,6 +48,7 @@ from api.v1.v1_forms.constants import (
 )
 from api.v1.v1_forms.models import Forms, Questions
 from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.functions import get_user_access
 from api.v1.v1_profile.constants import DataAccessTypes
 from api.v1.v1_approval.constants import DataApprovalStatus
 from mis.settings import REST_FRAMEWORK
@@ -153,30 +155,22 @@ class FormDataAddListView(APIView):
             filter_administration = serializer.validated_data.get(
                 "administration"
             )
-            if filter_administration.path:
-                filter_path = "{0}{1}.".format(
-                    filter_administration.path, filter_administration.id
+            filter_data["administration__in"] = (
+                Administration.objects.descendants_of(
+                    filter_administration, include_self=True
                 )
-            else:
-                filter_path = f"{filter_administration.id}."
-            filter_descendants = list(
-                Administration.objects.filter(
-                    path__startswith=filter_path
-                ).values_list("id", flat=True)
             )
-            filter_descendants.append(filter_administration.id)
-            filter_data["administration_id__in"] = filter_descendants
         else:
-            # Filter data by user administration path
+            # Filter data by user administration
             adm = Administration.objects.filter(
                 parent__isnull=True,
             ).first()
-            if not request.user.is_superuser:
-                user_role = request.user.user_user_role.first()
-                if user_role:
-                    adm = user_role.administration
-            user_path = adm.path if adm.path else f"{adm.pk}."
-            filter_data["administration__path__startswith"] = user_path
+            user_role = get_user_access(request.user).first_role
+            if not request.user.is_superuser and user_role:
+                adm = user_role.administration
+            filter_data["administration__in"] = (
+                Administration.objects.descendants_of(adm, include_self=True)
+            )
 
         queryset = form.form_form_data.filter(**filter_data).order_by(
             "-created"
@@ -218,7 +212,14 @@ class FormDataAddListView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        serializer.save()
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            return Response(
+                {"message": DUPLICATE_REGISTRATION_MESSAGE},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response({"message": "ok"}, status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -485,7 +486,14 @@ class PendingFormDataView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        serializer.save()
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            return Response(
+                {"message": DUPLICATE_REGISTRATION_MESSAGE},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response({"message": "ok"}, status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -735,11 +743,10 @@ class DraftFormDataListView(APIView):
         # Apply administration filter if provided
         administration = serializer.validated_data.get("administration", None)
         if administration:
-            adm = serializer.validated_data.get("administration")
-            adm_path = adm.path if adm.path else f"{adm.pk}."
             queryset = queryset.filter(
-                Q(administration__path__startswith=adm_path) |
-                Q(administration=adm)
+                administration__in=Administration.objects.descendants_of(
+                    administration, include_self=True
+                )
             )
 
         paginator = PageNumberPagination()
@@ -898,10 +905,17 @@ class PublishDraftFormDataView(APIView):
         direct_to_data = is_super_admin or not draft_data.has_approval
 
         # Publish the draft data (mark as not draft)
-        draft_data.publish()
-        draft_data.is_pending = True if not direct_to_data else False
-
-        draft_data.save()
+        try:
+            with transaction.atomic():
+                draft_data.publish()
+                draft_data.is_pending = True if not direct_to_data else False
+                draft_data.save()
+        except IntegrityError:
+            # the uuid of the draft is registered already
+            return Response(
+                {"message": DUPLICATE_REGISTRATION_MESSAGE},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         # Save to file if it's published and not pending
         if direct_to_data:
@@ -0,0 +1,43 @@
+import hashlib
+
+from django.db.models import Prefetch
+
+from api.v1.v1_forms.models import (
+    Forms,
+    QuestionGroup,
+    Questions,
+)
+from api.v1.v1_profile.functions import get_user_access
+
+
+def get_form_question_groups(form: Forms):
+    """
+    Question groups of a form, ordered, with their questions, options and
+    attributes prefetched: a form definition is built from four queries
+    regardless of its size.
+    """
+    return QuestionGroup.objects.filter(form=form).order_by(
+        "order"
+    ).prefetch_related(
+        Prefetch(
+            "question_group_question",
+            queryset=Questions.objects.order_by(
+                "order", "id"
+            ).prefetch_related("options", "question_question_attribute"),
+        )
+    )
+
+
+def get_administration_scope(user) -> str:
+    """
+    Hash of the role administrations the user specific parts of a form
+    definition (cascade api and source) are computed from.
+    """
+    access = get_user_access(user)
+    scope = "{0}:{1}".format(
+        int(access.is_superuser),
+        ",".join(
+            sorted({str(r.administration_id) for r in access.roles})
+        ),
+    )
+    return hashlib.md5(scope.encode()).hexdigest()[:12]
@@ -1,6 +1,8 @@
 import uuid
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 # Create your models here.
 from api.v1.v1_forms.constants import (
@@ -9,6 +11,7 @@ from api.v1.v1_forms.constants import (
     FormTypes,
 )
 from api.v1.v1_users.models import SystemUser
+from utils.tiered_cache import CacheScopes, invalidate_cache
 
 
 class Forms(models.Model):
@@ -97,7 +100,9 @@ class Questions(models.Model):
         return f"[TYPE: {self.type}] {self.label}"
 
     def to_definition(self):
-        options = self.options.values("label", "value")
+        options = [
+            {"label": o.label, "value": o.value} for o in self.options.all()
+        ]
         return {
             "id": self.id,
             "qg_id": self.question_group.id,
@@ -184,3 +189,17 @@ class QuestionAttribute(models.Model):
     class Meta:
         unique_together = ("name", "question", "attribute", "options")
         db_table = "question_attribute"
+
+
+@receiver(post_save, sender=Forms)
+@receiver(post_delete, sender=Forms)
+@receiver(post_save, sender=QuestionGroup)
+@receiver(post_delete, sender=QuestionGroup)
+@receiver(post_save, sender=Questions)
+@receiver(post_delete, sender=Questions)
+@receiver(post_save, sender=QuestionOptions)
+@receiver(post_delete, sender=QuestionOptions)
+@receiver(post_save, sender=QuestionAttribute)
+@receiver(post_delete, sender=QuestionAttribute)
+def invalidate_form_cache(sender, **_):
+    invalidate_cache(CacheScopes.forms)
@@ -6,12 +6,12 @@ from drf_spectacular.utils import extend_schema_field, inline_serializer
 from rest_framework import serializers
 
 from api.v1.v1_forms.constants import QuestionTypes, AttributeTypes
+from api.v1.v1_forms.functions import get_form_question_groups
 from api.v1.v1_forms.models import (
     Forms,
     QuestionGroup,
     Questions,
     QuestionOptions,
-    QuestionAttribute,
 )
 from api.v1.v1_profile.models import (
     Administration,
@@ -84,14 +84,7 @@ class ListQuestionSerializer(serializers.ModelSerializer):
     def get_api(self, instance: Questions):
         if instance.type == QuestionTypes.administration:
             user = self.context.get("user")
-            administration = Administration.objects.filter(
-                parent__isnull=True
-            ).first()
-            user_role = user.user_user_role.filter(
-                administration__parent__isnull=False
-            ).order_by("administration__level__level").first()
-            if user_role:
-                administration = user_role.administration
+            administration = self.get_user_administration()
             # max depth for cascade question in national form
             max_level = instance.api.get("max_level") \
                 if instance.api else None
@@ -105,25 +98,16 @@ class ListQuestionSerializer(serializers.ModelSerializer):
                     extra_objects = {
                         "query_params": f"&max_level={max_level}",
                     }
-                initial = administration.id
-                if administration.parent:
-                    filter_children = "&".join([
-                        f"filter_children={ur.administration.id}"
-                        for ur in user.user_user_role.filter(
-                            administration__parent=administration.parent
-                        ).all()
-                    ])
-                    initial = f"{administration.parent.id}?{filter_children}"
                 return {
                     "endpoint": "/api/v1/administration",
                     "list": "children",
-                    "initial":  initial,
+                    "initial": administration["initial"],
                     **extra_objects,
                 }
             return {
                 "endpoint": "/api/v1/administration",
                 "list": "children",
-                "initial": administration.id,
+                "initial": administration["id"],
                 **extra_objects,
             }
         if instance.type == QuestionTypes.cascade:
@@ -223,10 +207,7 @@ class ListQuestionSerializer(serializers.ModelSerializer):
                 cascade_type = instance.extra.get("type")
                 cascade_name = instance.extra.get("name")
                 if cascade_type == "entity":
-                    entity_type = Entity.objects.filter(
-                        name=cascade_name
-                    ).first()
-                    entity_id = entity_type.id if entity_type else None
+                    entity_id = self.get_entity_id(cascade_name)
                     return {
                         "file": "entity_data.sqlite",
                         "cascade_type": entity_id,
@@ -240,17 +221,60 @@ class ListQuestionSerializer(serializers.ModelSerializer):
                 }
             return {
                 "file": "administrator.sqlite",
-                "parent_id": [a.id for a in assignment.administrations.all()]
-                if assignment
-                else [
-                    ur.administration.id
-                    for ur in
-                    user.user_user_role.all()
-                ],
+                "parent_id": self.get_source_administration_ids(
+                    user=user, assignment=assignment
+                ),
                 **extra_objects,
             }
         return None
 
+    # The helpers below are resolved once per form: nested serializers
+    # share the context of the form serializer.
+    def get_user_administration(self) -> dict:
+        administration = self.context.get("user_administration")
+        if administration:
+            return administration
+        user = self.context.get("user")
+        adm = Administration.objects.filter(parent__isnull=True).first()
+        user_role = user.user_user_role.filter(
+            administration__parent__isnull=False
+        ).order_by("administration__level__level").first()
+        if user_role:
+            adm = user_role.administration
+        initial = adm.id
+        if not user.is_superuser and adm.parent:
+            filter_children = "&".join([
+                f"filter_children={ur.administration_id}"
+                for ur in user.user_user_role.filter(
+                    administration__parent=adm.parent
+                ).all()
+            ])
+            initial = f"{adm.parent.id}?{filter_children}"
+        administration = {"id": adm.id, "initial": initial}
+        self.context["user_administration"] = administration
+        return administration
+
+    def get_source_administration_ids(self, user, assignment) -> list:
+        if "source_administration_ids" not in self.context:
+            self.context["source_administration_ids"] = (
+                [adm.id for adm in assignment.administrations.all()]
+                if assignment
+                else list(
+                    user.user_user_role.values_list(
+                        "administration_id", flat=True
+                    )
+                )
+            )
+        return self.context["source_administration_ids"]
+
+    def get_entity_id(self, name):
+        entity_ids = self.context.setdefault("entity_ids", {})
+        if name not in entity_ids:
+            entity_ids[name] = Entity.objects.filter(
+                name=name
+            ).values_list("id", flat=True).first()
+        return entity_ids[name]
+
     class Meta:
         model = Questions
         fields = [
@@ -283,8 +307,9 @@ class ListQuestionGroupSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(ListQuestionSerializer(many=True))
     def get_question(self, instance: QuestionGroup):
+        # questions are prefetched in order by get_form_question_groups
         return ListQuestionSerializer(
-            instance=instance.question_group_question.all().order_by("order"),
+            instance=instance.question_group_question.all(),
             context=self.context,
             many=True,
         ).data
@@ -330,20 +355,39 @@ class WebFormDetailSerializer(serializers.ModelSerializer):
     question_group = serializers.SerializerMethodField()
     cascades = serializers.SerializerMethodField()
 
+    def get_question_groups(self, instance: Forms):
+        question_groups = self.context.setdefault("question_groups", {})
+        if instance.id not in question_groups:
+            question_groups[instance.id] = list(
+                get_form_question_groups(form=instance)
+            )
+        return question_groups[instance.id]
+
     @extend_schema_field(ListQuestionGroupSerializer(many=True))
     def get_question_group(self, instance: Forms):
         return ListQuestionGroupSerializer(
-            instance=instance.form_question_group.all().order_by("order"),
+            instance=self.get_question_groups(instance),
             many=True,
             context=self.context,
         ).data
 
     @extend_schema_field(serializers.ListField())
     def get_cascades(self, instance: Forms):
-        cascade_questions = Questions.objects.filter(
-            type__in=[QuestionTypes.cascade, QuestionTypes.administration],
-            form=instance,
-        ).all()
+        # same questions, in the same (id) order, as the original
+        # Questions.objects.filter(form=instance) lookup
+        cascade_questions = sorted(
+            [
+                q
+                for qg in self.get_question_groups(instance)
+                for q in qg.question_group_question.all()
+                if q.form_id == instance.id
+                and q.type in [
+                    QuestionTypes.cascade,
+                    QuestionTypes.administration,
+                ]
+            ],
+            key=lambda q: q.id,
+        )
         source = []
         for cascade_question in cascade_questions:
             if cascade_question.type == QuestionTypes.administration:
@@ -419,11 +463,9 @@ class FormDataListQuestionSerializer(serializers.ModelSerializer):
         )
     )
     def get_attributes(self, instance: Questions):
-        attribute_ids = (
-            QuestionAttribute.objects.filter(question=instance)
-            .values_list("attribute", flat=True)
-            .distinct()
-        )
+        attribute_ids = sorted({
+            a.attribute for a in instance.question_question_attribute.all()
+        })
         if attribute_ids:
             return [AttributeTypes.FieldStr.get(a) for a in attribute_ids]
         return []
@@ -467,8 +509,9 @@ class FormDataQuestionGroupSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(FormDataListQuestionSerializer(many=True))
     def get_question(self, instance: QuestionGroup):
+        # questions are prefetched in order by get_form_question_groups
         return FormDataListQuestionSerializer(
-            instance=instance.question_group_question.all().order_by("order"),
+            instance=instance.question_group_question.all(),
             many=True,
         ).data
 
@@ -485,7 +528,7 @@ class FormDataSerializer(serializers.ModelSerializer):
     @extend_schema_field(FormDataQuestionGroupSerializer(many=True))
     def get_question_group(self, instance: Forms):
         return FormDataQuestionGroupSerializer(
-            instance=instance.form_question_group.all().order_by("order"),
+            instance=get_form_question_groups(form=instance),
             many=True,
         ).data
 
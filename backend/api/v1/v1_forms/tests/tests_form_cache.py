@@ -0,0 +1,134 @@
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_profile.models import Administration, UserRole
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+from utils.tiered_cache import (
+    CacheScopes,
+    get_cache_key,
+    get_cache_stats,
+    reset_cache_stats,
+)
+from utils.test_runner import clear_local_caches
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class TieredCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+
+    def test_local_tier_is_filled_from_shared_tier(self):
+        caches["shared"].set("shared-only", {"id": 1})
+        self.assertIsNone(caches["local"].get("shared-only"))
+        self.assertEqual(cache.get("shared-only"), {"id": 1})
+        self.assertEqual(caches["local"].get("shared-only"), {"id": 1})
+        self.assertEqual(cache.get("shared-only"), {"id": 1})
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(
+            get_cache_stats(),
+            {"local_hits": 1, "shared_hits": 1, "misses": 1},
+        )
+
+    def test_set_and_delete_reach_both_tiers(self):
+        cache.set("both", "value")
+        self.assertEqual(caches["local"].get("both"), "value")
+        self.assertEqual(caches["shared"].get("both"), "value")
+        self.assertFalse(cache.add("both", "other"))
+        cache.delete("both")
+        self.assertIsNone(caches["local"].get("both"))
+        self.assertIsNone(caches["shared"].get("both"))
+
+    def test_shared_tier_keeps_room_for_scope_versions(self):
+        self.assertGreaterEqual(caches["shared"]._max_entries, 10000)
+        # a culled scope version is replaced, its entries are not reused
+        key = get_cache_key("forms", scopes=(CacheScopes.forms,))
+        cache.set(key, "value")
+        cache.delete(f"cache-scope-{CacheScopes.forms}")
+        self.assertNotEqual(
+            get_cache_key("forms", scopes=(CacheScopes.forms,)), key
+        )
+
+    def test_local_tier_is_emptied_between_tests(self):
+        cache.set("both", "value")
+        clear_local_caches()
+        self.assertIsNone(caches["local"].get("both"))
+        # the shared tier is rolled back with the test instead
+        self.assertEqual(caches["shared"].get("both"), "value")
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class FormCacheInvalidationTestCase(TestCase, ProfileTestHelperMixin):
+    def setUp(self):
+        cache.clear()
+        call_command("administration_seeder", "--test", 1)
+        call_command("default_roles_seeder", "--test", 1)
+        call_command("form_seeder", "--test", 1)
+        self.form = Forms.objects.get(pk=1)
+        self.user = self.create_user(
+            email="super@akvo.org",
+            role_level=self.IS_SUPER_ADMIN,
+            form=self.form,
+        )
+        self.token = self.get_auth_token(self.user.email)
+
+    def get_web_form(self):
+        return self.client.get(
+            f"/api/v1/form/web/{self.form.id}",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        ).json()
+
+    def get_form_data(self):
+        return self.client.get(
+            f"/api/v1/form/{self.form.id}",
+            content_type="application/json",
+        ).json()
+
+    def test_form_change_invalidates_cached_definitions(self):
+        self.assertEqual(self.get_web_form()["name"], self.form.name)
+        self.assertEqual(self.get_form_data()["name"], self.form.name)
+        self.form.name = "Renamed Form"
+        self.form.save()
+        self.assertEqual(self.get_web_form()["name"], "Renamed Form")
+        self.assertEqual(self.get_form_data()["name"], "Renamed Form")
+
+    def test_question_change_invalidates_cached_definitions(self):
+        question = self.form.form_questions.first()
+        self.get_form_data()
+        question.label = "Renamed question"
+        question.save()
+        labels = [
+            q["label"]
+            for qg in self.get_form_data()["question_group"]
+            for q in qg["question"]
+        ]
+        self.assertIn("Renamed question", labels)
+
+    def test_scopes_are_invalidated_by_hooks(self):
+        key = "cache-scope-{0}"
+        versions = {
+            s: cache.get(key.format(s))
+            for s in [CacheScopes.administrations, CacheScopes.roles]
+        }
+        adm = Administration.objects.filter(parent__isnull=False).first()
+        adm.name = "Renamed"
+        adm.save()
+        self.assertNotEqual(
+            cache.get(key.format(CacheScopes.administrations)),
+            versions[CacheScopes.administrations],
+        )
+        UserRole.objects.filter(user=self.user).delete()
+        user = self.create_user(
+            email="admin@akvo.org",
+            role_level=self.IS_ADMIN,
+            administration=adm,
+        )
+        self.assertTrue(user.user_user_role.exists())
+        self.assertNotEqual(
+            cache.get(key.format(CacheScopes.roles)),
+            versions[CacheScopes.roles],
+        )
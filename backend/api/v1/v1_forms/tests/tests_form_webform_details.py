@@ -1,8 +1,19 @@
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
-from django.test.utils import override_settings
-
-from api.v1.v1_forms.models import Forms
+from django.test.utils import override_settings, CaptureQueriesContext
+
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import (
+    Forms,
+    QuestionGroup,
+    Questions,
+    QuestionOptions,
+)
+from api.v1.v1_forms.serializers import (
+    FormDataSerializer,
+    WebFormDetailSerializer,
+)
 from api.v1.v1_profile.models import Administration
 from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
 
@@ -28,6 +39,7 @@ class WebFormDetailsTestCase(TestCase, ProfileTestHelperMixin):
         )
         user.set_password("password")
         user.save()
+        self.user = user
 
         self.token = self.get_auth_token(
             email=user.email,
@@ -65,6 +77,26 @@ class WebFormDetailsTestCase(TestCase, ProfileTestHelperMixin):
             ]
         )
 
+    def test_cascades_are_unchanged(self):
+        for form in Forms.objects.all():
+            source = []
+            for question in Questions.objects.filter(
+                type__in=[QuestionTypes.cascade, QuestionTypes.administration],
+                form=form,
+            ).order_by("id"):
+                if question.type == QuestionTypes.administration:
+                    source.append("/sqlite/administrator.sqlite")
+                if question.extra and question.extra.get("type") == "entity":
+                    source.append("/sqlite/entity_data.sqlite")
+                else:
+                    source.append("/sqlite/organisation.sqlite")
+            data = WebFormDetailSerializer(
+                instance=form, context={"user": self.user}
+            ).data
+            self.assertEqual(
+                list(data["cascades"]), sorted(set(source)), form.name
+            )
+
     def test_get_web_form_details_by_superuser(self):
         superuser = self.create_user(
             email="super@akvo.org",
@@ -119,3 +151,87 @@ class WebFormDetailsTestCase(TestCase, ProfileTestHelperMixin):
     def test_get_web_form_details_without_authentication(self):
         response = self.client.get(f"/api/v1/form/web/{self.form.id}/")
         self.assertEqual(response.status_code, 401)
+
+    def test_web_form_details_etag(self):
+        url = f"/api/v1/form/web/{self.form.id}/"
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response["Last-Modified"])
+
+        response = self.client.get(
+            url,
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        # the definition depends on the administrations of the user
+        other = self.create_user(
+            email="user.456@test.com",
+            role_level=self.IS_ADMIN,
+            administration=Administration.objects.filter(
+                level__level__gt=2
+            ).exclude(pk=self.adm.pk).first(),
+            form=self.form,
+        )
+        response = self.client.get(
+            url,
+            HTTP_AUTHORIZATION=(
+                f"Bearer {self.get_auth_token(other.email)}"
+            ),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # a new form version gets a new tag
+        self.form.version += 1
+        self.form.save()
+        response = self.client.get(
+            url,
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["version"], self.form.version)
+
+    def test_form_data_etag(self):
+        url = f"/api/v1/form/{self.form.id}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_form_definition_query_count_does_not_grow(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                WebFormDetailSerializer(
+                    instance=self.form, context={"user": self.user}
+                ).data
+                FormDataSerializer(instance=self.form).data
+            return len(ctx.captured_queries)
+
+        expected = count_queries()
+        question_group = QuestionGroup.objects.create(
+            form=self.form, name="extra", label="Extra", order=99
+        )
+        for order in range(5):
+            question = Questions.objects.create(
+                form=self.form,
+                question_group=question_group,
+                name=f"extra_{order}",
+                label=f"Extra {order}",
+                order=order,
+                type=QuestionTypes.option,
+            )
+            QuestionOptions.objects.bulk_create([
+                QuestionOptions(question=question, value=v, label=v)
+                for v in ["yes", "no"]
+            ])
+        self.assertEqual(count_queries(), expected)
@@ -28,8 +28,10 @@ from api.v1.v1_profile.models import (
     DataAccessTypes,
     UserRole,
 )
-from api.v1.v1_data.functions import get_cache, create_cache
+from api.v1.v1_forms.functions import get_administration_scope
 from utils.custom_serializer_fields import validate_serializers_message
+from utils.cached_response import cached_response
+from utils.tiered_cache import CacheScopes
 
 
 @extend_schema(
@@ -55,25 +57,21 @@ def list_form(request, version):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def web_form_details(request, version, form_id):
-    administration = Administration.objects.filter(
-        parent__isnull=True,
-    ).first()
-    if not request.user.is_superuser:
-        user_role = request.user.user_user_role.filter(
-            role__role_role_access__data_access=DataAccessTypes.submit
-        ).first()
-        if user_role:
-            administration = user_role.administration
-    cache_name = f"webform-{form_id}-{administration.id}"
-    cache_data = get_cache(cache_name)
-    if cache_data:
-        return Response(cache_data, content_type="application/json;")
-    instance = get_object_or_404(Forms, pk=form_id)
-    instance = WebFormDetailSerializer(
-        instance=instance, context={"user": request.user}
-    ).data
-    create_cache(cache_name, instance)
-    return Response(instance, status=status.HTTP_200_OK)
+    form = get_object_or_404(Forms, pk=form_id)
+    scope = get_administration_scope(request.user)
+    return cached_response(
+        request=request,
+        cache_name=f"webform-{form.id}-v{form.version}-{scope}",
+        scopes=(
+            CacheScopes.forms,
+            CacheScopes.administrations,
+            CacheScopes.roles,
+        ),
+        serialize=lambda: WebFormDetailSerializer(
+            instance=form,
+            context={"user": request.user},
+        ).data,
+    )
 
 
 @extend_schema(
@@ -83,14 +81,13 @@ def web_form_details(request, version, form_id):
 )
 @api_view(["GET"])
 def form_data(request, version, form_id):
-    cache_name = f"form-{form_id}"
-    cache_data = get_cache(cache_name)
-    if cache_data:
-        return Response(cache_data, content_type="application/json;")
-    instance = get_object_or_404(Forms, pk=form_id)
-    instance = FormDataSerializer(instance=instance).data
-    create_cache(cache_name, instance)
-    return Response(instance, status=status.HTTP_200_OK)
+    form = get_object_or_404(Forms, pk=form_id)
+    return cached_response(
+        request=request,
+        cache_name=f"form-{form.id}-v{form.version}",
+        scopes=(CacheScopes.forms,),
+        serialize=lambda: FormDataSerializer(instance=form).data,
+    )
 
 
 @extend_schema(
@@ -123,10 +120,8 @@ def form_approver(request, version):
         )
 
     adm = serializer.validated_data.get("administration_id")
-    path = adm.path if adm.path else f"{adm.id}."
-    instance = Administration.objects.filter(
-        path__startswith=path,
-    )
+    # the administration itself comes between its ancestors and these
+    instance = Administration.objects.descendants_of(adm)
     ancestors = list(adm.ancestors.all()) if adm.ancestors else []
     instance = ancestors + [
         serializer.validated_data.get("administration_id")
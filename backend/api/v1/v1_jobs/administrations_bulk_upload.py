@@ -19,7 +19,12 @@ logger = logging.getLogger(__name__)
 # [[ SEEDER ]]
 
 @transaction.atomic
-def seed_administration_data(io_file):
+def seed_administration_data(io_file) -> List[Administration]:
+    """
+    Seed the administrations and attributes of an uploaded file,
+    returning the administrations it created.
+    """
+    created = []
     df = pd.read_excel(io_file, sheet_name='data')
     columns = list(df)
     columns = [col for col in columns if 'Code' not in col]
@@ -46,7 +51,9 @@ def seed_administration_data(io_file):
                 row[col],
                 administration_code
             ))
-        target_administration = seed_administrations(administration_data)
+        target_administration = seed_administrations(
+            administration_data, created=created
+        )
         if not target_administration:
             break
         attribute_data = []
@@ -55,10 +62,12 @@ def seed_administration_data(io_file):
                 continue
             attribute_data.append((attribute, row[col], col))
         seed_attributes(target_administration, attribute_data)
+    return created
 
 
 def seed_administrations(
-        data: List[Tuple[Levels, str, str]]
+        data: List[Tuple[Levels, str, str]],
+        created: List[Administration] = None,
         ) -> Union[Administration, None]:
     last_obj = None
     for item in data:
@@ -75,6 +84,8 @@ def seed_administrations(
                 level=level,
                 parent=last_obj
             )
+            if created is not None:
+                created.append(obj)
         last_obj = obj
     return last_obj
 
@@ -0,0 +1,430 @@
+"""
+Set-based export engine for the form-data Excel download.
+
+Submissions are read in keyset-paginated chunks; for every chunk the
+answers, the latest (or all) monitoring submissions and the
+administration names are fetched with a handful of bulk queries and the
+answers are pivoted with pandas into one column per question. Rows are
+yielded one by one so the ``data`` sheet can be written as it goes.
+"""
+import pandas as pd
+from django.db.models import Max, Q
+
+from api.v1.v1_data.models import Answers, FormData
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Forms, QuestionOptions, Questions
+from api.v1.v1_jobs.constants import DataDownloadTypes
+from api.v1.v1_profile.models import Administration
+from utils.export_form import meta_columns
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_DATE_FORMAT = "%B %d, %Y %I:%M %p"
+EMPTY_ANSWER = object()
+
+OPTION_TYPES = [
+    QuestionTypes.geo,
+    QuestionTypes.option,
+    QuestionTypes.multiple_option,
+]
+LABEL_TYPES = [
+    QuestionTypes.option,
+    QuestionTypes.multiple_option,
+]
+NAME_TYPES = [
+    QuestionTypes.input,
+    QuestionTypes.text,
+    QuestionTypes.photo,
+    QuestionTypes.date,
+    QuestionTypes.autofield,
+    QuestionTypes.cascade,
+    QuestionTypes.attachment,
+    QuestionTypes.signature,
+]
+FORM_DATA_FIELDS = [
+    "id",
+    "parent_id",
+    "form_id",
+    "name",
+    "administration_id",
+    "uuid",
+    "geo",
+    "created",
+    "updated",
+    "created_by__first_name",
+    "created_by__last_name",
+    "updated_by__first_name",
+    "updated_by__last_name",
+]
+
+
+class AdministrationColumns:
+    """
+    Resolve ``Administration.administration_column`` for many ids at
+    once, keeping every resolved name for the lifetime of the export.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._columns = {}
+
+    def _load_names(self, ids):
+        missing = set(ids) - set(self._names)
+        if not missing:
+            return
+        for adm in Administration.objects.filter(id__in=missing).values(
+            "id", "name"
+        ):
+            self._names[adm["id"]] = adm["name"]
+
+    def resolve(self, ids) -> dict:
+        ids = {int(i) for i in ids if i is not None and i == i}
+        missing = ids - set(self._columns)
+        if missing:
+            paths = {
+                adm["id"]: adm["path"]
+                for adm in Administration.objects.filter(
+                    id__in=missing
+                ).values("id", "path")
+            }
+            ancestors = {
+                adm_id: [int(p) for p in (path or "").split(".") if p]
+                for adm_id, path in paths.items()
+            }
+            self._load_names(
+                list(paths) + [p for ids in ancestors.values() for p in ids]
+            )
+            for adm_id, parent_ids in ancestors.items():
+                self._columns[adm_id] = "|".join(
+                    [self._names[p] for p in parent_ids if p in self._names]
+                    + [self._names[adm_id]]
+                )
+        return {i: self._columns.get(i) for i in ids}
+
+
+def get_export_forms(form: Forms, child_form_ids: list = []) -> list:
+    child_forms = {
+        f.id: f for f in form.children.filter(id__in=child_form_ids).all()
+    }
+    return [form] + [
+        child_forms[fid] for fid in child_form_ids if fid in child_forms
+    ]
+
+
+def get_export_queryset(form: Forms, administration_ids: list = None):
+    filter_data = {
+        "is_pending": False,
+        "is_draft": False,
+    }
+    if administration_ids:
+        filter_data["administration_id__in"] = administration_ids
+    return FormData.objects.filter(form=form, **filter_data)
+
+
+def get_export_questions(forms: list) -> dict:
+    form_order = {f.id: i for i, f in enumerate(forms)}
+    questions = Questions.objects.filter(form__in=forms).values(
+        "id",
+        "form_id",
+        "name",
+        "type",
+        "question_group__order",
+        "order",
+        "question_group__repeatable",
+    )
+    questions = sorted(
+        questions,
+        key=lambda q: (
+            form_order[q["form_id"]],
+            q["question_group__order"] or 0,
+            q["order"] or 0,
+        ),
+    )
+    return {q["id"]: q for q in questions}
+
+
+def get_export_columns(questions: dict, data) -> list:
+    max_index = dict(
+        Answers.objects.filter(
+            Q(data__in=data) | Q(data__parent__in=data),
+            question_id__in=list(questions),
+            data__is_pending=False,
+            data__is_draft=False,
+            index__gt=0,
+        )
+        .values("question_id")
+        .annotate(max_index=Max("index"))
+        .values_list("question_id", "max_index")
+    )
+    columns = meta_columns + ["uuid"]
+    for qid, q in questions.items():
+        for index in range(max_index.get(qid, 0) + 1):
+            if index or q["question_group__repeatable"]:
+                columns.append(f"{q['name']}_{index + 1}")
+            else:
+                columns.append(q["name"])
+    return columns
+
+
+def get_option_labels(questions: dict) -> dict:
+    options = QuestionOptions.objects.filter(
+        question_id__in=[
+            qid for qid, q in questions.items() if q["type"] in LABEL_TYPES
+        ]
+    ).values_list("question_id", "value", "label")
+    return {(qid, value): label for qid, value, label in options}
+
+
+def pivot_answers(
+    answers: list,
+    questions: dict,
+    administrations: AdministrationColumns,
+    labels: dict = None,
+) -> dict:
+    """
+    Turn a flat list of answer rows into ``{data_id: {column: answer}}``
+    using the same column naming and value formatting as
+    ``Answers.to_data_frame``; option values are replaced by their
+    labels when ``labels`` is given.
+    """
+    if not answers:
+        return {}
+    df = pd.DataFrame.from_records(answers)
+    qtype = df["question_id"].map(lambda q: questions[q]["type"])
+    name = df["question_id"].map(lambda q: f"{questions[q]['name']}")
+    repeatable = df["question_id"].map(
+        lambda q: questions[q]["question_group__repeatable"]
+    )
+    suffixed = (df["index"] > 0) | repeatable
+    df["column"] = name.where(
+        ~suffixed, name + "_" + (df["index"] + 1).astype(str)
+    )
+
+    df["answer"] = df["value"].astype(object)
+    name_mask = qtype.isin(NAME_TYPES)
+    df.loc[name_mask, "answer"] = df.loc[name_mask, "name"]
+
+    option_mask = qtype.isin(OPTION_TYPES)
+    if option_mask.any():
+        use_label = labels is not None
+        df.loc[option_mask, "answer"] = [
+            None if opts is None else "|".join(
+                [labels[(q, v)] for v in opts if (q, v) in labels]
+                if use_label and t in LABEL_TYPES
+                else map(str, opts)
+            )
+            for q, t, opts in zip(
+                df.loc[option_mask, "question_id"],
+                qtype[option_mask],
+                df.loc[option_mask, "options"],
+            )
+        ]
+
+    admin_mask = qtype == QuestionTypes.administration
+    if admin_mask.any():
+        adm_columns = administrations.resolve(df.loc[admin_mask, "value"])
+        df.loc[admin_mask, "answer"] = df.loc[admin_mask, "value"].map(
+            lambda v: adm_columns.get(int(v)) if v == v else None
+        )
+
+    # keep answers without a value apart from the cells the pivot leaves
+    # empty, so the row still carries the key of every stored answer
+    df["answer"] = df["answer"].where(df["answer"].notna(), EMPTY_ANSWER)
+    wide = df.drop_duplicates(["data_id", "column"], keep="last").pivot(
+        index="data_id", columns="column", values="answer"
+    )
+    return {
+        data_id: {
+            k: None if v is EMPTY_ANSWER else v
+            for k, v in row.items()
+            if v is EMPTY_ANSWER or not pd.isna(v)
+        }
+        for data_id, row in wide.to_dict("index").items()
+    }
+
+
+def _full_name(fd: dict, prefix: str):
+    if fd[f"{prefix}__first_name"] is None:
+        return None
+    return "{0} {1}".format(
+        fd[f"{prefix}__first_name"], fd[f"{prefix}__last_name"]
+    )
+
+
+def _meta_row(fd: dict, administrations: dict) -> dict:
+    geo = fd["geo"]
+    return {
+        "id": fd["id"],
+        "datapoint_name": fd["name"],
+        "administration": administrations.get(fd["administration_id"]),
+        "uuid": fd["uuid"],
+        "geolocation": f"{geo[0]}, {geo[1]}" if geo else None,
+        "created_by": _full_name(fd, "created_by"),
+        "updated_by": _full_name(fd, "updated_by"),
+        "created_at": fd["created"].strftime(EXPORT_DATE_FORMAT),
+        "updated_at": (
+            fd["updated"].strftime(EXPORT_DATE_FORMAT)
+            if fd["updated"]
+            else None
+        ),
+    }
+
+
+def _merge_child(row: dict, parent: dict, child: dict) -> dict:
+    # keep datapoint_name, created_at and created_by from the parent
+    return {
+        **row,
+        **child,
+        "datapoint_name": parent["datapoint_name"],
+        "created_at": parent["created_at"],
+        "created_by": parent["created_by"],
+        "updated_by": child["created_by"],
+    }
+
+
+def iter_form_data_chunks(queryset, size: int = EXPORT_CHUNK_SIZE):
+    last_id = 0
+    while True:
+        chunk = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values(*FORM_DATA_FIELDS)[:size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]["id"]
+
+
+def iter_export_rows(
+    form: Forms,
+    administration_ids: list = None,
+    download_type: str = DataDownloadTypes.recent,
+    child_form_ids: list = [],
+    use_label: bool = False,
+    questions: dict = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+):
+    """
+    Yield one dict per exported row, in submission id order, with the
+    same shape as merging ``FormData.to_data_frame`` of the registration
+    and its monitoring submissions.
+    """
+    forms = get_export_forms(form=form, child_form_ids=child_form_ids)
+    child_form_ids = [f.id for f in forms[1:]]
+    if questions is None:
+        questions = get_export_questions(forms=forms)
+    labels = get_option_labels(questions) if use_label else None
+    administrations = AdministrationColumns()
+    queryset = get_export_queryset(
+        form=form, administration_ids=administration_ids
+    )
+    for parents in iter_form_data_chunks(queryset, size=chunk_size):
+        parent_ids = [fd["id"] for fd in parents]
+        children = FormData.objects.filter(
+            parent_id__in=parent_ids,
+            form_id__in=child_form_ids,
+            is_pending=False,
+            is_draft=False,
+        )
+        if download_type == DataDownloadTypes.recent:
+            # latest submission per registration and monitoring form
+            children = children.order_by(
+                "parent_id", "form_id", "-id"
+            ).distinct("parent_id", "form_id")
+        children = list(children.values(*FORM_DATA_FIELDS))
+        with_children = set()
+        if download_type == DataDownloadTypes.all:
+            with_children = set(
+                FormData.objects.filter(
+                    parent_id__in=parent_ids,
+                    is_pending=False,
+                    is_draft=False,
+                ).values_list("parent_id", flat=True).distinct()
+            )
+
+        adm_columns = administrations.resolve(
+            [fd["administration_id"] for fd in parents + children]
+        )
+        answers = pivot_answers(
+            answers=list(
+                Answers.objects.filter(
+                    data_id__in=parent_ids + [fd["id"] for fd in children],
+                    question_id__in=list(questions),
+                )
+                .order_by("id")
+                .values(
+                    "data_id", "question_id", "index",
+                    "name", "value", "options",
+                )
+            ),
+            questions=questions,
+            administrations=administrations,
+            labels=labels,
+        )
+        child_rows = {}
+        for fd in sorted(children, key=lambda c: c["id"]):
+            child_rows.setdefault(
+                (fd["parent_id"], fd["form_id"]), []
+            ).append({
+                **_meta_row(fd, adm_columns),
+                **answers.get(fd["id"], {}),
+            })
+
+        for fd in parents:
+            parent = {
+                **_meta_row(fd, adm_columns),
+                **answers.get(fd["id"], {}),
+            }
+            if download_type == DataDownloadTypes.recent:
+                row = parent
+                for child_form_id in child_form_ids:
+                    for child in child_rows.get((fd["id"], child_form_id), []):
+                        row = _merge_child(row, parent, child)
+                yield row
+                continue
+            for child_form_id in child_form_ids:
+                for child in child_rows.get((fd["id"], child_form_id), []):
+                    yield _merge_child(parent, parent, child)
+            if fd["id"] not in with_children:
+                yield parent
+
+
+def write_data_sheet(
+    writer: pd.ExcelWriter,
+    form: Forms,
+    administration_ids: list = None,
+    download_type: str = DataDownloadTypes.recent,
+    use_label: bool = True,
+    child_form_ids: list = [],
+) -> int:
+    """
+    Stream the exported rows straight into the ``data`` worksheet and
+    return the number of rows written.
+    """
+    forms = get_export_forms(form=form, child_form_ids=child_form_ids)
+    questions = get_export_questions(forms=forms)
+    columns = get_export_columns(
+        questions=questions,
+        data=get_export_queryset(
+            form=form, administration_ids=administration_ids
+        ),
+    )
+    workbook = writer.book
+    worksheet = workbook.add_worksheet("data")
+    writer.sheets["data"] = worksheet
+    header_format = workbook.add_format(
+        {"bold": True, "text_wrap": True, "valign": "top", "border": 1}
+    )
+    worksheet.write_row(0, 0, columns, header_format)
+    total = 0
+    for row in iter_export_rows(
+        form=form,
+        administration_ids=administration_ids,
+        download_type=download_type,
+        child_form_ids=[f.id for f in forms[1:]],
+        use_label=use_label,
+        questions=questions,
+    ):
+        total += 1
+        worksheet.write_row(total, 0, [row.get(c) for c in columns])
+    return total
@@ -16,12 +16,19 @@ from utils.upload_entities import (
 )
 from api.v1.v1_forms.models import (
     Forms,
+    QuestionGroup,
     QuestionOptions,
+    Questions,
 )
 from api.v1.v1_forms.constants import QuestionTypes
-from api.v1.v1_data.models import FormData
+from api.v1.v1_data.models import Answers, FormData
 from api.v1.v1_jobs.constants import JobStatus, JobTypes
 
+from api.v1.v1_jobs.export_data import (
+    get_export_queryset,
+    iter_export_rows,
+    write_data_sheet,
+)
 from api.v1.v1_jobs.models import Jobs
 from api.v1.v1_jobs.seed_data import seed_excel_data
 from api.v1.v1_jobs.validate_upload import validate
@@ -32,13 +39,14 @@ from utils import storage
 from utils.email_helper import send_email, EmailTypes
 from utils.export_form import (
     generate_definition_sheet,
-    get_question_names,
     blank_data_template,
-    meta_columns,
 )
 from utils.functions import update_date_time_format
 from utils.storage import upload
-from utils.custom_generator import generate_sqlite
+from utils.custom_generator import (
+    administration_csv_add_many,
+    generate_sqlite,
+)
 from utils.report_generator import generate_datapoint_report
 
 logger = logging.getLogger(__name__)
@@ -50,67 +58,14 @@ def download_data(
     download_type: str = DataDownloadTypes.recent,
     child_form_ids: list = []
 ) -> list:
-    filter_data = {
-        "is_pending": False,
-        "is_draft": False,
-    }
-    if administration_ids:
-        filter_data["administration_id__in"] = administration_ids
-    data = form.form_form_data.filter(**filter_data).order_by("id").all()
-    data_items = []
-    for d in data:
-        if download_type == DataDownloadTypes.recent:
-            item = d.to_data_frame
-            for child_form in child_form_ids:
-                dl = d.children.filter(
-                    form_id=child_form,
-                    is_pending=False,
-                    is_draft=False,
-                ).last()
-                if dl:
-                    # merge parent and child data
-                    item = {**item, **dl.to_data_frame}
-                    # keep datapoint_name and created_at from parent
-                    item["datapoint_name"] = d.name
-                    item["created_at"] = d.to_data_frame.get("created_at")
-                    item["created_by"] = d.created_by.get_full_name()
-                    item["updated_by"] = dl.created_by.get_full_name()
-            data_items.append(item)
-        if download_type == DataDownloadTypes.all:
-            for child_form in child_form_ids:
-                for dl in d.children.filter(
-                    form_id=child_form,
-                    is_pending=False,
-                    is_draft=False,
-                ).all():
-                    data_items.append({
-                        **d.to_data_frame,
-                        **dl.to_data_frame,
-                        "datapoint_name": d.name,
-                        "created_at": d.to_data_frame.get("created_at"),
-                        "created_by": d.created_by.get_full_name(),
-                        "updated_by": dl.created_by.get_full_name(),
-                    })
-        if d.children.filter(
-            is_pending=False,
-            is_draft=False,
-        ).count() == 0 and download_type == DataDownloadTypes.all:
-            data_items.append(d.to_data_frame)
-    return data_items
-
-
-def get_answer_label(answer_values, question_id):
-    if answer_values is None or answer_values != answer_values:
-        return answer_values
-    answer_value = answer_values.split("|")
-    answer_label = []
-    for value in answer_value:
-        options = QuestionOptions.objects.filter(
-            question_id=question_id, value=value
-        ).first()
-        if options:
-            answer_label.append(options.label)
-    return "|".join(answer_label)
+    return list(
+        iter_export_rows(
+            form=form,
+            administration_ids=administration_ids,
+            download_type=download_type,
+            child_form_ids=child_form_ids,
+        )
+    )
 
 
 def generate_data_sheet(
@@ -121,65 +76,18 @@ def generate_data_sheet(
     use_label: bool = True,
     child_form_ids: list = [],
 ) -> None:
-    questions = get_question_names(form=form)
-    if len(child_form_ids):
-        child_forms = form.children.filter(id__in=child_form_ids).all()
-        for child_form in child_forms:
-            questions.extend(get_question_names(form=child_form))
-    data = download_data(
-        form=form,
-        administration_ids=administration_ids,
-        download_type=download_type,
-        child_form_ids=child_form_ids,
+    data = get_export_queryset(
+        form=form, administration_ids=administration_ids
     )
-    if len(data):
-        df = pd.DataFrame(data)
-        # Create a mapping of base question names to question info for lookup
-        question_map = {}
-        for question in questions:
-            question_id, question_name, question_type = question
-            question_map[question_name] = {
-                'id': question_id,
-                'type': question_type,
-                'name': question_name
-            }
-        # Get all actual column names from the dataframe (including indexed)
-        actual_columns = [col for col in df.columns if col not in meta_columns]
-        # Ensure all question columns exist in dataframe (base and indexed)
-        for question in questions:
-            question_id, question_name, question_type = question
-            if question_name not in df:
-                df[question_name] = None
-
-        # Process labels for option-type questions (including indexed columns)
-        new_columns = {}
-        if use_label:
-            for col_name in actual_columns:
-                # Check if this is an indexed column (contains underscore)
-                base_question_name = (
-                    col_name.split('_')[0] if '_' in col_name else col_name
-                )
-                if base_question_name in question_map:
-                    question_info = question_map[base_question_name]
-                    if question_info['type'] in [
-                        QuestionTypes.option,
-                        QuestionTypes.multiple_option,
-                    ]:
-                        new_columns[col_name] = df[col_name].apply(
-                            lambda x: get_answer_label(x, question_info['id'])
-                        )
-        # Apply label transformations
-        if use_label and new_columns:
-            new_df = pd.DataFrame(new_columns)
-            df.drop(columns=list(new_columns.keys()), inplace=True)
-            df = pd.concat([df, new_df], axis=1)
-        # Reorder columns: meta columns first, then all question columns
-        available_question_columns = [
-            col for col in df.columns if col not in meta_columns
-        ]
-        final_columns = meta_columns + available_question_columns
-        df = df[final_columns]
-        df.to_excel(writer, sheet_name="data", index=False)
+    if data.exists():
+        write_data_sheet(
+            writer=writer,
+            form=form,
+            administration_ids=administration_ids,
+            download_type=download_type,
+            use_label=use_label,
+            child_form_ids=child_form_ids,
+        )
         generate_definition_sheet(
             writer=writer,
             form=form,
@@ -200,24 +108,11 @@ def job_generate_data_download(job_id, **kwargs):
         administration = Administration.objects.get(
             pk=kwargs.get("administration")
         )
-        if administration.path:
-            filter_path = "{0}{1}.".format(
-                administration.path, administration.id
-            )
-        else:
-            filter_path = f"{administration.id}."
-        administration_ids = list(
-            Administration.objects.filter(
-                path__startswith=filter_path
-            ).values_list("id", flat=True)
-        )
+        descendants = Administration.objects.descendants_of(administration)
+        administration_ids = list(descendants.values_list("id", flat=True))
         administration_ids.append(administration.id)
 
-        administration_name = list(
-            Administration.objects.filter(
-                path__startswith=filter_path
-            ).values_list("name", flat=True)
-        )
+        administration_name = list(descendants.values_list("name", flat=True))
     form = Forms.objects.get(pk=job.info.get("form_id"))
     download_type = kwargs.get("download_type", DataDownloadTypes.recent)
     use_label = kwargs.get("use_label", True)
@@ -288,6 +183,56 @@ def job_generate_data_download(job_id, **kwargs):
     return url
 
 
+def format_report_answer(
+    answer: dict,
+    question_type: int,
+    option_labels: dict,
+    administration_names: dict,
+) -> str:
+    if question_type == QuestionTypes.geo:
+        value = ",".join(map(str, answer["options"]))
+    elif question_type in [
+        QuestionTypes.option,
+        QuestionTypes.multiple_option,
+    ]:
+        options = [
+            label
+            for value, label in option_labels.get(answer["question_id"], [])
+            if value in answer["options"]
+        ]
+        value = "|".join(options) if options else ""
+    elif question_type == QuestionTypes.date:
+        value = ""
+        if isinstance(answer["name"], str) and answer["name"]:
+            try:
+                date_obj = parser.parse(answer["name"])
+                value = date_obj.strftime("%B %d, %Y")
+            except (
+                ImportError, ValueError, TypeError
+            ):  # pragma: no cover
+                value = str(answer["name"])
+    elif question_type in [
+        QuestionTypes.input,
+        QuestionTypes.text,
+        QuestionTypes.photo,
+        QuestionTypes.autofield,
+        QuestionTypes.cascade,
+        QuestionTypes.attachment,
+        QuestionTypes.signature,
+    ]:
+        value = answer["name"] or ""
+    elif question_type == QuestionTypes.administration:
+        if answer["value"]:
+            value = administration_names.get(
+                int(answer["value"]), str(answer["value"])
+            )
+        else:
+            value = ""
+    else:
+        value = answer["value"] if answer["value"] is not None else ""
+    return str(value)
+
+
 def transform_form_data_for_report(
     form: Forms, selection_ids: list = None, child_form_ids: list = []
 ):
@@ -295,6 +240,9 @@ def transform_form_data_for_report(
     Transform form data from database into the format expected by the
     report generator, supporting repeatable question groups by cloning
     the group for each repeat instance and mapping answers by index.
+    Answers, the latest child submissions, option labels and
+    administration names are loaded up front, so the number of queries
+    does not depend on the number of datapoints or questions.
     """
     try:
         forms = [form]
@@ -310,56 +258,133 @@ def transform_form_data_for_report(
             main_form_data_queryset = main_form_data_queryset.filter(
                 id__in=selection_ids
             )
-        main_form_data = main_form_data_queryset.order_by("id").all()
-        form_data_instances = list(main_form_data)
+        form_data_ids = list(
+            main_form_data_queryset.order_by("id").values_list(
+                "id", flat=True
+            )
+        )
+        parent_id_to_index = {
+            fd_id: idx for idx, fd_id in enumerate(form_data_ids)
+        }
 
-        question_groups = []
-        for f in forms:
-            form_question_groups = f.form_question_group.order_by(
-                "order"
-            ).all()
-            question_groups.extend(form_question_groups)
+        # Latest submission of every child form per parent FormData
+        latest_children = {}
+        if child_forms and form_data_ids:
+            latest_children = {
+                (parent_id, child_form_id): child_id
+                for child_id, parent_id, child_form_id in (
+                    FormData.objects.filter(
+                        parent_id__in=form_data_ids,
+                        form__in=child_forms,
+                        is_pending=False,
+                    )
+                    .order_by("parent_id", "form_id", "-id")
+                    .distinct("parent_id", "form_id")
+                    .values_list("id", "parent_id", "form_id")
+                )
+            }
+        data_to_parent = {fd_id: fd_id for fd_id in form_data_ids}
+        data_to_parent.update(
+            {
+                child_id: parent_id
+                for (parent_id, _), child_id in latest_children.items()
+            }
+        )
+
+        form_order = {f.id: i for i, f in enumerate(forms)}
+        question_groups = sorted(
+            QuestionGroup.objects.filter(form__in=forms),
+            key=lambda qg: (form_order[qg.form_id], qg.order or 0, qg.id),
+        )
+        group_questions = {}
+        for question in Questions.objects.filter(
+            form__in=forms
+        ).order_by("order", "id"):
+            group_questions.setdefault(
+                question.question_group_id, []
+            ).append(question)
+
+        # Answers keyed by (question, FormData), in insertion order
+        answers = {}
+        administration_ids = set()
+        for answer in (
+            Answers.objects.filter(
+                data_id__in=list(data_to_parent),
+                question__form__in=forms,
+            )
+            .order_by("id")
+            .values(
+                "id", "data_id", "question_id", "index",
+                "name", "value", "options", "question__type",
+            )
+        ):
+            answers.setdefault(
+                (answer["question_id"], answer["data_id"]), []
+            ).append(answer)
+            if (
+                answer["question__type"] == QuestionTypes.administration
+                and answer["value"]
+            ):
+                administration_ids.add(int(answer["value"]))
+
+        option_labels = {}
+        for question_id, value, label in (
+            QuestionOptions.objects.filter(
+                question__form__in=forms,
+                question__type__in=[
+                    QuestionTypes.option,
+                    QuestionTypes.multiple_option,
+                ],
+            )
+            .order_by("id")
+            .values_list("question_id", "value", "label")
+        ):
+            option_labels.setdefault(question_id, []).append((value, label))
+
+        administration_names = {}
+        if administration_ids:
+            administration_names = dict(
+                Administration.objects.filter(
+                    pk__in=administration_ids
+                ).values_list("id", "name")
+            )
+
+        def data_ids_for(main_fd_id):
+            # the parent FormData first, then its latest child submissions
+            ids = [main_fd_id]
+            for child_form in child_forms:
+                child_id = latest_children.get((main_fd_id, child_form.id))
+                if child_id:
+                    ids.append(child_id)
+            return ids
+
+        def format_answer(answer):
+            return format_report_answer(
+                answer=answer,
+                question_type=answer["question__type"],
+                option_labels=option_labels,
+                administration_names=administration_names,
+            )
 
         result = []
 
         for question_group in question_groups:
-            questions = question_group.question_group_question.order_by(
-                "order"
-            ).all()
+            questions = group_questions.get(question_group.id, [])
             is_repeatable = getattr(question_group, "repeatable", False)
 
             if is_repeatable:
                 # For each parent FormData,
                 # find max repeat index for this group
                 max_repeats = 0
-                # Map: parent_form_data_id -> max index for this group
-                parent_max_index = {}
-                for idx, main_fd in enumerate(form_data_instances):
-                    # Get all answers for this group and parent
-                    answers = []
-                    for q in questions:
-                        answers.extend(
-                            q.question_answer.filter(data=main_fd).all()
-                        )
-                        # Also check child FormData for this group
-                        for child_form in child_forms:
-                            child_fd = main_fd.children.filter(
-                                form=child_form, is_pending=False
-                            ).last()
-                            if child_fd:
-                                answers.extend(
-                                    q.question_answer.filter(
-                                        data=child_fd
-                                    ).all()
-                                )
-                    # Find max index for this parent
+                for main_fd_id in form_data_ids:
                     indices = [
-                        a.index
-                        for a in answers
-                        if hasattr(a, "index") and a.index is not None
+                        a["index"]
+                        for q in questions
+                        for data_id in data_ids_for(main_fd_id)
+                        for a in answers.get((q.id, data_id), [])
+                        if a["index"] is not None
                     ]
                     max_idx = max(indices) if indices else 0
-                    parent_max_index[main_fd.id] = max_idx
                     if max_idx > max_repeats:
                         max_repeats = max_idx
                 # For each repeat index, clone the group
@@ -372,96 +397,25 @@ def transform_form_data_for_report(
                         "questions": [],
                     }
                     for question in questions:
-                        answer_values = [""] * len(form_data_instances)
-                        # For each parent FormData,
-                        # get answer for this repeat index
-                        for fd_idx, main_fd in enumerate(form_data_instances):
-                            # Check parent and children
-                            answer = question.question_answer.filter(
-                                data=main_fd, index=repeat_idx
-                            ).first()
-                            if not answer:
-                                for child_form in child_forms:
-                                    child_fd = main_fd.children.filter(
-                                        form=child_form, is_pending=False
-                                    ).last()
-                                    if child_fd:
-                                        answer = (
-                                            question.question_answer.filter(
-                                                data=child_fd, index=repeat_idx
-                                            ).first()
+                        answer_values = [""] * len(form_data_ids)
+                        for fd_idx, main_fd_id in enumerate(form_data_ids):
+                            # Check parent first, then the children
+                            answer = None
+                            for data_id in data_ids_for(main_fd_id):
+                                answer = next(
+                                    (
+                                        a
+                                        for a in answers.get(
+                                            (question.id, data_id), []
                                         )
-                                        if answer:
-                                            break
+                                        if a["index"] == repeat_idx
+                                    ),
+                                    None,
+                                )
+                                if answer:
+                                    break
                             if answer:
-                                # Format answer as before
-                                if question.type == QuestionTypes.geo:
-                                    value = ",".join(map(str, answer.options))
-                                elif question.type in [
-                                    QuestionTypes.option,
-                                    QuestionTypes.multiple_option,
-                                ]:
-                                    options = answer.question.options.filter(
-                                        value__in=answer.options
-                                    ).all()
-                                    value = (
-                                        "|".join(
-                                            [opt.label for opt in options]
-                                        )
-                                        if options
-                                        else ""
-                                    )
-                                elif question.type == QuestionTypes.date:
-                                    value = ""
-                                    if (
-                                        isinstance(answer.name, str)
-                                        and answer.name
-                                    ):
-                                        try:
-                                            date_obj = parser.parse(
-                                                answer.name
-                                            )
-                                            value = date_obj.strftime(
-                                                "%B %d, %Y"
-                                            )
-                                        except (
-                                            ImportError,
-                                            ValueError,
-                                            TypeError,
-                                        ):
-                                            value = str(answer.name)
-                                elif question.type in [
-                                    QuestionTypes.input,
-                                    QuestionTypes.text,
-                                    QuestionTypes.photo,
-                                    QuestionTypes.autofield,
-                                    QuestionTypes.cascade,
-                                    QuestionTypes.attachment,
-                                    QuestionTypes.signature,
-                                ]:
-                                    value = answer.name or ""
-                                elif (
-                                    question.type
-                                    == QuestionTypes.administration
-                                ):
-                                    if answer.value:
-                                        admin = Administration.objects.filter(
-                                            pk=answer.value
-                                        ).first()
-                                        value = (
-                                            admin.name
-                                            if admin
-                                            else str(answer.value)
-                                        )
-                                    else:
-                                        value = ""
-                                else:
-                                    value = (
-                                        answer.value
-                                        if answer.value is not None
-                                        else ""
-                                    )
-                                answer_values[fd_idx] = str(value)
+                                answer_values[fd_idx] = format_answer(answer)
                         if any(
                             value.strip() for value in answer_values if value
                         ):
@@ -473,88 +427,28 @@ def transform_form_data_for_report(
                     if group_data["questions"]:
                         result.append(group_data)
             else:
-                # Non-repeatable group: original logic
+                # Non-repeatable group
                 group_data = {
                     "name": question_group.label or question_group.name,
                     "questions": [],
                 }
                 for question in questions:
-                    answer_values = [""] * len(form_data_instances)
-                    all_form_data_ids = []
-                    for main_fd in main_form_data:
-                        all_form_data_ids.append(main_fd.id)
-                        for child_form in child_forms:
-                            child_fd = main_fd.children.filter(
-                                form=child_form, is_pending=False
-                            ).last()
-                            if child_fd:
-                                all_form_data_ids.append(child_fd.id)
-                    answers = question.question_answer.filter(
-                        data__id__in=all_form_data_ids
-                    ).select_related("data")
-                    parent_id_to_index = {
-                        fd.id: idx
-                        for idx, fd in enumerate(form_data_instances)
-                    }
-                    for answer in answers:
-                        if answer.data.parent:
-                            parent_id = answer.data.parent.id
-                        else:
-                            parent_id = answer.data.id
-                        form_data_index = parent_id_to_index.get(parent_id)
-                        if form_data_index is None:
-                            continue
-                        if question.type == QuestionTypes.geo:
-                            value = ",".join(map(str, answer.options))
-                        elif question.type in [
-                            QuestionTypes.option,
-                            QuestionTypes.multiple_option,
-                        ]:
-                            options = answer.question.options.filter(
-                                value__in=answer.options
-                            ).all()
-                            value = (
-                                "|".join([opt.label for opt in options])
-                                if options
-                                else ""
-                            )
-                        elif question.type == QuestionTypes.date:
-                            value = ""
-                            if isinstance(answer.name, str) and answer.name:
-                                try:
-                                    date_obj = parser.parse(answer.name)
-                                    value = date_obj.strftime("%B %d, %Y")
-                                except (
-                                    ImportError, ValueError, TypeError
-                                ):  # pragma: no cover
-                                    value = str(answer.name)
-                        elif question.type in [
-                            QuestionTypes.input,
-                            QuestionTypes.text,
-                            QuestionTypes.photo,
-                            QuestionTypes.autofield,
-                            QuestionTypes.cascade,
-                            QuestionTypes.attachment,
-                            QuestionTypes.signature,
-                        ]:
-                            value = answer.name or ""
-                        elif question.type == QuestionTypes.administration:
-                            if answer.value:
-                                admin = Administration.objects.filter(
-                                    pk=answer.value
-                                ).first()
-                                value = (
-                                    admin.name if admin else str(answer.value)
-                                )
-                            else:
-                                value = ""
-                        else:
-                            value = (
-                                answer.value
-                                if answer.value is not None
-                                else ""
-                            )
-                        answer_values[form_data_index] = str(value)
+                    answer_values = [""] * len(form_data_ids)
+                    question_answers = sorted(
+                        (
+                            a
+                            for data_id in data_to_parent
+                            for a in answers.get((question.id, data_id), [])
+                        ),
+                        key=lambda a: a["id"],
+                    )
+                    for answer in question_answers:
+                        form_data_index = parent_id_to_index.get(
+                            data_to_parent[answer["data_id"]]
+                        )
+                        answer_values[form_data_index] = format_answer(
+                            answer
+                        )
                     if any(value.strip() for value in answer_values if value):
                         question_data = {
                             "question": question.label,
@@ -839,8 +733,9 @@ def handle_administrations_bulk_upload(filename, user_id, upload_time):
             content_type="text/csv",
         )
         return
-    seed_administration_data(file_path)
+    created = seed_administration_data(file_path)
     generate_sqlite(Administration)
+    administration_csv_add_many(administrations=created)
     send_email(context=email_context, type=EmailTypes.administration_upload)
 
 
@@ -23,6 +23,10 @@ from api.v1.v1_profile.models import (
 )
 from api.v1.v1_users.models import SystemUser
 from api.v1.v1_approval.models import DataBatch
+from api.v1.v1_visualization.functions import (
+    refresh_data_options,
+    invalidate_formdata_stats,
+)
 from utils.email_helper import send_email, EmailTypes
 from uuid import uuid4
 
@@ -210,16 +214,11 @@ def collect_answers(user: SystemUser, dp: dict, qs: dict, data_id):
 
 
 def get_decendants(administration: Administration):
-    path = f"{administration.id}."
-    if administration.path:
-        path = "{0}{1}.".format(administration.path, administration.id)
-    descendants = list(
-        Administration.objects.filter(path__startswith=path).values_list(
-            "id", flat=True
-        )
+    return list(
+        Administration.objects.descendants_of(
+            administration, include_self=True
+        ).values_list("id", flat=True)
     )
-    descendants.append(administration.id)
-    return descendants
 
 
 def save_data(
@@ -313,6 +312,9 @@ def save_data(
     # Create answer history if needed
     if answer_history_list:
         AnswerHistory.objects.bulk_create(answer_history_list)
+    if not data.is_pending:
+        refresh_data_options(parent_id=data.parent_id, form_id=data.form_id)
+        invalidate_formdata_stats(form_id=data.form_id)
     return data
 
 
@@ -0,0 +1,147 @@
+import os
+import pandas as pd
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+
+from api.v1.v1_data.models import FormData
+from api.v1.v1_forms.models import Forms, QuestionTypes
+from api.v1.v1_jobs.constants import DataDownloadTypes
+from api.v1.v1_jobs.export_data import (
+    AdministrationColumns,
+    iter_export_rows,
+    write_data_sheet,
+)
+from api.v1.v1_profile.models import Administration
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class ExportDataTestCase(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test", 1)
+        call_command("default_roles_seeder", "--test", 1)
+        call_command("form_seeder", "--test", 1)
+        call_command(
+            "fake_complete_data_seeder",
+            "--test=true",
+            repeat=3,
+            test=True,
+            approved=True,
+            draft=False,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.form = Forms.objects.get(pk=1)
+        self.child_form_ids = list(
+            self.form.children.values_list("id", flat=True)
+        )
+
+    def legacy_recent_rows(self):
+        rows = []
+        for d in self.form.form_form_data.filter(
+            is_pending=False, is_draft=False
+        ).order_by("id"):
+            item = d.to_data_frame
+            for child_form in self.child_form_ids:
+                dl = d.children.filter(
+                    form_id=child_form, is_pending=False, is_draft=False
+                ).last()
+                if dl:
+                    item = {**item, **dl.to_data_frame}
+                    item["datapoint_name"] = d.name
+                    item["created_at"] = d.to_data_frame.get("created_at")
+                    item["created_by"] = d.created_by.get_full_name()
+                    item["updated_by"] = dl.created_by.get_full_name()
+            rows.append(item)
+        return rows
+
+    def test_recent_rows_match_to_data_frame(self):
+        rows = list(
+            iter_export_rows(
+                form=self.form,
+                child_form_ids=self.child_form_ids,
+                chunk_size=2,
+            )
+        )
+        self.assertTrue(len(rows))
+        self.assertEqual(rows, self.legacy_recent_rows())
+
+    def test_all_rows_include_every_monitoring_submission(self):
+        rows = list(
+            iter_export_rows(
+                form=self.form,
+                download_type=DataDownloadTypes.all,
+                child_form_ids=self.child_form_ids,
+            )
+        )
+        parents = self.form.form_form_data.filter(
+            is_pending=False, is_draft=False
+        )
+        children = FormData.objects.filter(
+            parent__in=parents,
+            form_id__in=self.child_form_ids,
+            is_pending=False,
+            is_draft=False,
+        )
+        without_children = parents.exclude(
+            pk__in=FormData.objects.filter(
+                is_pending=False, is_draft=False
+            ).values("parent_id")
+        )
+        self.assertEqual(
+            len(rows), children.count() + without_children.count()
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(
+                iter_export_rows(
+                    form=self.form,
+                    child_form_ids=self.child_form_ids,
+                )
+            )
+        self.assertGreater(len(rows), 1)
+        self.assertLess(len(ctx.captured_queries), 12)
+
+    def test_administration_columns(self):
+        adm = Administration.objects.filter(
+            path__isnull=False
+        ).order_by("-level__level").first()
+        columns = AdministrationColumns().resolve([adm.id, None])
+        self.assertEqual(columns, {adm.id: adm.administration_column})
+
+    def test_write_data_sheet_uses_labels(self):
+        file_path = "./tmp/test-export-data.xlsx"
+        writer = pd.ExcelWriter(file_path, engine="xlsxwriter")
+        total = write_data_sheet(
+            writer=writer,
+            form=self.form,
+            child_form_ids=self.child_form_ids,
+        )
+        writer.save()
+        df = pd.read_excel(file_path, sheet_name="data")
+        os.remove(file_path)
+        self.assertEqual(df.shape[0], total)
+        self.assertEqual(
+            list(df.columns[:9]),
+            [
+                "id",
+                "created_at",
+                "created_by",
+                "updated_at",
+                "updated_by",
+                "datapoint_name",
+                "administration",
+                "geolocation",
+                "uuid",
+            ],
+        )
+        question = self.form.form_questions.filter(
+            type=QuestionTypes.option
+        ).first()
+        labels = set(question.options.values_list("label", flat=True))
+        values = set(df[question.name].dropna())
+        self.assertTrue(values)
+        self.assertTrue(values.issubset(labels))
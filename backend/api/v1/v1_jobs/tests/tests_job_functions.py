@@ -1,10 +1,8 @@
-import numpy as np
 from unittest.mock import patch, MagicMock
 from django.core.management import call_command
 from django.test import TestCase, override_settings
-from api.v1.v1_forms.models import Forms, QuestionTypes
+from api.v1.v1_forms.models import Forms
 from api.v1.v1_jobs.job import (
-    get_answer_label,
     job_generate_data_download,
     job_generate_data_download_result,
 )
@@ -31,44 +29,6 @@ class TestJobsFunctions(TestCase, ProfileTestHelperMixin):
             form=self.form,
         )
 
-    def test_get_answer_label(self):
-        option_q = self.form.form_questions.filter(
-            type=QuestionTypes.option
-        ).first()
-        answer_values = "male"
-        expected_label = "Male"
-        result = get_answer_label(
-            answer_values=answer_values, question_id=option_q.id
-        )
-        self.assertEqual(result, expected_label)
-
-        multiple_q = self.form.form_questions.filter(
-            type=QuestionTypes.multiple_option
-        ).first()
-
-        answer_values = "wife__husband__partner|children"
-        expected_label = "Wife / Husband / Partner|Children"
-        result = get_answer_label(
-            answer_values=answer_values, question_id=multiple_q.id
-        )
-        self.assertEqual(result, expected_label)
-
-    def test_get_answer_label_is_none_or_NAN(self):
-        option_q = self.form.form_questions.filter(
-            type=QuestionTypes.option
-        ).first()
-        answer_values = None
-        result = get_answer_label(
-            answer_values=answer_values, question_id=option_q.id
-        )
-        self.assertEqual(result, answer_values)
-
-        answer_values = np.nan
-        result = get_answer_label(
-            answer_values=answer_values, question_id=option_q.id
-        )
-        self.assertTrue(np.isnan(result))
-
     def test_job_generate_data_download(self):
         """Test job_generate_data_download function with proper job setup"""
         # Create a job first
@@ -2,7 +2,8 @@ from io import StringIO
 from unittest.mock import patch
 from django.core.management import call_command
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
 
 from api.v1.v1_forms.models import Forms, QuestionGroup
 from api.v1.v1_data.models import FormData, Answers
@@ -75,6 +76,27 @@ class TransformFormDataForReportTestCase(TestCase, ProfileTestHelperMixin):
                     self.assertIn("answers", question)
                     self.assertIsInstance(question["answers"], list)
 
+    def test_transform_form_data_constant_number_of_queries(self):
+        """Test that the number of queries does not grow with the data"""
+        data_ids = list(
+            self.form.form_form_data.filter(is_pending=False)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        with CaptureQueriesContext(connection) as single:
+            transform_form_data_for_report(
+                self.form, selection_ids=data_ids[:1]
+            )
+        with CaptureQueriesContext(connection) as multiple:
+            result = transform_form_data_for_report(
+                self.form, selection_ids=data_ids
+            )
+        self.assertTrue(result)
+        self.assertEqual(
+            len(single.captured_queries), len(multiple.captured_queries)
+        )
+        self.assertLessEqual(len(multiple.captured_queries), 8)
+
     def test_transform_form_data_with_selection_ids(self):
         """Test transform_form_data_for_report with specific selection_ids"""
         # Get existing FormData instances
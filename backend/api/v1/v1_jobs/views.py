@@ -39,6 +39,7 @@ from api.v1.v1_jobs.serializers import (
     FormDataReportSerializer,
 )
 from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.functions import get_user_access
 from utils import storage
 from utils.custom_serializer_fields import validate_serializers_message
 
@@ -268,14 +269,12 @@ def upload_excel(request, form_id, version):
     form_name = re.sub(r"[\W_]+", "_", form.name)
     filename = f"{form_name}-{user_name}-{uuid}.xlsx"
     storage.upload(file=file_path, filename=filename, folder="upload")
-    adm = Administration.objects.filter(
+    adm_id = Administration.objects.filter(
         parent__isnull=True
-    ).first()
-    if (
-        not request.user.is_superuser and
-        request.user.user_user_role.count()
-    ):
-        adm = request.user.user_user_role.first().administration
+    ).values_list("id", flat=True).first()
+    user_role = get_user_access(request.user).first_role
+    if not request.user.is_superuser and user_role:
+        adm_id = user_role.administration_id
     job = Jobs.objects.create(
         type=JobTypes.validate_data,
         status=JobStatus.on_progress,
@@ -283,7 +282,7 @@ def upload_excel(request, form_id, version):
         info={
             "file": filename,
             "form": form_id,
-            "administration": adm.id,
+            "administration": adm_id,
             "is_update": is_update,
         },
     )
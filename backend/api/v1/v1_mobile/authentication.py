@@ -35,7 +35,7 @@ class MobileAssignmentToken(AccessToken):
     def _get_assignment(self):
         assignment_id = self.payload.get("assignment_id", None)
         return (
-            MobileAssignment.objects.get(id=assignment_id)
+            MobileAssignment.objects.get_cached(assignment_id)
             if assignment_id
             else None
         )
@@ -0,0 +1,12 @@
+class IntakeStatus:
+    pending = 1
+    on_progress = 2
+    failed = 3
+    done = 4
+
+    FieldStr = {
+        pending: "pending",
+        on_progress: "on_progress",
+        failed: "failed",
+        done: "done",
+    }
@@ -0,0 +1,805 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from api.v1.v1_data.models import Answers, FormData
+from api.v1.v1_data.serializers import (
+    DUPLICATE_REGISTRATION_MESSAGE,
+    SubmitPendingFormSerializer,
+    SubmitUpdateDraftFormSerializer,
+)
+from api.v1.v1_forms.functions import get_administration_scope
+from api.v1.v1_forms.models import Forms, Questions, QuestionTypes
+from api.v1.v1_mobile.constants import IntakeStatus
+from api.v1.v1_mobile.models import (
+    MobileAssignment,
+    SubmissionIntake,
+    SubmissionReceipt,
+)
+from api.v1.v1_profile.constants import DataAccessTypes
+from api.v1.v1_profile.models import Administration
+from mis.settings import (
+    DATAPOINT_SYNC_SAFETY_WINDOW,
+    STORAGE_PATH,
+    SUBMISSION_RECEIPT_PENDING_TIMEOUT,
+    SUBMISSION_RECEIPT_RETENTION,
+)
+from utils.custom_serializer_fields import validate_serializers_message
+from utils.file_helper import file_lock, get_temp_file
+
+logger = logging.getLogger(__name__)
+
+# submissions saved per transaction by submit_form_data_batch
+SUBMISSION_BATCH_CHUNK_SIZE = 50
+# datapoints rendered per query by write_datapoint_bundle_lines
+DATAPOINT_BUNDLE_CHUNK_SIZE = 500
+
+# Last change of a datapoint: creation, update or (soft) deletion. NULLs
+# are ignored by GREATEST in PostgreSQL; indexed together with the id
+# (see FormData.Meta.indexes).
+SYNC_KEY = Greatest("created", "updated", "deleted_at")
+
+
+def encode_sync_cursor(changed: datetime, id: int, since=None) -> str:
+    cursor = {
+        "changed": changed.isoformat(),
+        "id": id,
+        "since": since.isoformat() if since else None,
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(cursor).encode()
+    ).decode()
+
+
+def decode_sync_cursor(cursor: str) -> dict:
+    """
+    Raises ValueError when the cursor was not made by encode_sync_cursor
+    """
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            "changed": datetime.fromisoformat(cursor["changed"]),
+            "id": int(cursor["id"]),
+            "since": datetime.fromisoformat(cursor["since"])
+            if cursor["since"]
+            else None,
+        }
+    except (TypeError, KeyError, AttributeError) as e:
+        raise ValueError(str(e))
+
+
+def get_assignment_datapoints(assignment: MobileAssignment):
+    """
+    Approved datapoints, including the deleted ones, of the forms and
+    administrations (with their descendants) of a mobile assignment.
+    """
+    forms = [f.id for f in assignment.forms.all()]
+    administrations = Administration.objects.descendants_of(
+        *assignment.administrations.all(), include_self=True
+    )
+    return FormData.objects_with_deleted.filter(
+        administration__in=administrations,
+        form_id__in=forms,
+        is_pending=False,
+        is_draft=False,
+    )
+
+
+def get_assignment_forms(assignment: MobileAssignment) -> list:
+    """
+    Forms of a mobile assignment followed by their child forms, in the
+    order of the formsUrl of the device auth response.
+    """
+    forms = list(assignment.forms.all())
+    children = {}
+    for child in Forms.objects.filter(
+        parent_id__in=[f.id for f in forms]
+    ).order_by("id"):
+        children.setdefault(child.parent_id, []).append(child)
+    return forms + [c for f in forms for c in children.get(f.id, [])]
+
+
+def get_assignment_form_scope(assignment: MobileAssignment) -> str:
+    """
+    Hash of what the form definitions of an assignment depend on besides
+    the forms: the administrations of the assignment and the roles of
+    its user.
+    """
+    scope = "{0}:{1}".format(
+        ",".join(
+            sorted([str(a.id) for a in assignment.administrations.all()])
+        ),
+        get_administration_scope(assignment.user),
+    )
+    return hashlib.md5(scope.encode()).hexdigest()[:12]
+
+
+def get_safe_sync_cursor(changed: datetime, id: int) -> tuple:
+    """
+    (changed, id) of a sync cursor at most as recent as
+    DATAPOINT_SYNC_SAFETY_WINDOW seconds ago: timestamps are set before
+    the changes are committed, so the changes of the window are sent
+    again instead of skipping the ones committed late.
+    """
+    safe_changed = timezone.now() - timedelta(
+        seconds=DATAPOINT_SYNC_SAFETY_WINDOW
+    )
+    if changed > safe_changed:
+        return safe_changed, 0
+    return changed, id
+
+
+def get_datapoint_sync_page(
+    assignment: MobileAssignment, cursor: dict = None, page_size: int = 10
+) -> dict:
+    """
+    Next page of changed datapoints in (last change, id) order. Without a
+    cursor the sync starts from scratch and skips the datapoints deleted
+    before it started; deleted datapoints are returned as tombstones.
+
+    The cursor of the last page goes back to the safety window, see
+    get_safe_sync_cursor.
+    """
+    if not cursor:
+        cursor = {"changed": None, "id": 0, "since": timezone.now()}
+    queryset = get_assignment_datapoints(assignment).annotate(
+        sync_key=SYNC_KEY
+    )
+    if cursor["changed"]:
+        queryset = queryset.filter(
+            Q(sync_key__gt=cursor["changed"])
+            | Q(sync_key=cursor["changed"], id__gt=cursor["id"])
+        )
+    if cursor["since"]:
+        queryset = queryset.filter(
+            Q(deleted_at__isnull=True) | Q(deleted_at__gte=cursor["since"])
+        )
+    rows = list(
+        queryset.order_by("sync_key", "id").values(
+            "uuid",
+            "id",
+            "form_id",
+            "name",
+            "administration_id",
+            "created",
+            "updated",
+            "deleted_at",
+            "sync_key",
+        )[:page_size + 1]
+    )
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if rows:
+        cursor = {
+            **cursor,
+            "changed": rows[-1]["sync_key"],
+            "id": rows[-1]["id"],
+        }
+    if not has_more and cursor["changed"]:
+        changed, id = get_safe_sync_cursor(cursor["changed"], cursor["id"])
+        cursor = {**cursor, "changed": changed, "id": id}
+    return {
+        "data": [r for r in rows if not r["deleted_at"]],
+        "deleted": [r for r in rows if r["deleted_at"]],
+        "cursor": encode_sync_cursor(**cursor)
+        if cursor["changed"]
+        else None,
+        "has_more": has_more,
+    }
+
+
+def get_datapoint_bundle_path(assignment: MobileAssignment) -> str:
+    # outside of the public master data, bundles hold the answers
+    return os.path.join(
+        STORAGE_PATH, "private", "bundles", f"assignment-{assignment.id}"
+    )
+
+
+def get_datapoint_bundle_scope(assignment: MobileAssignment) -> list:
+    # forms and administrations the bundle was written for
+    return [
+        sorted([f.id for f in assignment.forms.all()]),
+        sorted([a.id for a in assignment.administrations.all()]),
+    ]
+
+
+def write_datapoint_bundle_lines(file, rows: list):
+    """
+    Write one NDJSON line per datapoint row: the datapoint as downloaded
+    by devices, or {"id", "uuid", "deleted": true} for deleted ones.
+    """
+    for start in range(0, len(rows), DATAPOINT_BUNDLE_CHUNK_SIZE):
+        chunk = rows[start:start + DATAPOINT_BUNDLE_CHUNK_SIZE]
+        ids = [r["id"] for r in chunk if not r["deleted_at"]]
+        datapoints = FormData.objects_with_deleted.in_bulk(ids)
+        answers = Answers.objects.filter(data_id__in=ids).select_related(
+            "question"
+        ).order_by("data_id", "question__question_group_id", "question__order")
+        answers = {
+            data_id: list(items)
+            for data_id, items in groupby(answers, key=lambda a: a.data_id)
+        }
+        for row in chunk:
+            if row["deleted_at"]:
+                line = {"id": row["id"], "uuid": str(row["uuid"])}
+                line["deleted"] = True
+            else:
+                data = datapoints[row["id"]]
+                line = {
+                    "form_id": data.form_id,
+                    **data.to_datapoint(answers=answers.get(data.id, [])),
+                }
+            file.write(json.dumps(line).encode() + b"\n")
+
+
+def update_datapoint_bundle(assignment: MobileAssignment) -> dict:
+    """
+    Bring the gzipped NDJSON bundle of the registration datapoints of an
+    assignment up to date, and return its state ("file", and "changed"
+    and "id" of the last change it holds, back to the safety window of
+    get_safe_sync_cursor: the changes of the window are appended again).
+
+    Datapoints changed since the last update are appended as a new gzip
+    member, so a line may be overridden by a later line of the same
+    uuid. The bundle is rewritten from scratch when the assignment scope
+    changed or when the appended lines outnumber the original ones.
+    """
+    path = get_datapoint_bundle_path(assignment)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    bundle_file, state_file = f"{path}.ndjson.gz", f"{path}.json"
+    scope = get_datapoint_bundle_scope(assignment)
+    with file_lock(bundle_file):
+        state = None
+        if os.path.exists(bundle_file) and os.path.exists(state_file):
+            with open(state_file) as f:
+                state = json.load(f)
+        if state and (
+            state["scope"] != scope
+            or state["appended"] > state["rows"]
+            or not state["changed"]
+        ):
+            state = None
+        queryset = get_assignment_datapoints(assignment).filter(
+            form__parent__isnull=True
+        ).annotate(sync_key=SYNC_KEY)
+        if state:
+            changed = datetime.fromisoformat(state["changed"])
+            queryset = queryset.filter(
+                Q(sync_key__gt=changed)
+                | Q(sync_key=changed, id__gt=state["id"])
+            )
+        else:
+            queryset = queryset.filter(deleted_at__isnull=True)
+        rows = list(
+            queryset.order_by("sync_key", "id").values(
+                "id", "uuid", "deleted_at", "sync_key"
+            )
+        )
+        if state and not rows:
+            return {**state, "file": bundle_file}
+        temp_file = get_temp_file(bundle_file)
+        try:
+            if state:
+                shutil.copyfile(bundle_file, temp_file)
+            with gzip.open(temp_file, "ab" if state else "wb") as f:
+                write_datapoint_bundle_lines(f, rows)
+            os.replace(temp_file, bundle_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        if state:
+            state["appended"] += len(rows)
+        else:
+            state = {"scope": scope, "rows": len(rows), "appended": 0}
+        state["changed"], state["id"] = None, 0
+        if rows:
+            changed, state["id"] = get_safe_sync_cursor(
+                rows[-1]["sync_key"], rows[-1]["id"]
+            )
+            state["changed"] = changed.isoformat()
+        temp_file = get_temp_file(state_file)
+        with open(temp_file, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_file, state_file)
+    return {**state, "file": bundle_file}
+
+
+def get_submission_administration(assignment: MobileAssignment):
+    """
+    Default administration of the submissions of a mobile assignment: the
+    administration of the user role with submit access, or else the top
+    administration of the assignment.
+    """
+    user = assignment.user
+    if hasattr(user, "submit_roles"):
+        # prefetched by MobileAssignment.objects.get_cached
+        user_role = user.submit_roles[0] if user.submit_roles else None
+    else:
+        user_role = user.user_user_role.filter(
+            role__role_role_access__data_access=DataAccessTypes.submit
+        ).first()
+    if user_role:
+        return user_role.administration
+    return min(
+        assignment.administrations.all(),
+        key=lambda adm: (adm.level.level, adm.id),
+        default=None,
+    )
+
+
+def get_submission_payload(
+    submission: dict,
+    administration_id: int,
+    administration_question_id: int = None,
+    submitter: str = None,
+) -> dict:
+    """
+    SubmitPendingFormSerializer data of a device submission
+    """
+    qna = submission.get("answers")
+    adm_id = administration_id
+    adm_key = (
+        str(administration_question_id)
+        if administration_question_id
+        else None
+    )
+    if adm_key and adm_key in qna:
+        adm_id = qna[adm_key]
+    answers = []
+    # Handle repeat question values with indexes
+    for q_key in list(qna):
+        """
+        Extract the base question ID from the key
+        Keys can be like "1" or "1-1" or "1-2"
+        where the base question ID is "1"
+        """
+        index = 0
+        if "-" in str(q_key):
+            [base_q_id, q_index] = str(q_key).split("-")
+            index = q_index
+        else:
+            base_q_id = str(q_key)
+        answers.append({
+            "question": base_q_id,
+            "value": qna[q_key],
+            "index": index,
+        })
+    payload = {
+        "administration": adm_id,
+        "name": submission.get("name"),
+        "geo": submission.get("geo"),
+        "submitter": submitter,
+        "duration": submission.get("duration"),
+    }
+    if submission.get("uuid"):
+        payload["uuid"] = submission["uuid"]
+    return {
+        "data": payload,
+        "answer": answers,
+    }
+
+
+def get_submission_key(idempotency_key: str = None):
+    """
+    Idempotency key of a device submission: the Idempotency-Key header,
+    None when the device doesn't send one. Identical payloads are not
+    duplicates (monitoring submissions of a datapoint share its uuid).
+    """
+    if idempotency_key:
+        return idempotency_key[:255]
+    return None
+
+
+def get_submission_receipt(assignment: MobileAssignment, key: str):
+    expiry = timezone.now() - timedelta(days=SUBMISSION_RECEIPT_RETENTION)
+    return SubmissionReceipt.objects.filter(
+        assignment=assignment, key=key, created_at__gte=expiry
+    ).first()
+
+
+def reserve_submission_receipt(assignment: MobileAssignment, key: str):
+    """
+    Insert the pending receipt of a submission before processing it, so
+    a retry sent in the meantime is not processed again; returns the
+    receipt and whether it was reserved by this call. Expired receipts
+    and pending ones left by a failed request are taken over.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        receipt = SubmissionReceipt.objects.select_for_update().filter(
+            assignment=assignment, key=key
+        ).first()
+        if not receipt:
+            receipt, created = SubmissionReceipt.objects.get_or_create(
+                assignment=assignment, key=key
+            )
+            if created:
+                return receipt, True
+        expiry = now - timedelta(days=SUBMISSION_RECEIPT_RETENTION)
+        if receipt.is_pending:
+            expiry = now - timedelta(
+                seconds=SUBMISSION_RECEIPT_PENDING_TIMEOUT
+            )
+        if receipt.created_at >= expiry:
+            return receipt, False
+        receipt.status_code = None
+        receipt.response = None
+        receipt.data = None
+        receipt.created_at = now
+        receipt.save()
+    return receipt, True
+
+
+def release_submission_receipt(assignment: MobileAssignment, key: str):
+    # drop the receipt unless a response was saved for it: the submission
+    # is processed again when it's retried
+    SubmissionReceipt.objects.filter(
+        assignment=assignment, key=key, status_code__isnull=True
+    ).delete()
+
+
+def save_submission_receipt(
+    assignment: MobileAssignment,
+    key: str,
+    response: dict,
+    status_code: int = 200,
+    data: FormData = None,
+):
+    if not key:
+        return
+    SubmissionReceipt.objects.update_or_create(
+        assignment=assignment,
+        key=key,
+        defaults={
+            "response": response,
+            "status_code": status_code,
+            "data": data,
+            "created_at": timezone.now(),
+        },
+    )
+
+
+def get_submitted_datapoints(user, form_ids: list, uuids: list) -> dict:
+    """
+    Published registration datapoints already submitted by the user, by
+    (form id, uuid): a registration uuid is only stored once.
+    """
+    return {
+        (d.form_id, d.uuid): d
+        for d in FormData.objects.filter(
+            form_id__in=form_ids,
+            form__parent__isnull=True,
+            created_by=user,
+            is_draft=False,
+            uuid__in=uuids,
+        ).order_by("-id")
+    }
+
+
+def submit_form_data(
+    assignment: MobileAssignment,
+    form: Forms,
+    submission: dict,
+    key: str,
+    is_draft: bool = False,
+    is_published: bool = False,
+    draft: FormData = None,
+):
+    """
+    Store a device submission, or update the draft it belongs to; returns
+    the response, its status code and the stored datapoint.
+    """
+    user = assignment.user
+    administration = get_submission_administration(assignment)
+    if not submission.get("answers"):
+        return {"message": "Answers is required."}, 400, None
+    adm_qs = Questions.objects.filter(
+        type=QuestionTypes.administration, form_id=form.id
+    ).first()
+    data = get_submission_payload(
+        submission=submission,
+        administration_id=administration.id,
+        administration_question_id=adm_qs.id if adm_qs else None,
+        submitter=assignment.name,
+    )
+    context = {
+        "user": user,
+        "form": form,
+        "is_draft": is_draft,
+    }
+    serializer = SubmitPendingFormSerializer(data=data, context=context)
+    draft_exists = FormData.objects_draft.filter(
+        form=form,
+        created_by=user,
+        uuid=submission.get("uuid"),
+        form__parent__isnull=True,
+    ).first()
+    if draft:
+        draft_exists = draft
+    uuid = str(submission.get("uuid"))
+    if not draft_exists and not is_draft and submission.get("uuid"):
+        submitted = get_submitted_datapoints(
+            user=user, form_ids=[form.id], uuids=[uuid]
+        ).get((form.id, uuid))
+        if submitted:
+            save_submission_receipt(
+                assignment=assignment,
+                key=key,
+                response={"message": "ok"},
+                data=submitted,
+            )
+            return {"message": "ok"}, 200, submitted
+    if draft_exists:
+        serializer = SubmitUpdateDraftFormSerializer(
+            instance=draft_exists, data=data, context=context
+        )
+    if not serializer.is_valid():
+        return {
+            "message": validate_serializers_message(serializer.errors),
+            "details": serializer.errors,
+        }, 400, None
+    try:
+        with transaction.atomic():
+            instance = serializer.save()
+            if is_published and draft_exists:
+                draft_exists.publish()
+    except IntegrityError:
+        if draft_exists:
+            # the uuid of the draft is registered already
+            return {"message": DUPLICATE_REGISTRATION_MESSAGE}, 409, None
+        # the same registration stored by a concurrent request
+        submitted = get_submitted_datapoints(
+            user=user, form_ids=[form.id], uuids=[uuid]
+        ).get((form.id, uuid))
+        if not submitted:
+            raise
+        save_submission_receipt(
+            assignment=assignment,
+            key=key,
+            response={"message": "ok"},
+            data=submitted,
+        )
+        return {"message": "ok"}, 200, submitted
+    if is_published and draft_exists:
+        direct_to_data = user.is_superuser or not draft_exists.has_approval
+        if direct_to_data and not draft_exists.parent:
+            draft_exists.save_to_file
+
+    save_submission_receipt(
+        assignment=assignment,
+        key=key,
+        response={"message": "ok"},
+        data=instance,
+    )
+    return {"message": "ok"}, 200, instance
+
+
+def queue_submission_intake(
+    assignment: MobileAssignment, key: str, submission: dict, params: dict
+) -> SubmissionIntake:
+    """
+    Store a submission for process_submission_intakes; a retry gets the
+    intake of its key, queued again when it failed.
+    """
+    if not key:
+        return SubmissionIntake.objects.create(
+            assignment=assignment, payload=submission, params=params
+        )
+    with transaction.atomic():
+        intake, created = SubmissionIntake.objects.get_or_create(
+            assignment=assignment,
+            key=key,
+            defaults={"payload": submission, "params": params},
+        )
+        if created or intake.status != IntakeStatus.failed:
+            return intake
+        intake = SubmissionIntake.objects.select_for_update().get(
+            pk=intake.pk
+        )
+        if intake.status == IntakeStatus.failed:
+            intake.payload = submission
+            intake.params = params
+            intake.status = IntakeStatus.pending
+            intake.status_code = None
+            intake.response = None
+            intake.claimed_at = None
+            intake.processed_at = None
+            intake.save()
+    return intake
+
+
+def process_submission_intake(intake: SubmissionIntake):
+    params = intake.params or {}
+    form = Forms.objects.filter(pk=intake.payload.get("formId")).first()
+    draft = None
+    if params.get("id"):
+        draft = FormData.objects_draft.filter(pk=params["id"]).first()
+    instance = None
+    receipt, reserved = None, True
+    if intake.key:
+        receipt, reserved = reserve_submission_receipt(
+            intake.assignment, intake.key
+        )
+    try:
+        with transaction.atomic():
+            if not reserved:
+                # processed, or being processed, by another request
+                response = receipt.response or {
+                    "message": "Submission is being processed."
+                }
+                status_code = receipt.status_code or 409
+                instance = receipt.data
+            elif not form:
+                response, status_code = {"message": "Form not found."}, 404
+            else:
+                response, status_code, instance = submit_form_data(
+                    assignment=intake.assignment,
+                    form=form,
+                    submission=intake.payload,
+                    key=intake.key,
+                    is_draft=params.get("is_draft", False),
+                    is_published=params.get("is_published", False),
+                    draft=draft,
+                )
+    except Exception as e:
+        logger.error(f"Submission intake {intake.id} failed: {e}")
+        response, status_code = {"message": str(e)}, 500
+    if reserved and intake.key:
+        # only stored submissions are replayed
+        release_submission_receipt(intake.assignment, intake.key)
+    intake.status = (
+        IntakeStatus.done if status_code == 200 else IntakeStatus.failed
+    )
+    intake.status_code = status_code
+    intake.response = response
+    intake.data = instance
+    intake.processed_at = timezone.now()
+    intake.save()
+    return intake
+
+
+def submit_form_data_batch(assignment: MobileAssignment, submissions: list):
+    """
+    Validate and save the submissions of a device in one go; returns the
+    result of each submission, in the order they were sent and with their
+    uuid and form, and whether none of them failed unexpectedly (the
+    monitoring submissions of a datapoint share its uuid). Submissions of
+    an existing draft update and publish it; registrations already stored
+    are not stored again.
+    """
+    user = assignment.user
+    administration = get_submission_administration(assignment)
+    form_ids = [
+        int(s.get("formId"))
+        if str(s.get("formId")).isdigit()
+        else None
+        for s in submissions
+    ]
+    forms = Forms.objects.in_bulk([f for f in form_ids if f])
+    administration_questions = {}
+    for form_id, question_id in Questions.objects.filter(
+        type=QuestionTypes.administration, form_id__in=forms
+    ).order_by("-id").values_list("form_id", "id"):
+        administration_questions[form_id] = question_id
+    uuids = [str(s["uuid"]) for s in submissions if s.get("uuid")]
+    submitted = get_submitted_datapoints(
+        user=user, form_ids=forms, uuids=uuids
+    )
+    drafts = {
+        (d.form_id, d.uuid): d
+        for d in FormData.objects_draft.filter(
+            form_id__in=forms,
+            created_by=user,
+            uuid__in=uuids,
+            form__parent__isnull=True,
+        ).order_by("-id")
+    }
+
+    results = {}
+    valid = []
+    for key, submission in enumerate(submissions):
+        form = forms.get(form_ids[key])
+        if not form:
+            results[key] = {"status": "error", "message": "Form not found."}
+            continue
+        if not submission.get("answers"):
+            results[key] = {
+                "status": "error",
+                "message": "Answers is required.",
+            }
+            continue
+        duplicate = submitted.get((form.id, str(submission.get("uuid"))))
+        if duplicate:
+            results[key] = {"status": "ok", "id": duplicate.id}
+            continue
+        data = get_submission_payload(
+            submission=submission,
+            administration_id=administration.id,
+            administration_question_id=administration_questions.get(
+                form.id
+            ),
+            submitter=assignment.name,
+        )
+        context = {"user": user, "form": form, "is_draft": False}
+        draft = drafts.get((form.id, str(submission.get("uuid"))))
+        if draft:
+            serializer = SubmitUpdateDraftFormSerializer(
+                instance=draft, data=data, context=context
+            )
+        else:
+            serializer = SubmitPendingFormSerializer(
+                data=data, context=context
+            )
+        if not serializer.is_valid():
+            results[key] = {
+                "status": "error",
+                "message": validate_serializers_message(serializer.errors),
+                "details": serializer.errors,
+            }
+            continue
+        valid.append((key, serializer, draft))
+
+    complete = True
+    for start in range(0, len(valid), SUBMISSION_BATCH_CHUNK_SIZE):
+        with transaction.atomic():
+            for key, serializer, draft in valid[
+                start:start + SUBMISSION_BATCH_CHUNK_SIZE
+            ]:
+                try:
+                    # a failing submission doesn't roll back the chunk
+                    with transaction.atomic():
+                        instance = serializer.save()
+                        if draft:
+                            draft.publish()
+                except IntegrityError as e:
+                    if draft:
+                        # the uuid of the draft is registered already
+                        results[key] = {
+                            "status": "error",
+                            "message": DUPLICATE_REGISTRATION_MESSAGE,
+                        }
+                        continue
+                    # the same registration stored by a concurrent request
+                    data = serializer.validated_data["data"]
+                    stored = get_submitted_datapoints(
+                        user=user,
+                        form_ids=[serializer.context["form"].id],
+                        uuids=[str(data.get("uuid"))],
+                    )
+                    if not stored:
+                        logger.error(f"Batch submission {key} failed: {e}")
+                        results[key] = {"status": "error", "message": str(e)}
+                        complete = False
+                        continue
+                    instance, draft = list(stored.values())[0], None
+                except Exception as e:
+                    logger.error(f"Batch submission {key} failed: {e}")
+                    results[key] = {"status": "error", "message": str(e)}
+                    complete = False
+                    continue
+                results[key] = {"status": "ok", "id": instance.id}
+                if draft:
+                    direct_to_data = (
+                        user.is_superuser or not draft.has_approval
+                    )
+                    if direct_to_data and not draft.parent:
+                        draft.save_to_file
+    return [
+        {
+            "uuid": submission.get("uuid"),
+            "formId": submission.get("formId"),
+            **results[key],
+        }
+        for key, submission in enumerate(submissions)
+    ], complete
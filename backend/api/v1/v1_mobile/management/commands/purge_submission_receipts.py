@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from api.v1.v1_mobile.models import SubmissionReceipt
+from mis.settings import SUBMISSION_RECEIPT_RETENTION
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the device submission receipts older than "
+        "SUBMISSION_RECEIPT_RETENTION days."
+    )
+
+    def handle(self, *args, **options):
+        expiry = timezone.now() - timedelta(days=SUBMISSION_RECEIPT_RETENTION)
+        deleted, _ = SubmissionReceipt.objects.filter(
+            created_at__lt=expiry
+        ).delete()
+        self.stdout.write(f"{deleted} submission receipts deleted")
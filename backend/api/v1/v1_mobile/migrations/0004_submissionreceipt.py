@@ -0,0 +1,34 @@
+# Generated by Django 4.0.4 on 2026-10-17 02:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0004_alter_formdata_uuid'),
+        ('v1_mobile', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('status_code', models.IntegerField(default=None, null=True)),
+                ('response', models.JSONField(default=None, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_receipts', to='v1_mobile.mobileassignment')),
+                ('data', models.ForeignKey(default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submission_receipts', to='v1_data.formdata')),
+            ],
+            options={
+                'db_table': 'mobile_submission_receipts',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='submissionreceipt',
+            constraint=models.UniqueConstraint(fields=('assignment', 'key'), name='unique_submission_receipt'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.4 on 2026-10-17 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0004_alter_formdata_uuid'),
+        ('v1_mobile', '0004_submissionreceipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionIntake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(default=None, max_length=255, null=True)),
+                ('payload', models.JSONField()),
+                ('params', models.JSONField(default=dict)),
+                ('status', models.IntegerField(choices=[(1, 'pending'), (2, 'on_progress'), (3, 'failed'), (4, 'done')], default=1)),
+                ('status_code', models.IntegerField(default=None, null=True)),
+                ('response', models.JSONField(default=None, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(default=None, null=True)),
+                ('processed_at', models.DateTimeField(default=None, null=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_intakes', to='v1_mobile.mobileassignment')),
+                ('data', models.ForeignKey(default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submission_intakes', to='v1_data.formdata')),
+            ],
+            options={
+                'db_table': 'mobile_submission_intakes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='submissionintake',
+            index=models.Index(fields=['status', 'id'], name='submission_intake_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='submissionintake',
+            constraint=models.UniqueConstraint(fields=('assignment', 'key'), name='unique_submission_intake'),
+        ),
+    ]
@@ -1,8 +1,35 @@
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Prefetch
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from api.v1.v1_users.models import SystemUser
-from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.constants import DataAccessTypes
+from api.v1.v1_profile.models import Administration, UserRole
 from api.v1.v1_forms.models import Forms
+from api.v1.v1_data.models import FormData
+from api.v1.v1_mobile.constants import IntakeStatus
 from utils.custom_helper import generate_random_string, CustomPasscode
+from utils.tiered_cache import (
+    CacheScopes,
+    get_cache_key,
+    get_shared,
+    set_shared,
+)
+
+MOBILE_ASSIGNMENT_CACHE_TIMEOUT = 60 * 60
+# administration paths, forms and roles are cached along
+MOBILE_ASSIGNMENT_CACHE_SCOPES = (
+    CacheScopes.administrations,
+    CacheScopes.forms,
+    CacheScopes.roles,
+)
+# user fields a saved user can change without changing its assignments
+MOBILE_ASSIGNMENT_IGNORED_USER_FIELDS = {"last_login", "password"}
+
+
+def get_assignment_cache_key(assignment_id: int) -> str:
+    return get_cache_key(f"mobile-assignment-{assignment_id}")
 
 
 class MobileAssignmentManager(models.Manager):
@@ -16,6 +43,40 @@ class MobileAssignmentManager(models.Manager):
         )
         return mobile_assignment
 
+    def get_cached(self, assignment_id: int):
+        """
+        Assignment with its user, forms, administrations and the user
+        roles with submit access (user.submit_roles), cached until one of
+        them changes. Raises DoesNotExist like get().
+
+        Devices authenticate with it, so it is only cached in the shared
+        tier: a deleted assignment or user is not served by the local
+        tier of another worker.
+        """
+        key = get_assignment_cache_key(assignment_id)
+        assignment = get_shared(key, scopes=MOBILE_ASSIGNMENT_CACHE_SCOPES)
+        if assignment is None:
+            assignment = self.select_related("user").prefetch_related(
+                "forms",
+                "administrations__level",
+                Prefetch(
+                    "user__user_user_role",
+                    queryset=UserRole.objects.filter(
+                        role__role_role_access__data_access=(
+                            DataAccessTypes.submit
+                        )
+                    ).select_related("administration").order_by("id"),
+                    to_attr="submit_roles",
+                ),
+            ).get(id=assignment_id)
+            set_shared(
+                key,
+                assignment,
+                scopes=MOBILE_ASSIGNMENT_CACHE_SCOPES,
+                timeout=MOBILE_ASSIGNMENT_CACHE_TIMEOUT,
+            )
+        return assignment
+
 
 class MobileAssignment(models.Model):
     name = models.CharField(max_length=255, null=True, blank=True)
@@ -47,6 +108,98 @@ class MobileAssignment(models.Model):
         verbose_name_plural = "Mobile Assignments"
 
 
+class SubmissionReceipt(models.Model):
+    """
+    Response of a processed device submission, replayed when the device
+    retries the same submission (see SUBMISSION_RECEIPT_RETENTION).
+    """
+
+    assignment = models.ForeignKey(
+        MobileAssignment,
+        on_delete=models.CASCADE,
+        related_name="submission_receipts",
+    )
+    key = models.CharField(max_length=255)
+    data = models.ForeignKey(
+        FormData,
+        on_delete=models.SET_NULL,
+        related_name="submission_receipts",
+        default=None,
+        null=True,
+    )
+    # both empty while the submission is being processed
+    status_code = models.IntegerField(default=None, null=True)
+    response = models.JSONField(default=None, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key}"
+
+    @property
+    def is_pending(self) -> bool:
+        return self.status_code is None
+
+    class Meta:
+        db_table = "mobile_submission_receipts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["assignment", "key"],
+                name="unique_submission_receipt",
+            )
+        ]
+
+
+class SubmissionIntake(models.Model):
+    """
+    Device submission accepted in async mode, stored as received and
+    processed by api.v1.v1_mobile.tasks.process_submission_intakes.
+    """
+
+    assignment = models.ForeignKey(
+        MobileAssignment,
+        on_delete=models.CASCADE,
+        related_name="submission_intakes",
+    )
+    key = models.CharField(max_length=255, default=None, null=True)
+    payload = models.JSONField()
+    params = models.JSONField(default=dict)
+    status = models.IntegerField(
+        choices=IntakeStatus.FieldStr.items(),
+        default=IntakeStatus.pending,
+    )
+    status_code = models.IntegerField(default=None, null=True)
+    response = models.JSONField(default=None, null=True)
+    data = models.ForeignKey(
+        FormData,
+        on_delete=models.SET_NULL,
+        related_name="submission_intakes",
+        default=None,
+        null=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # when a worker took it, see SUBMISSION_INTAKE_LEASE
+    claimed_at = models.DateTimeField(default=None, null=True)
+    processed_at = models.DateTimeField(default=None, null=True)
+
+    def __str__(self):
+        return f"{self.key}"
+
+    class Meta:
+        db_table = "mobile_submission_intakes"
+        indexes = [
+            models.Index(
+                fields=["status", "id"],
+                name="submission_intake_queue_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["assignment", "key"],
+                name="unique_submission_intake",
+            )
+        ]
+
+
 class MobileApk(models.Model):
     apk_version = models.CharField(max_length=50)
     apk_url = models.CharField(max_length=255)
@@ -59,3 +212,44 @@ class MobileApk(models.Model):
         db_table = "mobile_apks"
         verbose_name = "Mobile Apk"
         verbose_name_plural = "Mobile Apks"
+
+
+def invalidate_assignment_cache(assignment_ids):
+    cache.delete_many([get_assignment_cache_key(id) for id in assignment_ids])
+
+
+@receiver(post_save, sender=MobileAssignment)
+@receiver(post_delete, sender=MobileAssignment)
+def invalidate_mobile_assignment_cache(sender, instance, **_):
+    invalidate_assignment_cache([instance.id])
+
+
+@receiver(m2m_changed, sender=MobileAssignment.forms.through)
+@receiver(m2m_changed, sender=MobileAssignment.administrations.through)
+def invalidate_mobile_assignment_relations_cache(
+    sender, instance, action, reverse, pk_set, **_
+):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        # a form or an administration added to or removed from assignments
+        invalidate_assignment_cache(pk_set or [])
+    else:
+        invalidate_assignment_cache([instance.id])
+
+
+@receiver(post_save, sender=SystemUser)
+def invalidate_user_mobile_assignment_cache(
+    sender, instance, created, update_fields, **_
+):
+    # a new user has no assignment yet
+    if created or (
+        update_fields
+        and set(update_fields) <= MOBILE_ASSIGNMENT_IGNORED_USER_FIELDS
+    ):
+        return
+    invalidate_assignment_cache(
+        MobileAssignment.objects.filter(user=instance).values_list(
+            "id", flat=True
+        )
+    )
@@ -4,7 +4,6 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from api.v1.v1_forms.models import Forms
 from drf_spectacular.types import OpenApiTypes
-from django.db.models import Q
 from api.v1.v1_mobile.authentication import MobileAssignmentToken
 from api.v1.v1_profile.models import Administration, Entity
 from api.v1.v1_data.models import FormData
@@ -15,7 +14,13 @@ from utils.custom_serializer_fields import (
     CustomDateTimeField,
     CustomPrimaryKeyRelatedField,
 )
-from api.v1.v1_mobile.models import MobileAssignment, MobileApk
+from api.v1.v1_mobile.constants import IntakeStatus
+from api.v1.v1_mobile.models import (
+    MobileAssignment,
+    MobileApk,
+    SubmissionIntake,
+)
+from api.v1.v1_mobile.functions import decode_sync_cursor
 from utils.custom_helper import CustomPasscode, generate_random_string
 
 
@@ -46,6 +51,34 @@ class MobileDataPointDownloadListSerializer(serializers.Serializer):
         ]
 
 
+class MobileDataPointTombstoneSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    uuid = serializers.CharField()
+    form_id = serializers.IntegerField()
+    deleted_at = serializers.DateTimeField()
+
+    class Meta:
+        fields = ["id", "uuid", "form_id", "deleted_at"]
+
+
+class MobileDataPointSyncParamsSerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    page_size = CustomIntegerField(
+        required=False, min_value=1, max_value=100, default=10
+    )
+
+    def validate_cursor(self, value):
+        if not value:
+            return None
+        try:
+            return decode_sync_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid cursor")
+
+    class Meta:
+        fields = ["cursor", "page_size"]
+
+
 class MobileFormSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
     parentId = serializers.ReadOnlyField(source="parent_id")
@@ -137,22 +170,18 @@ class FormsAndEntityValidation(serializers.PrimaryKeyRelatedField):
                             }
                         )
                     if entity and selected_adm:
-                        # Build query for all selected administrations
-                        query = Q()
-                        for adm_id in selected_adm:
-                            adm = Administration.objects.filter(
-                                id=adm_id
-                            ).first()
-                            if adm:
-                                adm_path = adm.path if adm.parent else adm.id
-                                # Add OR condition for this administration
-                                query |= Q(administration__id=adm_id) | Q(
-                                    administration__path__startswith=adm_path
-                                )
-
                         # Check if entity has data in any of
                         # the selected administrations or their children
-                        entity_has_data = entity.entity_data.filter(query)
+                        entity_has_data = entity.entity_data.filter(
+                            administration__in=(
+                                Administration.objects.descendants_of(
+                                    *Administration.objects.filter(
+                                        id__in=selected_adm
+                                    ),
+                                    include_self=True,
+                                )
+                            )
+                        )
                         if not entity_has_data.exists():
                             no_data.append(
                                 {
@@ -247,6 +276,17 @@ class SyncDeviceFormDataSerializer(serializers.Serializer):
         ]
 
 
+class SyncDeviceBatchFormDataSerializer(serializers.Serializer):
+    submissions = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=500,
+    )
+
+    class Meta:
+        fields = ["submissions"]
+
+
 class SyncDeviceParamsSerializer(serializers.Serializer):
     id = CustomPrimaryKeyRelatedField(
         queryset=FormData.objects_draft.none(),
@@ -254,6 +294,7 @@ class SyncDeviceParamsSerializer(serializers.Serializer):
     )
     is_draft = serializers.BooleanField(default=False)
     is_published = serializers.BooleanField(default=False)
+    is_async = serializers.BooleanField(default=False)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -264,6 +305,28 @@ class SyncDeviceParamsSerializer(serializers.Serializer):
             "id",
             "is_draft",
             "is_published",
+            "is_async",
+        ]
+
+
+class SubmissionIntakeSerializer(serializers.ModelSerializer):
+    status = serializers.SerializerMethodField()
+    data_id = serializers.ReadOnlyField()
+
+    @extend_schema_field(OpenApiTypes.STR)
+    def get_status(self, instance: SubmissionIntake):
+        return IntakeStatus.FieldStr.get(instance.status)
+
+    class Meta:
+        model = SubmissionIntake
+        fields = [
+            "id",
+            "status",
+            "status_code",
+            "response",
+            "data_id",
+            "created_at",
+            "processed_at",
         ]
 
 
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.v1.v1_mobile.constants import IntakeStatus
+from api.v1.v1_mobile.functions import process_submission_intake
+from api.v1.v1_mobile.models import SubmissionIntake
+from mis.settings import (
+    SUBMISSION_INTAKE_BATCH_SIZE,
+    SUBMISSION_INTAKE_LEASE,
+)
+
+
+def release_stale_submission_intakes(intakes=None) -> int:
+    """
+    Put back in the queue the intakes (all by default) claimed by a worker
+    that didn't finish them (e.g. it crashed) within
+    SUBMISSION_INTAKE_LEASE seconds.
+    """
+    if intakes is None:
+        intakes = SubmissionIntake.objects.all()
+    expiry = timezone.now() - timedelta(seconds=SUBMISSION_INTAKE_LEASE)
+    return intakes.filter(
+        Q(claimed_at__lt=expiry) | Q(claimed_at__isnull=True),
+        status=IntakeStatus.on_progress,
+    ).update(status=IntakeStatus.pending, claimed_at=None)
+
+
+def process_submission_intakes(batch_size: int = SUBMISSION_INTAKE_BATCH_SIZE):
+    """
+    Process the pending device submissions, oldest first, until the queue
+    is empty. Concurrent workers skip the batches locked by each other.
+    """
+    processed = 0
+    release_stale_submission_intakes()
+    while True:
+        with transaction.atomic():
+            intakes = list(
+                SubmissionIntake.objects.select_for_update(skip_locked=True)
+                .filter(status=IntakeStatus.pending)
+                .order_by("id")[:batch_size]
+            )
+            if not intakes:
+                return processed
+            claimed_at = timezone.now()
+            SubmissionIntake.objects.filter(
+                pk__in=[i.id for i in intakes]
+            ).update(status=IntakeStatus.on_progress, claimed_at=claimed_at)
+        for intake in intakes:
+            # renew the lease, unless the intake was queued again meanwhile
+            renewed = SubmissionIntake.objects.filter(
+                pk=intake.id,
+                status=IntakeStatus.on_progress,
+                claimed_at=claimed_at,
+            ).update(claimed_at=timezone.now())
+            if renewed:
+                process_submission_intake(intake)
+        processed += len(intakes)
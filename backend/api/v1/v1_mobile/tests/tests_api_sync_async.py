@@ -0,0 +1,257 @@
+from datetime import timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from api.v1.v1_data.models import FormData
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.constants import IntakeStatus
+from api.v1.v1_mobile.models import MobileAssignment, SubmissionIntake
+from api.v1.v1_mobile.tasks import process_submission_intakes
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileSyncAsyncTestCase(
+    TestCase, AssignmentTokenTestHelperMixin, ProfileTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+
+        self.administration = Administration.objects.filter(
+            level__level=1
+        ).order_by("id").first()
+        self.form = Forms.objects.filter(parent__isnull=True).first()
+        self.user = self.create_user(
+            email="test@test.org",
+            administration=self.administration,
+            role_level=self.IS_ADMIN,
+            form=self.form,
+        )
+        self.passcode = "passcode1234"
+        self.mobile_assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test assignment", passcode=self.passcode
+        )
+        self.mobile_assignment.administrations.add(
+            *self.administration.parent_administration.all()
+        )
+        self.mobile_assignment.forms.add(self.form)
+        self.token = self.get_assignment_token(self.passcode)
+        self.uuid = str(uuid4())
+
+    def get_submission(self, form, uuid, name="datapoint"):
+        answers = {}
+        for question in form.form_questions.all():
+            if question.type in [
+                QuestionTypes.option,
+                QuestionTypes.multiple_option,
+            ]:
+                value = [question.options.first().value]
+            elif question.type in [
+                QuestionTypes.number,
+                QuestionTypes.cascade,
+                QuestionTypes.administration,
+            ]:
+                value = self.administration.id
+            elif question.type == QuestionTypes.geo:
+                value = [0, 0]
+            elif question.type == QuestionTypes.date:
+                value = "2021-01-01T00:00:00.000Z"
+            else:
+                value = "testing"
+            answers[question.id] = value
+        return {
+            "formId": form.id,
+            "name": name,
+            "duration": 3000,
+            "submittedAt": "2021-01-01T00:00:00.000Z",
+            "geo": [0, 0],
+            "uuid": uuid,
+            "answers": answers,
+        }
+
+    def post(self, url, data, **headers):
+        return self.client.post(
+            url,
+            data,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            **headers,
+        )
+
+    def test_async_submission(self):
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        intake = response.json()
+        self.assertEqual(intake["status"], "pending")
+        self.assertFalse(FormData.objects.filter(uuid=self.uuid).exists())
+
+        # a retry while queued gets the same intake
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.json()["id"], intake["id"])
+
+        self.assertEqual(process_submission_intakes(batch_size=1), 1)
+        data = FormData.objects.get(uuid=self.uuid)
+        response = self.client.get(
+            f"/api/v1/device/sync/status/{intake['id']}",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.json()
+        self.assertEqual(result["status"], "done")
+        self.assertEqual(result["status_code"], 200)
+        self.assertEqual(result["response"], {"message": "ok"})
+        self.assertEqual(result["data_id"], data.id)
+
+        # processed submissions are replayed from their receipt
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(process_submission_intakes(), 0)
+
+    def test_async_submission_with_invalid_answers(self):
+        submission = self.get_submission(self.form, self.uuid)
+        submission["answers"] = {"1": "testing"}
+        response = self.post(
+            "/api/v1/device/sync?is_async=true", submission
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        process_submission_intakes()
+        response = self.client.get(
+            f"/api/v1/device/sync/status/{response.json()['id']}",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        result = response.json()
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["status_code"], 400)
+        self.assertIn("message", result["response"])
+        self.assertFalse(FormData.objects.filter(uuid=self.uuid).exists())
+
+    def test_async_submission_invalid_shape(self):
+        submission = self.get_submission(self.form, self.uuid)
+        submission.pop("submittedAt")
+        response = self.post(
+            "/api/v1/device/sync?is_async=true", submission
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_submission_status_of_other_assignment(self):
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+        )
+        intake_id = response.json()["id"]
+        user = self.create_user(
+            email="other@test.org",
+            administration=self.administration,
+            role_level=self.IS_ADMIN,
+            form=self.form,
+        )
+        MobileAssignment.objects.create_assignment(
+            user=user, name="other", passcode="other1234"
+        )
+        response = self.client.get(
+            f"/api/v1/device/sync/status/{intake_id}",
+            HTTP_AUTHORIZATION=(
+                f"Bearer {self.get_assignment_token('other1234')}"
+            ),
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_intake_is_queued_again(self):
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+        )
+        intake = SubmissionIntake.objects.get(pk=response.json()["id"])
+        # claimed by a worker that crashed
+        intake.status = IntakeStatus.on_progress
+        intake.claimed_at = timezone.now()
+        intake.save()
+        self.assertEqual(process_submission_intakes(), 0)
+
+        intake.claimed_at = timezone.now() - timedelta(hours=1)
+        intake.save()
+        self.assertEqual(process_submission_intakes(), 1)
+        intake.refresh_from_db()
+        self.assertEqual(intake.status, IntakeStatus.done)
+        self.assertTrue(FormData.objects.filter(uuid=self.uuid).exists())
+
+    def test_stale_intake_is_queued_again_on_status(self):
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            self.get_submission(self.form, self.uuid),
+        )
+        intake = SubmissionIntake.objects.get(pk=response.json()["id"])
+        intake.status = IntakeStatus.on_progress
+        intake.claimed_at = timezone.now()
+        intake.save()
+        url = f"/api/v1/device/sync/status/{intake.id}"
+        with patch("api.v1.v1_mobile.views.async_task") as task:
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+            self.assertEqual(response.json()["status"], "on_progress")
+            task.assert_not_called()
+
+            # the lease of the worker expired
+            intake.claimed_at = timezone.now() - timedelta(hours=1)
+            intake.save()
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+            self.assertEqual(response.json()["status"], "pending")
+            task.assert_called_once_with(
+                "api.v1.v1_mobile.tasks.process_submission_intakes"
+            )
+        self.assertEqual(process_submission_intakes(), 1)
+        self.assertTrue(FormData.objects.filter(uuid=self.uuid).exists())
+
+    def test_failed_intake_is_queued_again(self):
+        submission = self.get_submission(self.form, self.uuid)
+        answers = submission.pop("answers")
+        submission["answers"] = {"1": "testing"}
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            submission,
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        intake_id = response.json()["id"]
+        process_submission_intakes()
+        self.assertEqual(
+            SubmissionIntake.objects.get(pk=intake_id).status,
+            IntakeStatus.failed,
+        )
+
+        submission["answers"] = answers
+        response = self.post(
+            "/api/v1/device/sync?is_async=true",
+            submission,
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.json()["id"], intake_id)
+        self.assertEqual(response.json()["status"], "pending")
+        self.assertEqual(process_submission_intakes(), 1)
+        self.assertEqual(SubmissionIntake.objects.count(), 1)
+        self.assertTrue(FormData.objects.filter(uuid=self.uuid).exists())
@@ -0,0 +1,225 @@
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework import status
+
+from api.v1.v1_data.models import FormData, Answers
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.models import MobileAssignment
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileSyncBatchTestCase(
+    TestCase, AssignmentTokenTestHelperMixin, ProfileTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+
+        self.administration = Administration.objects.filter(
+            level__level=1
+        ).order_by("id").first()
+        self.form = Forms.objects.filter(parent__isnull=True).first()
+        self.user = self.create_user(
+            email="test@test.org",
+            administration=self.administration,
+            role_level=self.IS_ADMIN,
+            form=self.form,
+        )
+        self.passcode = "passcode1234"
+        self.mobile_assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test assignment", passcode=self.passcode
+        )
+        self.mobile_assignment.administrations.add(
+            *self.administration.parent_administration.all()
+        )
+        self.mobile_assignment.forms.add(self.form)
+        self.token = self.get_assignment_token(self.passcode)
+        self.answers = self.get_answers()
+
+    def get_answers(self, form=None):
+        answers = {}
+        for question in (form or self.form).form_questions.all():
+            if question.type in [
+                QuestionTypes.option,
+                QuestionTypes.multiple_option,
+            ]:
+                value = [question.options.first().value]
+            elif question.type in [
+                QuestionTypes.number,
+                QuestionTypes.cascade,
+                QuestionTypes.administration,
+            ]:
+                value = self.administration.id
+            elif question.type == QuestionTypes.geo:
+                value = [0, 0]
+            elif question.type == QuestionTypes.date:
+                value = "2021-01-01T00:00:00.000Z"
+            else:
+                value = "testing"
+            answers[question.id] = value
+        return answers
+
+    def get_submission(self, uuid, **kwargs):
+        return {
+            "formId": self.form.id,
+            "name": f"datapoint {uuid}",
+            "duration": 3000,
+            "submittedAt": "2021-01-01T00:00:00.000Z",
+            "geo": [0, 0],
+            "uuid": uuid,
+            "answers": self.answers,
+            **kwargs,
+        }
+
+    def post_batch(self, submissions):
+        return self.client.post(
+            "/api/v1/device/sync/batch",
+            {"submissions": submissions},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def test_sync_batch(self):
+        response = self.post_batch([
+            self.get_submission("uuid-1"),
+            self.get_submission("uuid-2"),
+            self.get_submission("uuid-3", answers={"1": "testing"}),
+            self.get_submission("uuid-4", formId=9999),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [r["uuid"] for r in results],
+            ["uuid-1", "uuid-2", "uuid-3", "uuid-4"],
+        )
+        self.assertEqual(
+            [r["formId"] for r in results],
+            [self.form.id, self.form.id, self.form.id, 9999],
+        )
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["ok", "ok", "error", "error"],
+        )
+        self.assertEqual(results[3]["message"], "Form not found.")
+
+        data = FormData.objects.filter(uuid__in=["uuid-1", "uuid-2"])
+        self.assertEqual(
+            sorted(data.values_list("id", flat=True)),
+            [results[0]["id"], results[1]["id"]],
+        )
+        for d in data:
+            self.assertEqual(d.submitter, self.mobile_assignment.name)
+            self.assertEqual(
+                Answers.objects.filter(data=d).count(), len(self.answers)
+            )
+        self.assertFalse(FormData.objects.filter(uuid="uuid-3").exists())
+
+    def test_sync_batch_publishes_draft(self):
+        draft = FormData.objects.create(
+            name="draft",
+            form=self.form,
+            administration=self.administration,
+            created_by=self.user,
+            uuid="uuid-draft",
+            is_draft=True,
+        )
+        response = self.post_batch([self.get_submission("uuid-draft")])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [result] = response.json()["results"]
+        self.assertEqual(
+            result,
+            {
+                "uuid": "uuid-draft",
+                "formId": self.form.id,
+                "status": "ok",
+                "id": draft.id,
+            },
+        )
+        draft.refresh_from_db()
+        self.assertFalse(draft.is_draft)
+        self.assertEqual(draft.name, "datapoint uuid-draft")
+        self.assertEqual(
+            FormData.objects_with_deleted.filter(uuid="uuid-draft").count(),
+            1,
+        )
+
+    def test_sync_batch_duplicate_uuid(self):
+        response = self.post_batch([
+            self.get_submission("uuid-1"),
+            self.get_submission("uuid-1", name="retry"),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+        # a registration is only stored once
+        self.assertEqual(results[0]["id"], results[1]["id"])
+        data = FormData.objects.get(uuid="uuid-1")
+        self.assertEqual(data.name, "datapoint uuid-1")
+
+    def test_sync_batch_monitoring_submissions(self):
+        child_form = self.form.children.first()
+        self.mobile_assignment.forms.add(child_form)
+        response = self.post_batch([self.get_submission("uuid-1")])
+        registration = response.json()["results"][0]["id"]
+
+        # monitoring submissions share the uuid of their registration
+        response = self.post_batch([
+            self.get_submission(
+                "uuid-1",
+                formId=child_form.id,
+                answers=self.get_answers(form=child_form),
+            )
+            for _ in range(2)
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+        self.assertEqual(
+            [r["formId"] for r in results], [child_form.id, child_form.id]
+        )
+        data = FormData.objects.filter(form=child_form, uuid="uuid-1")
+        self.assertEqual(
+            sorted(data.values_list("id", flat=True)),
+            sorted(r["id"] for r in results),
+        )
+        for d in data:
+            self.assertEqual(d.parent_id, registration)
+
+    def test_sync_batch_refreshes_data_after_commit(self):
+        with patch("api.v1.v1_data.serializers.async_task") as task:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.post_batch([
+                    self.get_submission("uuid-1"),
+                    self.get_submission("uuid-2"),
+                ])
+                self.assertEqual(
+                    response.status_code, status.HTTP_200_OK
+                )
+                task.assert_not_called()
+            self.assertEqual(len(callbacks), 2)
+            for callback in callbacks:
+                callback()
+        self.assertEqual(task.call_count, 2)
+
+    def test_sync_batch_invalid_request(self):
+        response = self.post_batch([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("message", response.json())
+
+        response = self.client.post(
+            "/api/v1/device/sync/batch",
+            {"submissions": [self.get_submission("uuid-1")]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer invalid",
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED
+        )
@@ -0,0 +1,335 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from api.v1.v1_data.models import FormData
+from api.v1.v1_data.serializers import (
+    DUPLICATE_REGISTRATION_MESSAGE,
+    SubmitPendingFormSerializer,
+)
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.models import MobileAssignment, SubmissionReceipt
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileSyncIdempotencyTestCase(
+    TestCase, AssignmentTokenTestHelperMixin, ProfileTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+
+        self.administration = Administration.objects.filter(
+            level__level=1
+        ).order_by("id").first()
+        self.form = Forms.objects.filter(parent__isnull=True).first()
+        self.user = self.create_user(
+            email="test@test.org",
+            administration=self.administration,
+            role_level=self.IS_ADMIN,
+            form=self.form,
+        )
+        self.passcode = "passcode1234"
+        self.mobile_assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test assignment", passcode=self.passcode
+        )
+        self.mobile_assignment.administrations.add(
+            *self.administration.parent_administration.all()
+        )
+        self.mobile_assignment.forms.add(self.form)
+        self.token = self.get_assignment_token(self.passcode)
+
+    def get_submission(self, form, uuid, name="datapoint"):
+        answers = {}
+        for question in form.form_questions.all():
+            if question.type in [
+                QuestionTypes.option,
+                QuestionTypes.multiple_option,
+            ]:
+                value = [question.options.first().value]
+            elif question.type in [
+                QuestionTypes.number,
+                QuestionTypes.cascade,
+                QuestionTypes.administration,
+            ]:
+                value = self.administration.id
+            elif question.type == QuestionTypes.geo:
+                value = [0, 0]
+            elif question.type == QuestionTypes.date:
+                value = "2021-01-01T00:00:00.000Z"
+            else:
+                value = "testing"
+            answers[question.id] = value
+        return {
+            "formId": form.id,
+            "name": name,
+            "duration": 3000,
+            "submittedAt": "2021-01-01T00:00:00.000Z",
+            "geo": [0, 0],
+            "uuid": uuid,
+            "answers": answers,
+        }
+
+    def post(self, url, data, **headers):
+        return self.client.post(
+            url,
+            data,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            **headers,
+        )
+
+    def test_retried_submission_is_stored_once(self):
+        submission = self.get_submission(self.form, "uuid-1")
+        response = self.post(
+            "/api/v1/device/sync", submission, HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        receipt = SubmissionReceipt.objects.get(
+            assignment=self.mobile_assignment
+        )
+        data = FormData.objects.get(uuid="uuid-1")
+        self.assertEqual(receipt.data, data)
+
+        with self.assertNumQueries(5):
+            # form and locked receipt lookups only (in a savepoint), the
+            # assignment is read from the shared cache
+            response = self.post(
+                "/api/v1/device/sync",
+                submission,
+                HTTP_IDEMPOTENCY_KEY="key-1",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"message": "ok"})
+        self.assertEqual(FormData.objects.filter(uuid="uuid-1").count(), 1)
+
+    def test_submission_being_processed(self):
+        SubmissionReceipt.objects.create(
+            assignment=self.mobile_assignment, key="key-1"
+        )
+        submission = self.get_submission(self.form, "uuid-1")
+        response = self.post(
+            "/api/v1/device/sync", submission, HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(response.has_header("Retry-After"))
+        self.assertFalse(FormData.objects.filter(uuid="uuid-1").exists())
+
+        # the receipt of a request that never finished is taken over
+        SubmissionReceipt.objects.update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        response = self.post(
+            "/api/v1/device/sync", submission, HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            SubmissionReceipt.objects.get().data,
+            FormData.objects.get(uuid="uuid-1"),
+        )
+
+    def test_invalid_submission_is_not_replayed(self):
+        submission = self.get_submission(self.form, "uuid-1")
+        submission["answers"] = {}
+        response = self.post(
+            "/api/v1/device/sync", submission, HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SubmissionReceipt.objects.exists())
+
+    def test_registration_uuid_is_stored_once(self):
+        response = self.post(
+            "/api/v1/device/sync", self.get_submission(self.form, "uuid-1")
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # same datapoint, different payload
+        response = self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-1", name="retry"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = FormData.objects.filter(uuid="uuid-1")
+        self.assertEqual(data.count(), 1)
+        self.assertEqual(data.first().name, "datapoint")
+
+    def test_retried_monitoring_submission_is_stored_once(self):
+        child_form = self.form.children.first()
+        self.mobile_assignment.forms.add(child_form)
+        self.post(
+            "/api/v1/device/sync", self.get_submission(self.form, "uuid-1")
+        )
+        submission = self.get_submission(child_form, "uuid-1")
+        for _ in range(2):
+            response = self.post(
+                "/api/v1/device/sync",
+                submission,
+                HTTP_IDEMPOTENCY_KEY="key-1",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            FormData.objects.filter(form=child_form).count(), 1
+        )
+        # identical monitoring submissions without a key are both stored
+        for _ in range(2):
+            self.post("/api/v1/device/sync", submission)
+        self.assertEqual(
+            FormData.objects.filter(form=child_form).count(), 3
+        )
+        self.assertEqual(SubmissionReceipt.objects.count(), 1)
+
+    def test_idempotency_key_header(self):
+        response = self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-1"),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-2"),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(FormData.objects.filter(uuid="uuid-2").exists())
+
+        # an expired receipt is not replayed
+        SubmissionReceipt.objects.update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-2"),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertTrue(FormData.objects.filter(uuid="uuid-2").exists())
+
+    def test_retried_batch_is_stored_once(self):
+        submissions = {
+            "submissions": [
+                self.get_submission(self.form, "uuid-1"),
+                self.get_submission(self.form, "uuid-2"),
+            ]
+        }
+        response = self.post(
+            "/api/v1/device/sync/batch",
+            submissions,
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        response = self.post(
+            "/api/v1/device/sync/batch",
+            submissions,
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.json(), results)
+
+        # registrations already stored are reported with their id
+        submissions["submissions"].append(
+            self.get_submission(self.form, "uuid-3")
+        )
+        response = self.post("/api/v1/device/sync/batch", submissions)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["results"][0], results["results"][0]
+        )
+        self.assertEqual(
+            FormData.objects.filter(
+                uuid__in=["uuid-1", "uuid-2", "uuid-3"]
+            ).count(),
+            3,
+        )
+
+    def test_failed_batch_is_not_replayed(self):
+        submissions = {
+            "submissions": [self.get_submission(self.form, "uuid-1")]
+        }
+        with patch.object(
+            SubmitPendingFormSerializer, "save", side_effect=Exception("err")
+        ):
+            response = self.post(
+                "/api/v1/device/sync/batch",
+                submissions,
+                HTTP_IDEMPOTENCY_KEY="key-1",
+            )
+        self.assertEqual(response.json()["results"][0]["status"], "error")
+        self.assertFalse(SubmissionReceipt.objects.exists())
+        response = self.post(
+            "/api/v1/device/sync/batch",
+            submissions,
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.json()["results"][0]["status"], "ok")
+        self.assertTrue(FormData.objects.filter(uuid="uuid-1").exists())
+
+    def test_registration_uuid_is_unique(self):
+        self.post(
+            "/api/v1/device/sync", self.get_submission(self.form, "uuid-1")
+        )
+        data = FormData.objects.get(uuid="uuid-1")
+        data.pk = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            data.save()
+        # a deleted registration doesn't keep its uuid
+        FormData.objects.filter(uuid="uuid-1").update(
+            deleted_at=timezone.now()
+        )
+        data.save()
+
+    def test_draft_of_registered_uuid(self):
+        self.post(
+            "/api/v1/device/sync", self.get_submission(self.form, "uuid-1")
+        )
+        response = self.post(
+            "/api/v1/device/sync?is_draft=true",
+            self.get_submission(self.form, "uuid-1", name="draft"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        draft = FormData.objects_draft.get(uuid="uuid-1")
+        self.assertEqual(draft.name, "draft")
+
+        # publishing it would register the uuid twice
+        response = self.post(
+            "/api/v1/device/sync?is_draft=true&is_published=true",
+            self.get_submission(self.form, "uuid-1", name="draft"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.json(),
+            {"message": DUPLICATE_REGISTRATION_MESSAGE},
+        )
+        self.assertTrue(FormData.objects_draft.filter(pk=draft.pk).exists())
+
+    def test_purge_submission_receipts(self):
+        self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-1"),
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.post(
+            "/api/v1/device/sync",
+            self.get_submission(self.form, "uuid-2"),
+            HTTP_IDEMPOTENCY_KEY="key-2",
+        )
+        SubmissionReceipt.objects.filter(data__uuid="uuid-1").update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        call_command("purge_submission_receipts", stdout=StringIO())
+        self.assertEqual(
+            list(
+                SubmissionReceipt.objects.values_list("data__uuid", flat=True)
+            ),
+            ["uuid-2"],
+        )
@@ -74,6 +74,28 @@ class MobileApkTestCase(TestCase):
         )
         self.assertTrue(os.path.exists(apk_file))
 
+    def test_mobile_apk_download_is_fetched_once(self):
+        cls = MobileApkTestCase
+        apk_file = (
+            f"{cls.apk_path}/{APK_SHORT_NAME}-{cls.mobile_apk.apk_version}.apk"
+        )
+        if os.path.exists(apk_file):
+            os.remove(apk_file)
+        fetched = len(cls.mock.request_history)
+        for _ in range(2):
+            download = self.client.get("/api/v1/device/apk/download")
+            self.assertEqual(download.status_code, 200)
+        self.assertEqual(len(cls.mock.request_history), fetched + 1)
+        self.assertEqual(
+            b"".join(download.streaming_content), cls.apk_content
+        )
+
+        download = self.client.get(
+            "/api/v1/device/apk/download",
+            HTTP_IF_NONE_MATCH=download["ETag"],
+        )
+        self.assertEqual(download.status_code, 304)
+
     def test_mobile_apk_upload(self):
         # SUCCESS UPLOAD
         cls = MobileApkTestCase
@@ -0,0 +1,129 @@
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+from rest_framework import status
+
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.functions import get_submission_administration
+from api.v1.v1_mobile.models import (
+    MobileAssignment,
+    get_assignment_cache_key,
+)
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileAssignmentCacheTestCase(
+    TestCase, ProfileTestHelperMixin, AssignmentTokenTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+        self.administration = Administration.objects.filter(
+            parent__isnull=True
+        ).first()
+        self.adm = self.administration.parent_administration.first()
+        self.forms = list(Forms.objects.filter(parent__isnull=True))
+        self.user = self.create_user(
+            email="test@test.org",
+            role_level=self.IS_ADMIN,
+            administration=self.administration,
+        )
+        self.passcode = "passcode1234"
+        self.assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test", passcode=self.passcode
+        )
+        self.assignment.administrations.add(self.adm)
+        self.assignment.forms.add(self.forms[0])
+        self.token = self.get_assignment_token(self.passcode)
+
+    def count_queries(self, ctx) -> int:
+        return len([
+            q for q in ctx.captured_queries
+            if "cache_table" not in q["sql"]
+        ])
+
+    def test_cached_assignment(self):
+        with CaptureQueriesContext(connection) as ctx:
+            assignment = MobileAssignment.objects.get_cached(
+                self.assignment.id
+            )
+        self.assertGreater(self.count_queries(ctx), 0)
+        with CaptureQueriesContext(connection) as ctx:
+            assignment = MobileAssignment.objects.get_cached(
+                self.assignment.id
+            )
+            self.assertEqual(assignment.user, self.user)
+            self.assertEqual(
+                [f.id for f in assignment.forms.all()], [self.forms[0].id]
+            )
+            self.assertEqual(
+                [a.path for a in assignment.administrations.all()],
+                [self.adm.path],
+            )
+            self.assertEqual(
+                get_submission_administration(assignment),
+                self.administration,
+            )
+        self.assertEqual(self.count_queries(ctx), 0)
+
+    def test_cached_assignment_is_invalidated(self):
+        MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assignment.forms.add(self.forms[1])
+        assignment = MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assertEqual(assignment.forms.count(), 2)
+        self.assertEqual(len(assignment.forms.all()), 2)
+
+        self.assignment.name = "renamed"
+        self.assignment.save()
+        assignment = MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assertEqual(assignment.name, "renamed")
+
+        # the user of the assignment changed
+        url = "/api/v1/device/datapoint-list/?cursor="
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+        response = self.client.get(url, **auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        assignment = MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assertEqual(assignment.user.first_name, "Renamed")
+
+    def test_cached_assignment_skips_the_local_tier(self):
+        MobileAssignment.objects.get_cached(self.assignment.id)
+        key = get_assignment_cache_key(self.assignment.id)
+        self.assertIsNone(caches["local"].get(key))
+        self.assertIsNotNone(caches["shared"].get(key))
+
+        # roles changed by another worker, seen through the shared tier
+        caches["shared"].set("cache-scope-roles", 0, timeout=None)
+        with CaptureQueriesContext(connection) as ctx:
+            MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assertGreater(self.count_queries(ctx), 0)
+
+        # deleted by another worker
+        caches["shared"].delete(key)
+        MobileAssignment.objects.filter(id=self.assignment.id).delete()
+        with self.assertRaises(MobileAssignment.DoesNotExist):
+            MobileAssignment.objects.get_cached(self.assignment.id)
+
+    def test_deleted_user_is_not_served_stale(self):
+        MobileAssignment.objects.get_cached(self.assignment.id)
+        self.user.delete()
+        assignment = MobileAssignment.objects.get_cached(self.assignment.id)
+        self.assertIsNotNone(assignment.user.deleted_at)
+
+    def test_user_login_keeps_cached_assignment(self):
+        MobileAssignment.objects.get_cached(self.assignment.id)
+        with CaptureQueriesContext(connection) as ctx:
+            self.user.save(update_fields=["last_login"])
+        # only the update of the user
+        self.assertEqual(self.count_queries(ctx), 1)
+        self.assertIsNotNone(
+            caches["shared"].get(get_assignment_cache_key(self.assignment.id))
+        )
@@ -0,0 +1,178 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from api.v1.v1_data.models import FormData
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.models import MobileAssignment
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileDataPointBundleTestCase(
+    TestCase, ProfileTestHelperMixin, AssignmentTokenTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+        # keep the bundles apart from the tests running in parallel
+        storage = tempfile.TemporaryDirectory()
+        self.addCleanup(storage.cleanup)
+        patcher = patch(
+            "api.v1.v1_mobile.functions.STORAGE_PATH", storage.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.administration = Administration.objects.filter(
+            parent__isnull=True
+        ).first()
+        self.adm = self.administration.parent_administration.first()
+        self.form = Forms.objects.filter(parent__isnull=True).first()
+        self.user = self.create_user(
+            email="test@test.org",
+            role_level=self.IS_ADMIN,
+            administration=self.administration,
+        )
+        self.passcode = "passcode1234"
+        self.mobile_assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test", passcode=self.passcode
+        )
+        self.mobile_assignment.administrations.add(self.adm)
+        self.mobile_assignment.forms.add(self.form)
+        # older than the safety window, see get_safe_sync_cursor
+        FormData.objects.filter(
+            pk__in=[self.create_datapoint(i).pk for i in range(5)]
+        ).update(created=timezone.now() - timedelta(hours=1))
+        self.datapoints = list(FormData.objects.order_by("id"))
+        self.token = self.get_assignment_token(self.passcode)
+
+    def create_datapoint(self, index):
+        return FormData.objects.create(
+            name=f"Datapoint {index}",
+            form=self.form,
+            administration=self.adm,
+            created_by=self.user,
+            uuid=f"uuid-{index}",
+        )
+
+    def get_bundle(self, **headers):
+        return self.client.get(
+            "/api/v1/device/datapoint-bundle",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            **headers,
+        )
+
+    def read_bundle(self, response) -> list:
+        content = gzip.decompress(b"".join(response.streaming_content))
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_download_bundle(self):
+        response = self.get_bundle()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = self.read_bundle(response)
+        self.assertEqual(
+            [line["id"] for line in lines],
+            [d.id for d in self.datapoints],
+        )
+        self.assertEqual(
+            lines[0],
+            {"form_id": self.form.id, **self.datapoints[0].to_datapoint()},
+        )
+
+        # the cursor continues with the changes made after the bundle
+        cursor = response["X-Sync-Cursor"]
+        response = self.client.get(
+            "/api/v1/device/datapoint-list/",
+            {"cursor": cursor},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.json()["data"], [])
+
+        # unchanged bundle
+        etag = self.get_bundle()["ETag"]
+        response = self.get_bundle(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_bundle_is_not_served_as_master_data(self):
+        self.get_bundle()
+        for file_name in [
+            f"bundles/assignment-{self.mobile_assignment.id}.ndjson.gz",
+            "../storage/private/bundles/"
+            f"assignment-{self.mobile_assignment.id}.ndjson.gz",
+            "..",
+        ]:
+            response = self.client.get(f"/api/v1/device/sqlite/{file_name}")
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_bundle_is_updated_incrementally(self):
+        self.get_bundle()
+        updated = self.datapoints[1]
+        updated.name = "Updated"
+        updated.updated = timezone.now()
+        updated.save()
+        deleted = self.datapoints[2]
+        deleted.delete()
+        created = self.create_datapoint(5)
+
+        lines = self.read_bundle(self.get_bundle())
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(
+            [line["id"] for line in lines[5:]],
+            [updated.id, deleted.id, created.id],
+        )
+        self.assertEqual(lines[5]["datapoint_name"], "Updated")
+        self.assertEqual(
+            lines[6], {"id": deleted.id, "uuid": "uuid-2", "deleted": True}
+        )
+
+        # a changed assignment gets a new bundle
+        self.mobile_assignment.administrations.add(self.administration)
+        lines = self.read_bundle(self.get_bundle())
+        self.assertEqual(
+            sorted([line["id"] for line in lines]),
+            sorted([d.id for d in self.datapoints if d != deleted])
+            + [created.id],
+        )
+
+    def test_late_commit_is_not_skipped(self):
+        self.get_bundle()
+        new_datapoint = self.create_datapoint(5)
+        response = self.get_bundle()
+        lines = self.read_bundle(response)
+        self.assertEqual(lines[-1]["id"], new_datapoint.id)
+        cursor = response["X-Sync-Cursor"]
+        # committed after the download, with an older timestamp
+        late_datapoint = self.create_datapoint(6)
+        FormData.objects.filter(pk=late_datapoint.pk).update(
+            created=new_datapoint.created - timedelta(seconds=1)
+        )
+
+        # changes of the safety window are appended again
+        lines = self.read_bundle(self.get_bundle())
+        self.assertEqual(
+            [line["id"] for line in lines[5:]],
+            [new_datapoint.id, late_datapoint.id, new_datapoint.id],
+        )
+        response = self.client.get(
+            "/api/v1/device/datapoint-list/",
+            {"cursor": cursor},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(
+            [d["id"] for d in response.json()["data"]],
+            [late_datapoint.id, new_datapoint.id],
+        )
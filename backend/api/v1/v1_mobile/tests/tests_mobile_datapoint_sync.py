@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from api.v1.v1_data.models import FormData
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_mobile.models import MobileAssignment
+from api.v1.v1_mobile.tests.mixins import AssignmentTokenTestHelperMixin
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class MobileDataPointSyncTestCase(
+    TestCase, ProfileTestHelperMixin, AssignmentTokenTestHelperMixin
+):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("form_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+
+        self.administration = Administration.objects.filter(
+            parent__isnull=True
+        ).first()
+        self.adm = self.administration.parent_administration.first()
+        self.form = Forms.objects.filter(parent__isnull=True).first()
+        self.user = self.create_user(
+            email="test@test.org",
+            role_level=self.IS_ADMIN,
+            administration=self.administration,
+        )
+        self.passcode = "passcode1234"
+        self.mobile_assignment = MobileAssignment.objects.create_assignment(
+            user=self.user, name="test", passcode=self.passcode
+        )
+        self.mobile_assignment.administrations.add(self.adm)
+        self.mobile_assignment.forms.add(self.form)
+        # older than the safety window, see get_datapoint_sync_page
+        FormData.objects.filter(
+            pk__in=[self.create_datapoint(i).pk for i in range(5)]
+        ).update(created=timezone.now() - timedelta(hours=1))
+        self.datapoints = list(FormData.objects.order_by("id"))
+        self.token = self.get_assignment_token(self.passcode)
+
+    def create_datapoint(self, index):
+        return FormData.objects.create(
+            name=f"Datapoint {index}",
+            form=self.form,
+            administration=self.adm,
+            created_by=self.user,
+            uuid=f"uuid-{index}",
+        )
+
+    def get_page(self, cursor="", page_size=2):
+        return self.client.get(
+            "/api/v1/device/datapoint-list/",
+            {"cursor": cursor, "page_size": page_size},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def sync(self, cursor=""):
+        ids, deleted = [], []
+        while True:
+            response = self.get_page(cursor=cursor)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            ids += [d["id"] for d in data["data"]]
+            deleted += [d["id"] for d in data["deleted"]]
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                return ids, deleted, cursor
+
+    def test_full_sync_by_cursor(self):
+        response = self.get_page()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(
+            list(data), ["data", "deleted", "cursor", "has_more"]
+        )
+        self.assertEqual(len(data["data"]), 2)
+        self.assertTrue(data["has_more"])
+
+        ids, deleted, cursor = self.sync(cursor=data["cursor"])
+        self.assertEqual(
+            [d["id"] for d in data["data"]] + ids,
+            [d.id for d in self.datapoints],
+        )
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync(cursor=cursor), ([], [], cursor))
+
+    def test_data_changed_during_sync_is_not_skipped(self):
+        data = self.get_page().json()
+        # a new datapoint and an update of an already synced one
+        new_datapoint = self.create_datapoint(5)
+        updated = self.datapoints[0]
+        updated.name = "Updated"
+        updated.updated = new_datapoint.created
+        updated.save()
+
+        ids, _, _ = self.sync(cursor=data["cursor"])
+        self.assertEqual(
+            ids,
+            [d.id for d in self.datapoints[2:]] + [
+                updated.id, new_datapoint.id
+            ],
+        )
+
+    def test_delta_sync(self):
+        _, _, cursor = self.sync()
+        new_datapoint = self.create_datapoint(5)
+        self.datapoints[1].delete()
+        ids, deleted, cursor = self.sync(cursor=cursor)
+        self.assertEqual(ids, [new_datapoint.id])
+        self.assertEqual(deleted, [self.datapoints[1].id])
+
+        # changes of the safety window are sent again
+        ids, deleted, _ = self.sync(cursor=cursor)
+        self.assertEqual(ids, [new_datapoint.id])
+        self.assertEqual(deleted, [self.datapoints[1].id])
+
+    def test_late_commit_is_not_skipped(self):
+        _, _, cursor = self.sync()
+        new_datapoint = self.create_datapoint(5)
+        ids, _, cursor = self.sync(cursor=cursor)
+        self.assertEqual(ids, [new_datapoint.id])
+        # committed after the sync, with an older timestamp
+        late_datapoint = self.create_datapoint(6)
+        FormData.objects.filter(pk=late_datapoint.pk).update(
+            created=new_datapoint.created - timedelta(seconds=1)
+        )
+        ids, _, _ = self.sync(cursor=cursor)
+        self.assertEqual(ids, [late_datapoint.id, new_datapoint.id])
+
+    def test_sync_without_cursor_starts_from_scratch(self):
+        self.sync()
+        ids, deleted, _ = self.sync()
+        self.assertEqual(ids, [d.id for d in self.datapoints])
+        self.assertEqual(deleted, [])
+
+    def test_full_sync_skips_deleted_data(self):
+        self.datapoints[0].delete()
+        ids, deleted, _ = self.sync()
+        self.assertEqual(ids, [d.id for d in self.datapoints[1:]])
+        self.assertEqual(deleted, [])
+
+    def test_tombstone_fields(self):
+        _, _, cursor = self.sync()
+        self.datapoints[2].delete()
+        data = self.get_page(cursor=cursor).json()
+        self.assertEqual(data["data"], [])
+        self.assertEqual(
+            list(data["deleted"][0]), ["id", "uuid", "form_id", "deleted_at"]
+        )
+        self.assertEqual(data["deleted"][0]["uuid"], "uuid-2")
+
+    def test_invalid_cursor(self):
+        response = self.get_page(cursor="not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("message", response.json())
@@ -108,3 +108,45 @@ class MobileFormsApiTest(TestCase, AssignmentTokenTestHelperMixin):
         self.assertEqual(data["name"], self.form.name)
         self.assertEqual(data["version"], self.form.version)
         self.assertEqual(data["parent"], None)
+
+    def test_get_all_form_definitions(self):
+        token = self.get_assignment_token(self.passcode)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        response = self.client.get("/api/v1/device/forms", **auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        form_ids = [self.form.id] + list(
+            Forms.objects.filter(parent=self.form)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual([d["id"] for d in data], form_ids)
+        for definition in data:
+            details = self.client.get(
+                f"/api/v1/device/form/{definition['id']}", **auth
+            )
+            self.assertEqual(details.json(), definition)
+
+        # devices check for form updates with a conditional request
+        etag = response["ETag"]
+        response = self.client.get(
+            "/api/v1/device/forms", HTTP_IF_NONE_MATCH=etag, **auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.form.version += 1
+        self.form.save()
+        response = self.client.get(
+            "/api/v1/device/forms", HTTP_IF_NONE_MATCH=etag, **auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()[0]["version"], self.form.version)
+
+        # another administration scope gets its own definitions
+        self.mobile_assignment.administrations.add(self.administration)
+        response = self.client.get(
+            "/api/v1/device/forms",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            **auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,9 +1,13 @@
+import gzip
 import os
 import sqlite3
+import tempfile
 import pandas as pd
 from api.v1.v1_profile.tests.utils import AdministrationEntitiesTestFactory
 from mis.settings import MASTER_DATA
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from api.v1.v1_profile.models import Administration, Entity, EntityData
 from api.v1.v1_profile.management.commands.administration_seeder import (
     seed_levels
@@ -11,7 +15,13 @@ from api.v1.v1_profile.management.commands.administration_seeder import (
 from api.v1.v1_profile.constants import DEFAULT_ADMINISTRATION_LEVELS
 from api.v1.v1_users.models import Organisation
 from django.core.management import call_command
-from utils.custom_generator import generate_sqlite, update_sqlite
+from utils.custom_generator import (
+    delete_sqlite,
+    generate_sqlite,
+    get_published_sqlite,
+    get_sqlite_version,
+    update_sqlite,
+)
 from unittest.mock import patch
 
 
@@ -314,3 +324,243 @@ class EntitiesSQLiteGenerationTest(TestCase):
         generated_entity_data_sqlite = f"{MASTER_DATA}/test_entity_data.sqlite"
         self.assertTrue(os.path.exists(generated_entity_sqlite))
         self.assertTrue(os.path.exists(generated_entity_data_sqlite))
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class VersionedSQLiteTest(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("organisation_seeder", "--test")
+        # keep the files apart from the tests running in parallel
+        master_data = tempfile.TemporaryDirectory()
+        self.addCleanup(master_data.cleanup)
+        self.master_data = master_data.name
+        for target in [
+            "utils.custom_generator.MASTER_DATA",
+            "api.v1.v1_mobile.views.MASTER_DATA",
+        ]:
+            patcher = patch(target, self.master_data)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.file_name = generate_sqlite(Organisation)
+        self.endpoint = "/api/v1/device/sqlite/test_organisation.sqlite"
+
+    def read_sqlite(self, response) -> dict:
+        path = f"{self.master_data}/download.sqlite"
+        with open(path, "wb") as f:
+            f.write(b"".join(response.streaming_content))
+        conn = sqlite3.connect(path)
+        try:
+            return {
+                "nodes": [
+                    r[0] for r in conn.execute(
+                        "SELECT id FROM nodes ORDER BY id"
+                    )
+                ],
+                "deleted": [
+                    r[0] for r in conn.execute("SELECT id FROM deleted")
+                ],
+                "meta": dict(conn.execute("SELECT name, value FROM meta")),
+            }
+        finally:
+            conn.close()
+            os.remove(path)
+
+    def test_generated_file_is_indexed_and_versioned(self):
+        conn = sqlite3.connect(self.file_name)
+        indexes = [
+            r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        ]
+        conn.close()
+        self.assertIn("nodes_id", indexes)
+        self.assertIn("nodes_parent", indexes)
+        version = get_sqlite_version(self.file_name)
+        self.assertEqual(version["base_version"], version["version"])
+        self.assertFalse(
+            [f for f in os.listdir(self.master_data) if f.endswith(".tmp")]
+        )
+
+    def test_administration_full_path_name(self):
+        file_name = generate_sqlite(Administration)
+        conn = sqlite3.connect(file_name)
+        full_path_names = dict(
+            conn.execute("SELECT id, full_path_name FROM nodes")
+        )
+        conn.close()
+        for adm in Administration.objects.all():
+            self.assertEqual(
+                full_path_names[adm.id],
+                adm.full_path_name.replace("|", " - "),
+            )
+
+        # renaming an administration renames its descendants too
+        adm = Administration.objects.filter(level__level=1).first()
+        adm.name = "Renamed"
+        adm.save()
+        with CaptureQueriesContext(connection) as ctx:
+            update_sqlite(
+                model=Administration, data={"name": "Renamed"}, id=adm.id
+            )
+        # the names come from the file itself
+        self.assertEqual(len(ctx.captured_queries), 0)
+        conn = sqlite3.connect(file_name)
+        full_path_names = dict(
+            conn.execute("SELECT id, full_path_name FROM nodes")
+        )
+        conn.close()
+        child = Administration.objects.filter(parent=adm).first()
+        self.assertIn(" - Renamed - ", full_path_names[child.id])
+
+    def test_download_delta(self):
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, 200)
+        version = int(response["X-Master-Data-Version"])
+        self.assertEqual(
+            len(self.read_sqlite(response)["nodes"]),
+            Organisation.objects.count(),
+        )
+
+        response = self.client.get(f"{self.endpoint}?since={version}")
+        self.assertEqual(response.status_code, 304)
+
+        org = Organisation.objects.create(name="SQLite Company")
+        update_sqlite(
+            model=Organisation, data={"id": org.id, "name": org.name}
+        )
+        deleted = Organisation.objects.first()
+        delete_sqlite(model=Organisation, id=deleted.id)
+        response = self.client.get(f"{self.endpoint}?since={version}")
+        self.assertEqual(response.status_code, 200)
+        delta = self.read_sqlite(response)
+        self.assertEqual(delta["nodes"], [org.id])
+        self.assertEqual(delta["deleted"], [deleted.id])
+        self.assertEqual(delta["meta"]["since"], version)
+        self.assertEqual(
+            delta["meta"]["version"], int(response["X-Master-Data-Version"])
+        )
+
+        # a rebuilt file is downloaded whole
+        generate_sqlite(Organisation)
+        response = self.client.get(f"{self.endpoint}?since={version}")
+        self.assertEqual(
+            len(self.read_sqlite(response)["nodes"]),
+            Organisation.objects.count(),
+        )
+
+        response = self.client.get(f"{self.endpoint}?since=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_edits_are_published_by_the_next_download(self):
+        self.client.get(self.endpoint)
+        published = get_published_sqlite(self.file_name)
+        stat = os.stat(published)
+
+        orgs = [
+            Organisation.objects.create(name=f"SQLite Company {i}")
+            for i in range(2)
+        ]
+        for org in orgs:
+            update_sqlite(
+                model=Organisation, data={"id": org.id, "name": org.name}
+            )
+        # edits change the file in place, not the copy being served
+        self.assertEqual(
+            (os.stat(published).st_ino, os.stat(published).st_mtime_ns),
+            (stat.st_ino, stat.st_mtime_ns),
+        )
+
+        response = self.client.get(self.endpoint)
+        version = get_sqlite_version(self.file_name)["version"]
+        self.assertEqual(int(response["X-Master-Data-Version"]), version)
+        nodes = self.read_sqlite(response)["nodes"]
+        self.assertTrue(set([o.id for o in orgs]) <= set(nodes))
+        self.assertEqual(
+            get_sqlite_version(published)["version"], version
+        )
+
+        # the copy is kept while the versions match, whatever the mtime
+        stat = os.stat(published)
+        os.utime(self.file_name, ns=(0, 0))
+        self.client.get(self.endpoint)
+        self.assertEqual(
+            (os.stat(published).st_ino, os.stat(published).st_mtime_ns),
+            (stat.st_ino, stat.st_mtime_ns),
+        )
+
+    def test_download_file_without_versions(self):
+        file_name = f"{self.master_data}/unversioned.sqlite"
+        conn = sqlite3.connect(file_name)
+        with conn:
+            conn.execute("CREATE TABLE meta (name TEXT, value INTEGER)")
+            conn.execute("INSERT INTO meta VALUES ('changed', 1)")
+        conn.close()
+        self.assertIsNone(get_sqlite_version(file_name))
+        response = self.client.get(
+            "/api/v1/device/sqlite/unversioned.sqlite?since=1"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Master-Data-Version", response)
+
+    def test_download_with_etag_range_and_gzip(self):
+        response = self.client.get(self.endpoint)
+        content = b"".join(response.streaming_content)
+        etag = response["ETag"]
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(int(response["Content-Length"]), len(content))
+
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.endpoint, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response["Content-Range"], f"bytes 10-19/{len(content)}"
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content), content[10:20]
+        )
+        response = self.client.get(self.endpoint, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), content[-5:])
+        response = self.client.get(
+            self.endpoint, HTTP_RANGE=f"bytes={len(content)}-"
+        )
+        self.assertEqual(response.status_code, 416)
+        # the range of another version of the file gets the whole file
+        response = self.client.get(
+            self.endpoint, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(
+            self.endpoint, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), content)
+
+        for accept_encoding in ["gzip;q=0, deflate", "*;q=0", "identity"]:
+            response = self.client.get(
+                self.endpoint, HTTP_ACCEPT_ENCODING=accept_encoding
+            )
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response["ETag"], etag)
+        response = self.client.get(
+            self.endpoint, HTTP_ACCEPT_ENCODING="deflate, *;q=0.5"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        response = self.client.get(
+            self.endpoint, HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)), content
+        )
+
+        # a changed file gets a new ETag
+        delete_sqlite(
+            model=Organisation, id=Organisation.objects.first().id
+        )
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
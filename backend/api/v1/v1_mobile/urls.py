@@ -2,9 +2,13 @@ from django.urls import re_path
 from .views import (
     get_mobile_forms,
     get_mobile_form_details,
+    get_mobile_form_definitions,
     sync_pending_form_data,
+    sync_batch_form_data,
+    get_submission_intake,
     upload_image_form_device,
     download_sqlite_file,
+    download_datapoint_bundle,
     upload_apk_file,
     download_apk_file,
     get_datapoint_download_list,
@@ -26,10 +30,21 @@ urlpatterns = [
         MobileAssignmentViewSet.as_view({"get": "list", "post": "create"}),
     ),
     re_path(r"^(?P<version>(v1))/device/auth", get_mobile_forms),
+    re_path(r"^(?P<version>(v1))/device/forms$", get_mobile_form_definitions),
     re_path(
         r"^(?P<version>(v1))/device/form/(?P<form_id>[0-9]+)",
         get_mobile_form_details,
     ),
+    re_path(
+        r"^(?P<version>(v1))/device/sync/status/(?P<pk>[0-9]+)",
+        get_submission_intake,
+        name="device-sync-status"
+    ),
+    re_path(
+        r"^(?P<version>(v1))/device/sync/batch",
+        sync_batch_form_data,
+        name="device-sync-batch"
+    ),
     re_path(
         r"^(?P<version>(v1))/device/sync",
         sync_pending_form_data,
@@ -42,6 +57,10 @@ urlpatterns = [
     re_path(r"^(?P<version>(v1))/device/images", upload_image_form_device),
     re_path(r"^(?P<version>(v1))/device/apk/upload", upload_apk_file),
     re_path(r"^(?P<version>(v1))/device/apk/download", download_apk_file),
+    re_path(
+        r"^(?P<version>(v1))/device/datapoint-bundle",
+        download_datapoint_bundle,
+    ),
     re_path(
         r"^(?P<version>(v1))/device/datapoint-list",
         get_datapoint_download_list,
@@ -1,7 +1,7 @@
+import hashlib
 import os
+from datetime import datetime
 from typing import cast
-import requests
-import mimetypes
 from rest_framework.request import Request
 
 from rest_framework.viewsets import ModelViewSet
@@ -19,6 +19,7 @@ from mis.settings import (
 from django.http import HttpResponse
 from django.utils import timezone
 from django.db.models import Q
+from django_q.tasks import async_task
 
 from rest_framework import status, serializers
 from rest_framework.response import Response
@@ -39,24 +40,50 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 
+from utils.custom_generator import (
+    generate_sqlite_delta,
+    get_sqlite_version,
+    publish_sqlite,
+)
+from utils.cached_response import cached_response
 from utils.custom_pagination import Pagination
+from utils.tiered_cache import CacheScopes
+from utils.file_helper import fetch_file, file_lock, serve_file
 from .serializers import (
     MobileAssignmentFormsSerializer,
     MobileApkSerializer,
     MobileAssignmentSerializer,
     MobileDataPointDownloadListSerializer,
+    MobileDataPointSyncParamsSerializer,
+    MobileDataPointTombstoneSerializer,
     SyncDeviceFormDataSerializer,
+    SyncDeviceBatchFormDataSerializer,
     SyncDeviceParamsSerializer,
+    SubmissionIntakeSerializer,
     DraftFormDataSerializer,
 )
-from .models import MobileAssignment, MobileApk
-from api.v1.v1_forms.models import Forms, Questions, QuestionTypes
+from .constants import IntakeStatus
+from .models import MobileAssignment, MobileApk, SubmissionIntake
+from .tasks import release_stale_submission_intakes
+from .functions import (
+    encode_sync_cursor,
+    get_assignment_datapoints,
+    get_assignment_form_scope,
+    get_assignment_forms,
+    get_datapoint_sync_page,
+    get_submission_key,
+    get_submission_receipt,
+    queue_submission_intake,
+    release_submission_receipt,
+    reserve_submission_receipt,
+    save_submission_receipt,
+    submit_form_data,
+    submit_form_data_batch,
+    update_datapoint_bundle,
+)
+from api.v1.v1_forms.models import Forms
 from api.v1.v1_data.models import FormData
 from api.v1.v1_forms.serializers import WebFormDetailSerializer
-from api.v1.v1_data.serializers import (
-    SubmitPendingFormSerializer,
-    SubmitUpdateDraftFormSerializer,
-)
 from api.v1.v1_files.serializers import (
     UploadImagesSerializer,
     AttachmentsSerializer,
@@ -73,6 +100,26 @@ from utils import storage
 
 apk_path = os.path.join(BASE_DIR, MASTER_DATA)
 
+# form definitions depend on the forms, the administrations and the roles
+FORM_DEFINITION_CACHE_SCOPES = (
+    CacheScopes.forms,
+    CacheScopes.administrations,
+    CacheScopes.roles,
+)
+# seconds a device waits before retrying a submission being processed
+SUBMISSION_RETRY_AFTER = 5
+
+
+def get_submission_receipt_response(receipt) -> Response:
+    # response of the first attempt of a retried submission
+    if receipt.is_pending:
+        return Response(
+            {"message": "Submission is being processed."},
+            status=status.HTTP_409_CONFLICT,
+            headers={"Retry-After": str(SUBMISSION_RETRY_AFTER)},
+        )
+    return Response(receipt.response, status=receipt.status_code)
+
 
 @extend_schema(
     request=MobileAssignmentFormsSerializer,
@@ -114,14 +161,53 @@ def get_mobile_forms(request, version):
 def get_mobile_form_details(request: Request, version, form_id):
     instance = get_object_or_404(Forms, pk=form_id)
     assignment = cast(MobileAssignmentToken, request.auth).assignment
-    data = WebFormDetailSerializer(
-        instance=instance,
-        context={
-            "user": assignment.user,
-            "mobile_assignment": assignment,
-        },
-    ).data
-    return Response(data, status=status.HTTP_200_OK)
+    scope = get_assignment_form_scope(assignment)
+    return cached_response(
+        request=request,
+        cache_name=f"mobileform-{instance.id}-v{instance.version}-{scope}",
+        scopes=FORM_DEFINITION_CACHE_SCOPES,
+        serialize=lambda: WebFormDetailSerializer(
+            instance=instance,
+            context={
+                "user": assignment.user,
+                "mobile_assignment": assignment,
+            },
+        ).data,
+    )
+
+
+@extend_schema(
+    responses={200: WebFormDetailSerializer(many=True)},
+    tags=["Mobile Device Form"],
+    summary="To get all forms of the assignment in mobile form format",
+    description=(
+        "Definitions of the forms and child forms of the assignment in one "
+        "response. Send the ETag back in If-None-Match to check for form "
+        "updates; 304 means nothing changed."
+    ),
+)
+@api_view(["GET"])
+@permission_classes([IsMobileAssignment])
+def get_mobile_form_definitions(request: Request, version):
+    assignment = cast(MobileAssignmentToken, request.auth).assignment
+    forms = get_assignment_forms(assignment)
+    versions = hashlib.md5(
+        ",".join([f"{f.id}v{f.version}" for f in forms]).encode()
+    ).hexdigest()[:12]
+    scope = get_assignment_form_scope(assignment)
+    return cached_response(
+        request=request,
+        cache_name=f"mobileforms-{versions}-{scope}",
+        scopes=FORM_DEFINITION_CACHE_SCOPES,
+        serialize=lambda: WebFormDetailSerializer(
+            instance=forms,
+            many=True,
+            context={
+                "user": assignment.user,
+                "mobile_assignment": assignment,
+            },
+        ).data,
+    )
 
 
 @extend_schema(
@@ -149,6 +235,17 @@ def get_mobile_form_details(request: Request, version, form_id):
             type=OpenApiTypes.NUMBER,
             location=OpenApiParameter.QUERY,
         ),
+        OpenApiParameter(
+            name="is_async",
+            required=False,
+            default=False,
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Store the submission and process it in the background; "
+                "responds 202 with the id to poll in /device/sync/status"
+            ),
+        ),
     ],
     summary="Submit pending form data",
 )
@@ -167,133 +264,221 @@ def sync_pending_form_data(request, version):
         )
     form = get_object_or_404(Forms, pk=request.data.get("formId"))
     assignment = cast(MobileAssignmentToken, request.auth).assignment
-    user = assignment.user
-    administration = assignment.administrations.order_by(
-        "level__level"
-    ).first()
-    if user.user_user_role.exists():
-        user_role = user.user_user_role.filter(
-            role__role_role_access__data_access=DataAccessTypes.submit
-        ).first()
-        if user_role:
-            # If user has a role with data access, use that administration
-            administration = user_role.administration
-
-    if not request.data.get("answers"):
+    submission_key = get_submission_key(
+        idempotency_key=request.headers.get("Idempotency-Key"),
+    )
+    draft = params.validated_data.get("id")
+    if params.validated_data.get("is_async"):
+        # a retried submission gets the response of the first attempt,
+        # the intake reserves the receipt when it is processed
+        receipt = submission_key and get_submission_receipt(
+            assignment, submission_key
+        )
+        if receipt:
+            return get_submission_receipt_response(receipt)
+        submission = SyncDeviceFormDataSerializer(data=request.data)
+        if not submission.is_valid():
+            return Response(
+                {
+                    "message": validate_serializers_message(
+                        submission.errors
+                    ),
+                    "details": submission.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        intake = queue_submission_intake(
+            assignment=assignment,
+            key=submission_key,
+            submission=request.data,
+            params={
+                "is_draft": params.validated_data["is_draft"],
+                "is_published": params.validated_data["is_published"],
+                "id": draft.id if draft else None,
+            },
+        )
+        async_task("api.v1.v1_mobile.tasks.process_submission_intakes")
         return Response(
-            {"message": "Answers is required."},
-            status=status.HTTP_400_BAD_REQUEST,
+            SubmissionIntakeSerializer(instance=intake).data,
+            status=status.HTTP_202_ACCEPTED,
         )
-    answers = []
-    qna = request.data.get("answers")
-    adm_id = administration.id
-    adm_qs = Questions.objects.filter(
-        type=QuestionTypes.administration, form_id=form.id
-    ).first()
-    adm_key = str(adm_qs.id) if adm_qs else None
-    if adm_key and adm_key in qna:
-        adm_id = qna[adm_key]
-    # Handle repeat question values with indexes
-    for q_key in list(qna):
-        """
-        Extract the base question ID from the key
-        Keys can be like "1" or "1-1" or "1-2"
-        where the base question ID is "1"
-        """
-        index = 0
-        if '-' in str(q_key):
-            [base_q_id, q_index] = str(q_key).split('-')
-            index = q_index
-        else:
-            base_q_id = str(q_key)
-        answers.append({
-            "question": base_q_id,
-            "value": qna[q_key],
-            "index": index,
-        })
-    payload = {
-        "administration": adm_id,
-        "name": request.data.get("name"),
-        "geo": request.data.get("geo"),
-        "submitter": assignment.name,
-        "duration": request.data.get("duration"),
-    }
-    if request.data.get("uuid"):
-        payload["uuid"] = request.data["uuid"]
-    data = {
-        "data": payload,
-        "answer": answers,
-    }
-    is_draft = request.GET.get("is_draft", False)
-    is_draft = True if is_draft in ["true", "True", "1"] else False
-    serializer = SubmitPendingFormSerializer(
-        data=data,
-        context={
-            "user": user,
-            "form": form,
-            "is_draft": is_draft,
-        }
+    if submission_key:
+        receipt, reserved = reserve_submission_receipt(
+            assignment, submission_key
+        )
+        if not reserved:
+            return get_submission_receipt_response(receipt)
+    try:
+        response, status_code, _ = submit_form_data(
+            assignment=assignment,
+            form=form,
+            submission=request.data,
+            key=submission_key,
+            is_draft=params.validated_data["is_draft"],
+            is_published=params.validated_data["is_published"],
+            draft=draft,
+        )
+    finally:
+        if submission_key:
+            release_submission_receipt(assignment, submission_key)
+    return Response(response, status=status_code)
+
+
+@extend_schema(
+    responses={200: SubmissionIntakeSerializer},
+    tags=["Mobile Device Form"],
+    summary="Status of a submission sent in async mode",
+)
+@api_view(["GET"])
+@permission_classes([IsMobileAssignment])
+def get_submission_intake(request, version, pk):
+    assignment = cast(MobileAssignmentToken, request.auth).assignment
+    intake = get_object_or_404(
+        SubmissionIntake, pk=pk, assignment=assignment
     )
-    draft_exists = FormData.objects_draft.filter(
-        form=form,
-        created_by=user,
-        uuid=request.data.get("uuid"),
-        form__parent__isnull=True,
-    ).first()
-    if params.validated_data.get("id"):
-        draft_exists = params.validated_data.get("id")
-    if draft_exists:
-        serializer = SubmitUpdateDraftFormSerializer(
-            instance=draft_exists,
-            data=data,
-            context={
-                "user": user,
-                "form": form,
-                "is_draft": is_draft,
-            }
+    # the worker processing it stopped: queue it again
+    if intake.status == IntakeStatus.on_progress and (
+        release_stale_submission_intakes(
+            intakes=SubmissionIntake.objects.filter(pk=intake.pk)
         )
+    ):
+        async_task("api.v1.v1_mobile.tasks.process_submission_intakes")
+        intake.refresh_from_db()
+    return Response(
+        SubmissionIntakeSerializer(instance=intake).data,
+        status=status.HTTP_200_OK,
+    )
+
+
+@extend_schema(
+    request=SyncDeviceBatchFormDataSerializer,
+    responses={
+        (200, "application/json"): inline_serializer(
+            "MobileDeviceSyncBatchResponse",
+            fields={
+                "results": serializers.ListField(
+                    child=inline_serializer(
+                        "MobileDeviceSyncBatchResult",
+                        fields={
+                            "uuid": serializers.CharField(),
+                            "formId": serializers.IntegerField(),
+                            "status": serializers.CharField(),
+                            "id": serializers.IntegerField(),
+                            "message": serializers.CharField(),
+                        },
+                    )
+                ),
+            },
+        )
+    },
+    tags=["Mobile Device Form"],
+    summary="Submit a batch of pending form data",
+)
+@api_view(["POST"])
+@permission_classes([IsMobileAssignment])
+def sync_batch_form_data(request, version):
+    serializer = SyncDeviceBatchFormDataSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(
-            {
-                "message": validate_serializers_message(serializer.errors),
-                "details": serializer.errors,
-            },
+            {"message": validate_serializers_message(serializer.errors)},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    serializer.save()
-    is_published = request.GET.get("is_published", False)
-    is_published = True if is_published in ["true", "True", "1"] else False
-    if is_published and draft_exists:
-        draft_exists.publish()
-        direct_to_data = user.is_superuser or not draft_exists.has_approval
-        if direct_to_data and not draft_exists.parent:
-            draft_exists.save_to_file
-
-    return Response({"message": "ok"}, status=status.HTTP_200_OK)
+    assignment = cast(MobileAssignmentToken, request.auth).assignment
+    submission_key = get_submission_key(
+        idempotency_key=request.headers.get("Idempotency-Key"),
+    )
+    if submission_key:
+        receipt, reserved = reserve_submission_receipt(
+            assignment, submission_key
+        )
+        if not reserved:
+            return get_submission_receipt_response(receipt)
+    try:
+        results, complete = submit_form_data_batch(
+            assignment=assignment,
+            submissions=serializer.validated_data["submissions"],
+        )
+        # a batch with unexpected failures is processed again on retry
+        if complete:
+            save_submission_receipt(
+                assignment=assignment,
+                key=submission_key,
+                response={"results": results},
+            )
+    finally:
+        if submission_key:
+            release_submission_receipt(assignment, submission_key)
+    return Response({"results": results}, status=status.HTTP_200_OK)
 
 
-@extend_schema(tags=["Mobile Device Form"], summary="Get SQLITE File")
+@extend_schema(
+    tags=["Mobile Device Form"],
+    summary="Get SQLITE File",
+    description=(
+        "With `since` set to the version a device already has, only the "
+        "rows changed and the ids deleted after it are returned. The "
+        "whole file is returned when it was rebuilt after that version."
+    ),
+    parameters=[
+        OpenApiParameter(
+            name="since",
+            required=False,
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
+)
 @api_view(["GET"])
 def download_sqlite_file(request, version, file_name):
     file_path = os.path.join(BASE_DIR, MASTER_DATA, f"{file_name}")
 
-    # Make sure the file exists and is accessible
-    if not os.path.exists(file_path):
+    # Make sure the file exists and is accessible, only from MASTER_DATA
+    if (
+        "/" in file_name
+        or "\\" in file_name
+        or file_name.startswith(".")
+        or not os.path.isfile(file_path)
+    ):
         return HttpResponse(
             {"message": "File not found."}, status=status.HTTP_404_NOT_FOUND
         )
 
-    # Get the file's content type
-    content_type, _ = mimetypes.guess_type(file_path)
-
-    # Read the file content into a variable
-    with open(file_path, "rb") as file:
-        file_content = file.read()
-
-    # Create the response and set the appropriate headers
-    response = HttpResponse(file_content, content_type=content_type)
-    response["Content-Length"] = os.path.getsize(file_path)
-    response["Content-Disposition"] = "attachment; filename=%s" % file_name
+    # the version and the file sent are read from the same published
+    # copy, which is only replaced under the lock
+    with file_lock(file_path):
+        if not os.path.isfile(file_path):
+            return HttpResponse(
+                {"message": "File not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        published = publish_sqlite(file_path)
+        file_version = get_sqlite_version(published)
+        since = request.GET.get("since")
+        delta_path = None
+        if file_version and since:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response(
+                    {"message": "since must be a version number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if since >= file_version["version"]:
+                return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            if since >= file_version["base_version"]:
+                delta_path = generate_sqlite_delta(published, since=since)
+
+        if delta_path:
+            response = serve_file(request, delta_path, file_name=file_name)
+            # the open file is still streamed once it is unlinked
+            os.remove(delta_path)
+            response["Cache-Control"] = "no-cache"
+        else:
+            response = serve_file(
+                request, published, file_name=file_name, precompressed=True
+            )
+    if file_version:
+        response["X-Master-Data-Version"] = file_version["version"]
     return response
 
 
@@ -409,39 +594,17 @@ def download_apk_file(request, version):
         )
     file_name = f"{APK_SHORT_NAME}-{apk.apk_version}.apk"
     cache_file_name = os.path.join(apk_path, file_name)
-    if os.path.exists(cache_file_name):
-        # Get the file's content type
-        content_type, _ = mimetypes.guess_type(cache_file_name)
-        # Read the file content into a variable
-        with open(cache_file_name, "rb") as file:
-            file_content = file.read()
-        # Create the response and set the appropriate headers
-        response = HttpResponse(file_content, content_type=content_type)
-        response["Content-Length"] = os.path.getsize(cache_file_name)
-        response["Content-Disposition"] = (
-            "attachment; filename=%s" % f"{file_name}"
-        )
-        return response
-    download = requests.get(apk.apk_url)
-    if download.status_code != 200:
-        return HttpResponse(
-            {"message": "File not found."}, status=status.HTTP_404_NOT_FOUND
-        )
-    file_cache = open(cache_file_name, "wb")
-    file_cache.write(download.content)
-    file_cache.close()
-    # Get the file's content type
-    content_type, _ = mimetypes.guess_type(cache_file_name)
-    # Read the file content into a variable
-    with open(cache_file_name, "rb") as file:
-        file_content = file.read()
-    # Read the file content into a variable
-    response = HttpResponse(file_content, content_type=content_type)
-    response["Content-Length"] = os.path.getsize(cache_file_name)
-    response["Content-Disposition"] = (
-        "attachment; filename=%s" % f"{file_name}"
-    )
-    return response
+    if not os.path.exists(cache_file_name):
+        # concurrent requests wait for the first one to fetch the APK
+        with file_lock(cache_file_name):
+            if not os.path.exists(cache_file_name) and not fetch_file(
+                apk.apk_url, cache_file_name
+            ):
+                return HttpResponse(
+                    {"message": "File not found."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+    return serve_file(request, cache_file_name, file_name=file_name)
 
 
 @extend_schema(tags=["Mobile APK"], summary="Check APK Version")
@@ -480,18 +643,14 @@ def upload_apk_file(request, version):
             {"message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
         )
     apk_version = serializer.validated_data.get("apk_version")
-    download = requests.get(
-        request.data.get("apk_url"), allow_redirects=True, stream=True
-    )
-    if download.status_code != 200:
-        return HttpResponse(
-            {"message": "File not found."}, status=status.HTTP_404_NOT_FOUND
-        )
     filename = f"{APK_SHORT_NAME}-{apk_version}.apk"
     cache_file_name = os.path.join(apk_path, filename)
-    file_cache = open(cache_file_name, "wb")
-    file_cache.write(download.content)
-    file_cache.close()
+    with file_lock(cache_file_name):
+        if not fetch_file(request.data.get("apk_url"), cache_file_name):
+            return HttpResponse(
+                {"message": "File not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
     storage.upload(
         cache_file_name, folder="apk",
         filename=f"{APK_SHORT_NAME}.apk"
@@ -511,25 +670,23 @@ class MobileAssignmentViewSet(ModelViewSet):
         mobile_users = MobileAssignment.objects.prefetch_related(
             "administrations", "forms"
         ).filter(user=user)
-        adm_q = Q()
+        adms = []
         if user.is_superuser:
-            adm = Administration.objects.filter(
-                parent__isnull=True
-            ).first()
-            adm_q = Q(
-                administrations__path__startswith=f"{adm.id}."
+            adms.append(
+                Administration.objects.filter(parent__isnull=True).first()
             )
         for ur in user.user_user_role.filter(
             role__role_role_access__data_access=DataAccessTypes.submit
         ).all():
-            adm = ur.administration
-            path = f"{adm.path}{adm.id}." \
-                if adm.path else f"{adm.id}."
-            adm_q |= Q(administrations__path__startswith=path)
-        if adm_q:
+            adms.append(ur.administration)
+        if adms:
             descendant_users = MobileAssignment.objects.prefetch_related(
                 "administrations", "forms"
-            ).filter(adm_q)
+            ).filter(
+                administrations__in=Administration.objects.descendants_of(
+                    *adms
+                )
+            )
             mobile_users |= descendant_users
         return mobile_users.order_by("-id").distinct()
 
@@ -543,9 +700,31 @@ class MobileAssignmentViewSet(ModelViewSet):
                 "data": MobileDataPointDownloadListSerializer(many=True),
                 "page": serializers.IntegerField(),
                 "current": serializers.IntegerField(),
+                "deleted": MobileDataPointTombstoneSerializer(many=True),
+                "cursor": serializers.CharField(),
+                "has_more": serializers.BooleanField(),
             },
         )
     },
+    parameters=[
+        OpenApiParameter(
+            name="cursor",
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Cursor of the previous response; an empty cursor starts "
+                "a full sync. Without this parameter the list is paginated "
+                "by page."
+            ),
+        ),
+        OpenApiParameter(
+            name="page_size",
+            required=False,
+            type=OpenApiTypes.NUMBER,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
     tags=["Mobile Device Form"],
     summary="GET Download List for Syncing Datapoints",
 )
@@ -553,41 +732,40 @@ class MobileAssignmentViewSet(ModelViewSet):
 @permission_classes([IsMobileAssignment])
 def get_datapoint_download_list(request, version):
     assignment = cast(MobileAssignmentToken, request.auth).assignment
-    forms = assignment.forms.values("id")
-    administrations = [
-        {
-            "id": a.id,
-            "path": f"{a.path}{a.id}." if a.path else f"{a.id}."
-        }
-        for a in assignment.administrations.all()
-    ]
-    paginator = Pagination()
-
-    # Start with base query for administration IDs
-    admin_id_query = Q(
-        administration_id__in=[a["id"] for a in administrations],
-        form_id__in=forms,
-    )
-    # Build path query by combining conditions for all administration paths
-    path_query = Q()
-    for admin in administrations:
-        path_query |= Q(
-            administration__path__startswith=admin["path"]
+    if "cursor" in request.GET:
+        params = MobileDataPointSyncParamsSerializer(data=request.GET)
+        if not params.is_valid():
+            return Response(
+                {"message": validate_serializers_message(params.errors)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        page = get_datapoint_sync_page(
+            assignment=assignment,
+            cursor=params.validated_data.get("cursor"),
+            page_size=params.validated_data.get("page_size"),
+        )
+        return Response(
+            {
+                "data": MobileDataPointDownloadListSerializer(
+                    page["data"], many=True
+                ).data,
+                "deleted": MobileDataPointTombstoneSerializer(
+                    page["deleted"], many=True
+                ).data,
+                "cursor": page["cursor"],
+                "has_more": page["has_more"],
+            },
+            status=status.HTTP_200_OK,
         )
-    # Combine both queries with the form filter
-    queryset = FormData.objects.filter(
-        admin_id_query | (path_query & Q(form_id__in=forms))
+    paginator = Pagination()
+    queryset = get_assignment_datapoints(assignment).filter(
+        deleted_at__isnull=True
     )
     if assignment.last_synced_at:
         queryset = queryset.filter(
             Q(created__gte=assignment.last_synced_at)
             | Q(updated__gte=assignment.last_synced_at)
         )
-
-    queryset = queryset.filter(
-        is_pending=False,
-        is_draft=False,
-    )
     queryset = queryset.values(
         "uuid",
         "id",
@@ -610,6 +788,34 @@ def get_datapoint_download_list(request, version):
     return response
 
 
+@extend_schema(
+    responses={(200, "application/gzip"): OpenApiTypes.BINARY},
+    tags=["Mobile Device Form"],
+    summary="Download all datapoints in one bundle",
+    description=(
+        "Gzipped NDJSON of the registration datapoints of the assignment, "
+        "one datapoint per line. A later line of the same uuid replaces "
+        "an earlier one, and lines with `deleted` remove the datapoint. "
+        "The X-Sync-Cursor header is the cursor to continue with "
+        "`datapoint-list?cursor=`."
+    ),
+)
+@api_view(["GET"])
+@permission_classes([IsMobileAssignment])
+def download_datapoint_bundle(request, version):
+    assignment = cast(MobileAssignmentToken, request.auth).assignment
+    bundle = update_datapoint_bundle(assignment=assignment)
+    response = serve_file(
+        request, bundle["file"], file_name="datapoints.ndjson.gz"
+    )
+    if bundle["changed"]:
+        response["X-Sync-Cursor"] = encode_sync_cursor(
+            changed=datetime.fromisoformat(bundle["changed"]),
+            id=bundle["id"],
+        )
+    return response
+
+
 @extend_schema(tags=["Mobile Draft Form Data"])
 class DraftFormDataViewSet(ModelViewSet):
     serializer_class = DraftFormDataSerializer
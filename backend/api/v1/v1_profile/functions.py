@@ -1,6 +1,136 @@
-from api.v1.v1_profile.models import Levels
+from functools import cached_property
+
+from api.v1.v1_profile.models import Administration, Levels, UserRole
 
 
 def get_max_administration_level():
     max_level = Levels.objects.order_by("-level").first()
     return max_level.level if max_level else 0
+
+
+class UserAccessRole:
+    def __init__(self, id, role_id, administration_id, path, level):
+        self.id = id
+        self.role_id = role_id
+        self.administration_id = administration_id
+        self.path = path
+        self.level = level
+        self.data_access = set()
+        self.feature_access = set()
+
+    @property
+    def administration_path(self):
+        # path used to match the administration and its descendants
+        if self.path:
+            return f"{self.path}{self.administration_id}."
+        return f"{self.administration_id}."
+
+    @property
+    def administration(self):
+        # unsaved, enough for Administration.objects.descendants_of
+        return Administration(id=self.administration_id, path=self.path)
+
+
+class UserAccessProfile:
+    """
+    Roles, data accesses, feature accesses and forms of a user, loaded
+    once and shared by the permission classes and views of a request.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.is_superuser = bool(user.is_superuser)
+        self.roles = []
+        if user.is_anonymous:
+            return
+        roles = {}
+        for row in UserRole.objects.filter(user=user).values_list(
+            "id",
+            "role_id",
+            "administration_id",
+            "administration__path",
+            "administration__level__level",
+            "role__role_role_access__data_access",
+            "role__role_role_feature_access__type",
+            "role__role_role_feature_access__access",
+        ).order_by("id"):
+            (
+                id, role_id, adm_id, path, level,
+                data_access, feature_type, feature_access,
+            ) = row
+            if id not in roles:
+                roles[id] = UserAccessRole(
+                    id=id,
+                    role_id=role_id,
+                    administration_id=adm_id,
+                    path=path,
+                    level=level,
+                )
+            if data_access is not None:
+                roles[id].data_access.add(data_access)
+            if feature_type is not None:
+                roles[id].feature_access.add((feature_type, feature_access))
+        self.roles = list(roles.values())
+
+    @cached_property
+    def data_access(self) -> set:
+        return set().union(*[r.data_access for r in self.roles])
+
+    @cached_property
+    def feature_access(self) -> set:
+        return set().union(*[r.feature_access for r in self.roles])
+
+    @cached_property
+    def form_ids(self) -> set:
+        """
+        Forms assigned to the user, including their monitoring forms
+        """
+        if self.user.is_anonymous:
+            return set()
+        form_ids = set()
+        for form_id, child_id in self.user.user_form.values_list(
+            "form_id", "form__children__id"
+        ):
+            form_ids.add(form_id)
+            if child_id:
+                form_ids.add(child_id)
+        return form_ids
+
+    def has_data_access(self, *data_access) -> bool:
+        return bool(self.data_access.intersection(data_access))
+
+    def has_feature_access(self, feature_type, access) -> bool:
+        return (feature_type, access) in self.feature_access
+
+    def has_form(self, form_id) -> bool:
+        if form_id is None:
+            return False
+        return int(form_id) in self.form_ids
+
+    def roles_with(self, *data_access) -> list:
+        return [
+            r for r in self.roles if r.data_access.intersection(data_access)
+        ]
+
+    @property
+    def first_role(self):
+        return self.roles[0] if self.roles else None
+
+    @property
+    def top_role(self):
+        # role assigned to the highest administration level
+        return min(
+            self.roles, key=lambda r: r.level, default=None
+        )
+
+
+def get_user_access(user) -> UserAccessProfile:
+    """
+    The access profile is cached on the user instance, which is loaded
+    by the authentication backend once per request.
+    """
+    profile = getattr(user, "_access_profile", None)
+    if profile is None:
+        profile = UserAccessProfile(user)
+        user._access_profile = profile
+    return profile
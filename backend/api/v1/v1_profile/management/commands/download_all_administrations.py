@@ -1,10 +1,41 @@
+import csv
 import os
 from django.core.management import BaseCommand
 
-import pandas as pd
 from api.v1.v1_profile.models import Administration, Levels
 from api.v1.v1_profile.constants import ADMINISTRATION_CSV_FILE
+from utils.custom_generator import get_administration_csv_file
 from utils.storage import upload
+from utils.tiered_cache import CacheScopes, get_scope_version
+
+
+def get_csv_version(file_path: str):
+    # administration tree version the CSV was written from
+    if not os.path.exists(file_path) or not os.path.exists(
+        f"{file_path}.version"
+    ):
+        return None
+    with open(f"{file_path}.version") as f:
+        return f.read().strip()
+
+
+def iter_administration_rows(levels: list):
+    """
+    Columns of every administration below the second level, carrying the
+    columns of the ancestors down while walking the tree level by level.
+    """
+    level_names = {level.id: level.name.lower() for level in levels}
+    columns = {}
+    for id, parent_id, level_id, name in Administration.objects.order_by(
+        "level__level", "id"
+    ).values_list("id", "parent_id", "level_id", "name"):
+        if level_id not in level_names:
+            continue
+        row = dict(columns.get(parent_id, {}))
+        row[level_names[level_id]] = name
+        row[f"{level_names[level_id]}_id"] = id
+        columns[id] = row
+        yield row
 
 
 class Command(BaseCommand):
@@ -12,41 +43,36 @@ class Command(BaseCommand):
         parser.add_argument(
             "-t", "--test", nargs="?", const=1, default=False, type=int
         )
+        parser.add_argument(
+            "-f", "--force", nargs="?", const=1, default=False, type=int
+        )
 
     def handle(self, *args, **options):
         test = options.get("test")
         filename = ADMINISTRATION_CSV_FILE
         if test:
             filename = "test-administration.csv"
+        version = str(get_scope_version(CacheScopes.administrations))
+        stored_file = get_administration_csv_file(test=bool(test))
+        if not options.get("force") and (
+            get_csv_version(stored_file) == version
+        ):
+            if not test:
+                self.stdout.write(f"File Unchanged: {stored_file}")
+            return
         file_path = "./tmp/{0}".format(filename)
         if os.path.exists(file_path):
             os.remove(file_path)
-        administrations = Administration.objects.filter(level__id__gt=1).all()
-        data = []
-        for adm in administrations:
-            columns = {}
-            if adm.path:
-                parent_ids = list(
-                    filter(lambda path: path, adm.path.split("."))
-                )
-                parents = Administration.objects.filter(
-                    pk__in=parent_ids, level__id__gt=1
-                ).all()
-                for p in parents:
-                    columns[p.level.name.lower()] = p.name
-                    columns[f"{p.level.name.lower()}_id"] = p.id
-            columns[adm.level.name.lower()] = adm.name
-            columns[f"{adm.level.name.lower()}_id"] = adm.id
-            data.append(columns)
-        df = pd.DataFrame(data)
-        levels = Levels.objects.filter(id__gt=1).all()
+        levels = list(Levels.objects.filter(id__gt=1).order_by("level"))
+        header = []
         for level in levels:
-            col_name = f"{level.name.lower()}_id"
-            df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
-            df[col_name] = (
-                df[col_name].where(df[col_name].notna(), None).astype("Int64")
-            )
-        df.to_csv(file_path, index=False)
+            header += [level.name.lower(), f"{level.name.lower()}_id"]
+        with open(file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=header)
+            writer.writeheader()
+            writer.writerows(iter_administration_rows(levels))
         url = upload(file=file_path, folder="master_data")
+        with open(f"{url}.version", "w") as f:
+            f.write(version)
         if not test:
             self.stdout.write(f"File Created: {url}")
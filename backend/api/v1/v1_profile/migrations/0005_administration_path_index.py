@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_profile', '0004_rolefeatureaccess'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='administration',
+            name='path',
+            field=models.TextField(db_index=True, default=None, null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.postgres.fields import ArrayField
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from api.v1.v1_profile.constants import (
     DataAccessTypes,
@@ -8,6 +9,8 @@ from api.v1.v1_profile.constants import (
     FeatureTypes,
 )
 from api.v1.v1_users.models import SystemUser
+from utils.administration_tree import AdministrationTreeCache
+from utils.tiered_cache import CacheScopes, invalidate_cache
 
 
 class Levels(models.Model):
@@ -21,6 +24,25 @@ class Levels(models.Model):
         db_table = "levels"
 
 
+class AdministrationQuerySet(models.QuerySet):
+    def descendants_of(self, *administrations, include_self=False):
+        """
+        Administrations below the given ones. The match is a prefix of the
+        indexed path, so the queryset can be used as a subquery, e.g.
+        FormData.objects.filter(
+            administration__in=Administration.objects.descendants_of(adm)
+        )
+        """
+        query = Q()
+        for adm in administrations:
+            query |= Q(path__startswith=adm.descendant_path)
+            if include_self:
+                query |= Q(pk=adm.pk)
+        if not query:
+            return self.none()
+        return self.filter(query)
+
+
 class Administration(models.Model):
     parent = models.ForeignKey(
         "self",
@@ -35,11 +57,18 @@ class Administration(models.Model):
         to=Levels, on_delete=models.CASCADE, related_name="administrator_level"
     )
     name = models.TextField()
-    path = models.TextField(null=True, default=None)
+    path = models.TextField(null=True, default=None, db_index=True)
+
+    objects = AdministrationQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    @property
+    def descendant_path(self):
+        # path prefix shared by every administration below this one
+        return f"{self.path or ''}{self.id}."
+
     @property
     def ancestors(self):
         if self.path:
@@ -50,24 +79,32 @@ class Administration(models.Model):
             return administrations
         return None
 
+    @property
+    def ancestor_names(self) -> list:
+        tree = administration_tree.get()
+        if self.id in tree and tree.get_path(self.id) == self.path:
+            return tree.get_ancestor_names(self.id)
+        # not saved yet or changed after the tree was loaded
+        return [a.name for a in self.ancestors]
+
     @property
     def full_name(self):
         if self.path:
-            names = " - ".join([a.name for a in self.ancestors])
+            names = " - ".join(self.ancestor_names)
             return "{} - {}".format(names, self.name)
         return self.name
 
     @property
     def full_path_name(self):
         if self.path:
-            names = "|".join([a.name for a in self.ancestors])
+            names = "|".join(self.ancestor_names)
             return "{}|{}".format(names, self.name)
         return self.name
 
     @property
     def administration_column(self):
         if self.path:
-            names = "|".join([a.name for a in self.ancestors])
+            names = "|".join(self.ancestor_names)
             return "{}|{}".format(names, self.name)
         return self.name
 
@@ -75,6 +112,19 @@ class Administration(models.Model):
         db_table = "administrator"
 
 
+administration_tree = AdministrationTreeCache(
+    lambda: Administration.objects.order_by("name", "id").values_list(
+        "id",
+        "parent_id",
+        "level_id",
+        "level__level",
+        "level__name",
+        "name",
+        "path",
+    )
+)
+
+
 @receiver(pre_save, sender=Administration)
 def set_administration_path(sender, instance: Administration, **_):
     if not instance.parent:
@@ -246,3 +296,29 @@ class UserRole(models.Model):
     class Meta:
         unique_together = ("user", "role", "administration")
         db_table = "user_role"
+
+
+@receiver(post_save, sender=Administration)
+@receiver(post_delete, sender=Administration)
+@receiver(post_save, sender=Levels)
+@receiver(post_delete, sender=Levels)
+def invalidate_administration_cache(sender, **_):
+    invalidate_cache(CacheScopes.administrations)
+
+
+@receiver(post_save, sender=EntityData)
+@receiver(post_delete, sender=EntityData)
+def invalidate_cascade_cache(sender, **_):
+    invalidate_cache(CacheScopes.cascades)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=RoleAccess)
+@receiver(post_delete, sender=RoleAccess)
+@receiver(post_save, sender=RoleFeatureAccess)
+@receiver(post_delete, sender=RoleFeatureAccess)
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_role_cache(sender, **_):
+    invalidate_cache(CacheScopes.roles)
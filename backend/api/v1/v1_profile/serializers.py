@@ -24,6 +24,7 @@ from api.v1.v1_profile.models import (
     RoleAccess,
     RoleFeatureAccess,
 )
+from utils.tiered_cache import CacheScopes, invalidate_cache
 from api.v1.v1_profile.constants import (
     DataAccessTypes,
     FeatureAccessTypes,
@@ -246,6 +247,8 @@ class AdministrationSerializer(serializers.ModelSerializer):
                     )
                 )
             )
+            # the descendants were moved without post_save
+            invalidate_cache(CacheScopes.administrations)
         for it in attributes:
             attribute = it.pop("attribute")
             data = dict(attribute=attribute)
@@ -0,0 +1,140 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+
+from api.v1.v1_profile.models import Administration, Levels
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class AdministrationCascadeTestCase(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        self.national = Administration.objects.get(parent__isnull=True)
+
+    def count_queries(self, ctx) -> int:
+        return len([
+            q for q in ctx.captured_queries
+            if "cache_table" not in q["sql"]
+        ])
+
+    def get_administration(self, adm_id, params=""):
+        return self.client.get(f"/api/v1/administration/{adm_id}{params}")
+
+    def test_cached_administration(self):
+        response = self.get_administration(self.national.pk)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        children = Administration.objects.filter(
+            parent=self.national
+        ).order_by("name")
+        self.assertEqual(
+            [c["id"] for c in data["children"]], [c.id for c in children]
+        )
+        self.assertEqual(
+            data["children"][0],
+            {
+                "id": children[0].id,
+                "parent": self.national.id,
+                "path": children[0].path,
+                "level": children[0].level_id,
+                "name": children[0].name,
+                "full_name": children[0].full_path_name,
+            },
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get_administration(self.national.pk)
+        self.assertEqual(response.json(), data)
+        self.assertEqual(self.count_queries(ctx), 0)
+        response = self.client.get(
+            f"/api/v1/administration/{self.national.pk}",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # a renamed child is served right away
+        child = children[0]
+        child.name = "Renamed"
+        child.save()
+        response = self.get_administration(self.national.pk)
+        self.assertIn(
+            "Renamed", [c["name"] for c in response.json()["children"]]
+        )
+
+    def test_depth(self):
+        response = self.get_administration(self.national.pk, "?depth=2")
+        self.assertEqual(response.status_code, 200)
+        children = response.json()["children"]
+        for child in children:
+            expected = self.get_administration(child["id"]).json()
+            self.assertEqual(
+                child["children"],
+                expected["children"],
+            )
+            for grandchild in child["children"]:
+                self.assertNotIn("children", grandchild)
+
+        # max_level stops the levels below it
+        response = self.get_administration(
+            self.national.pk, "?depth=3&max_level=1"
+        )
+        children = response.json()["children"]
+        self.assertTrue(len(children))
+        self.assertEqual(
+            [c["children"] for c in children], [[] for _ in children]
+        )
+
+        # filter_children only applies to the first level
+        child = children[0]
+        response = self.get_administration(
+            self.national.pk, f"?depth=2&filter_children={child['id']}"
+        )
+        children = response.json()["children"]
+        self.assertEqual([c["id"] for c in children], [child["id"]])
+        self.assertTrue(len(children[0]["children"]))
+
+    def test_depth_is_capped_at_the_levels(self):
+        depth = Levels.objects.count()
+        response = self.get_administration(self.national.pk, "?depth=1000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            self.get_administration(
+                self.national.pk, f"?depth={depth}"
+            ).json(),
+        )
+        self.assertEqual(
+            response["ETag"],
+            self.get_administration(
+                self.national.pk, f"?depth={depth + 1}"
+            )["ETag"],
+        )
+
+    def test_children_level_name(self):
+        child = Administration.objects.filter(
+            parent=self.national
+        ).first()
+        response = self.get_administration(self.national.pk)
+        self.assertEqual(
+            response.json()["children_level_name"], child.level.name
+        )
+        # read from the administration tree
+        child.level.name = "Renamed level"
+        child.level.save()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get_administration(self.national.pk)
+        self.assertEqual(
+            response.json()["children_level_name"], "Renamed level"
+        )
+        self.assertFalse([
+            q for q in ctx.captured_queries
+            if 'FROM "levels"' in q["sql"]
+        ])
+
+    def test_invalid_params(self):
+        for params in ["?depth=0", "?depth=a", "?max_level=x"]:
+            response = self.get_administration(self.national.pk, params)
+            self.assertEqual(response.status_code, 400)
+        response = self.get_administration(0)
+        self.assertEqual(response.status_code, 404)
@@ -1,14 +1,18 @@
+import os
 import pandas as pd
 
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.core.management import call_command
-from mis.settings import STORAGE_PATH
+from mis.settings import MASTER_DATA, STORAGE_PATH
 from api.v1.v1_profile.models import Administration, Levels
 from utils.custom_generator import (
     administration_csv_add,
+    administration_csv_add_many,
     administration_csv_update,
-    administration_csv_delete
+    administration_csv_delete,
+    get_administration_csv,
+    get_administration_csv_store_file,
 )
 
 
@@ -34,7 +38,7 @@ class AdministrationCSVTestCase(TestCase):
             filepath,
             f"{STORAGE_PATH}/master_data/test-administration.csv"
         )
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(get_administration_csv())
         last_record = df.iloc[-1]
         self.assertEqual(last_record["village"], "New village")
         self.assertEqual(last_record["village_id"], 111)
@@ -52,7 +56,7 @@ class AdministrationCSVTestCase(TestCase):
             filepath,
             f"{STORAGE_PATH}/master_data/test-administration.csv"
         )
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(get_administration_csv())
         contains_value = (df == "Village name changed").any().any()
         self.assertTrue(contains_value)
 
@@ -70,6 +74,51 @@ class AdministrationCSVTestCase(TestCase):
             filepath,
             f"{STORAGE_PATH}/master_data/test-administration.csv"
         )
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(get_administration_csv())
         contains_value = (df == adm_name).any().any()
         self.assertFalse(contains_value)
+
+    def test_csv_is_written_on_read(self):
+        filepath = get_administration_csv()
+        rows = len(pd.read_csv(filepath))
+        last = Levels.objects.order_by('-id').first()
+        parent = Administration.objects.filter(level__id=last.id - 1).first()
+        administrations = [
+            Administration.objects.create(
+                name=f"Village {i}", level=last, parent=parent
+            )
+            for i in range(3)
+        ]
+        administration_csv_add_many(administrations=administrations)
+        administration_csv_delete(id=administrations[0].id)
+        # the edits are kept in the store until the CSV is read
+        self.assertEqual(len(pd.read_csv(filepath)), rows)
+
+        df = pd.read_csv(get_administration_csv())
+        self.assertEqual(len(df), rows + 2)
+        self.assertEqual(
+            list(df["village"].iloc[-2:]), ["Village 1", "Village 2"]
+        )
+        self.assertEqual(
+            list(df["village_id"].iloc[-2:]),
+            [administrations[1].id, administrations[2].id],
+        )
+        self.assertIn(parent.name, list(df.iloc[-1]))
+
+        # a regenerated CSV replaces the rows of the store
+        call_command("download_all_administrations", "--test")
+        administration_csv_update(data=administrations[0])
+        df = pd.read_csv(get_administration_csv())
+        self.assertEqual(len(df), rows + 3)
+
+    def test_store_is_kept_next_to_the_csv(self):
+        filepath = get_administration_csv()
+        store_file = f"{STORAGE_PATH}/master_data/test-administration.sqlite"
+        self.assertEqual(
+            get_administration_csv_store_file(filepath), store_file
+        )
+        self.assertTrue(os.path.exists(store_file))
+        # files of MASTER_DATA are downloaded by the devices
+        self.assertFalse(
+            os.path.exists(f"{MASTER_DATA}/test-administration.sqlite")
+        )
@@ -0,0 +1,71 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from api.v1.v1_profile.models import Administration
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class AdministrationDescendantsTestCase(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        self.root = Administration.objects.get(parent__isnull=True)
+        self.adm = self.root.parent_administration.first()
+
+    def get_descendants(self, adm) -> set:
+        # walk the tree through the parent relation
+        ids = set()
+        children = list(adm.parent_administration.all())
+        while children:
+            ids.update([c.id for c in children])
+            children = list(
+                Administration.objects.filter(parent__in=children)
+            )
+        return ids
+
+    def test_descendants_of(self):
+        descendants = Administration.objects.descendants_of(self.adm)
+        self.assertEqual(
+            set(descendants.values_list("id", flat=True)),
+            self.get_descendants(self.adm),
+        )
+        descendants = Administration.objects.descendants_of(
+            self.adm, include_self=True
+        )
+        self.assertEqual(
+            set(descendants.values_list("id", flat=True)),
+            self.get_descendants(self.adm) | {self.adm.id},
+        )
+        root = Administration.objects.descendants_of(self.root)
+        self.assertEqual(root.count(), Administration.objects.count() - 1)
+
+    def test_descendants_of_many(self):
+        adms = list(self.root.parent_administration.all()[:2])
+        descendants = Administration.objects.descendants_of(*adms)
+        self.assertEqual(
+            set(descendants.values_list("id", flat=True)),
+            self.get_descendants(adms[0]) | self.get_descendants(adms[1]),
+        )
+        self.assertFalse(Administration.objects.descendants_of().exists())
+
+    def test_descendants_of_as_subquery(self):
+        descendants = Administration.objects.filter(
+            level__level__gt=1
+        ).descendants_of(self.root)
+        query = str(
+            Administration.objects.filter(pk__in=descendants).query
+        )
+        self.assertIn("SELECT", query.split("IN", 1)[1])
+
+    def test_path_is_indexed(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Administration._meta.db_table
+            )
+        self.assertTrue(
+            any(
+                c["index"] and c["columns"] == ["path"]
+                for c in constraints.values()
+            )
+        )
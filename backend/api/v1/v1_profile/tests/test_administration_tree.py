@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+
+from api.v1.v1_data.models import Answers
+from api.v1.v1_forms.constants import QuestionTypes
+from api.v1.v1_forms.models import Questions
+from api.v1.v1_profile.models import Administration, administration_tree
+from utils.functions import get_answer_value
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class AdministrationTreeTestCase(TestCase):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        self.administrations = list(
+            Administration.objects.filter(level__level__gt=1)
+        )
+
+    def count_queries(self, ctx) -> int:
+        return len([
+            q for q in ctx.captured_queries
+            if "cache_table" not in q["sql"]
+        ])
+
+    def get_path_name(self, adm: Administration) -> str:
+        # full path name queried from the database
+        names = [a.name for a in adm.ancestors] + [adm.name]
+        return "|".join(names)
+
+    def test_path_names(self):
+        expected = [self.get_path_name(a) for a in self.administrations]
+        administration_tree.get()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(
+                [a.full_path_name for a in self.administrations], expected
+            )
+            self.assertEqual(
+                [a.administration_column for a in self.administrations],
+                expected,
+            )
+            self.assertEqual(
+                [a.full_name for a in self.administrations],
+                [e.replace("|", " - ") for e in expected],
+            )
+        self.assertEqual(self.count_queries(ctx), 0)
+
+        tree = administration_tree.get()
+        adm = self.administrations[0]
+        self.assertEqual(tree.get_path_name(adm.id), expected[0])
+        self.assertEqual(
+            tree.get_ancestor_ids(adm.id), [a.id for a in adm.ancestors]
+        )
+        self.assertIsNone(tree.get_path_name(0))
+
+    def test_tree_is_invalidated(self):
+        adm = self.administrations[0]
+        parent = adm.parent
+        self.assertIn(parent.name, adm.full_path_name)
+        parent.name = "Renamed"
+        parent.save()
+        self.assertIn("Renamed", adm.full_path_name)
+
+        child = Administration.objects.create(
+            parent=adm, level=adm.level, name="New Child"
+        )
+        self.assertEqual(
+            administration_tree.get().get_path_name(child.id),
+            f"{adm.full_path_name}|New Child",
+        )
+        child.delete()
+        self.assertNotIn(child.id, administration_tree.get())
+
+    def test_children_in_database_order(self):
+        adm = self.administrations[0]
+        for name in ["b Child", "B Child", "a Child", "\u00c9 Child"]:
+            Administration.objects.create(
+                parent=adm, level=adm.level, name=name
+            )
+        self.assertEqual(
+            administration_tree.get().get_children(adm.id),
+            list(
+                Administration.objects.filter(parent=adm).order_by(
+                    "name", "id"
+                ).values_list("id", flat=True)
+            ),
+        )
+
+    def test_unsaved_path(self):
+        adm = self.administrations[0]
+        root = Administration.objects.get(parent__isnull=True)
+        adm.path = f"{root.id}."
+        self.assertEqual(adm.full_path_name, f"{root.name}|{adm.name}")
+
+    def test_administration_answer_missing_from_tree(self):
+        call_command("form_seeder", "--test")
+        question = Questions.objects.filter(
+            type=QuestionTypes.administration
+        ).first()
+        # a tree loaded before the administration was created
+        tree = administration_tree.get()
+        adm = self.administrations[0]
+        child = Administration.objects.create(
+            parent=adm, level=adm.level, name="New Child"
+        )
+        answer = Answers(question=question, value=child.id)
+        with patch.object(administration_tree, "get", return_value=tree):
+            self.assertEqual(
+                list(answer.to_data_frame.values()), [child.full_path_name]
+            )
+            self.assertEqual(
+                get_answer_value(answer, webform=True),
+                [a.id for a in child.ancestors if a.parent_id] + [child.id],
+            )
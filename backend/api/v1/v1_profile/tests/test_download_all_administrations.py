@@ -1,8 +1,10 @@
 import os
 from io import StringIO
 
+import pandas as pd
+from django.db import connection
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import override_settings, CaptureQueriesContext
 from django.core.management import call_command
 from api.v1.v1_profile.models import Administration
 from api.v1.v1_jobs.models import Jobs
@@ -40,6 +42,44 @@ class DownloadAllAdmTestCase(TestCase, ProfileTestHelperMixin):
             "File not found: {0}".format(location),
         )
 
+    def test_csv_rows(self):
+        location = f"{STORAGE_PATH}/master_data/test-administration.csv"
+        with CaptureQueriesContext(connection) as ctx:
+            self.call_command("--force")
+        queries = [
+            q for q in ctx.captured_queries
+            if "cache_table" not in q["sql"]
+        ]
+        self.assertLessEqual(len(queries), 2)
+
+        df = pd.read_csv(location)
+        administrations = Administration.objects.filter(level__id__gt=1)
+        self.assertEqual(len(df), administrations.count())
+        adm = administrations.order_by("-level__level").first()
+        row = df[df[f"{adm.level.name.lower()}_id"] == adm.id].iloc[0]
+        expected = [
+            p for p in adm.ancestors.select_related("level")
+            if p.level_id > 1
+        ] + [adm]
+        for p in expected:
+            self.assertEqual(row[p.level.name.lower()], p.name)
+            self.assertEqual(row[f"{p.level.name.lower()}_id"], p.id)
+
+    def test_csv_unchanged(self):
+        location = f"{STORAGE_PATH}/master_data/test-administration.csv"
+        self.call_command()
+        modified = os.stat(location).st_mtime_ns
+        self.call_command()
+        self.assertEqual(os.stat(location).st_mtime_ns, modified)
+
+        adm = Administration.objects.filter(level__id__gt=1).first()
+        adm.name = "Renamed"
+        adm.save()
+        self.call_command()
+        self.assertNotEqual(os.stat(location).st_mtime_ns, modified)
+        df = pd.read_csv(location)
+        self.assertIn("Renamed", list(df[adm.level.name.lower()]))
+
     def test_generate_with_job(self):
         administration = Administration.objects.first()
         file_name = administration.name.replace(" ", "_").lower()
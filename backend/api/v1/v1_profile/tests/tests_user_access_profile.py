@@ -0,0 +1,122 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
+
+from api.v1.v1_forms.models import Forms
+from api.v1.v1_profile.constants import (
+    DataAccessTypes,
+    FeatureAccessTypes,
+    FeatureTypes,
+)
+from api.v1.v1_profile.functions import get_user_access
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+from utils.custom_permissions import (
+    AddUserAccess,
+    IsApprover,
+    IsEditor,
+    IsSubmitter,
+    IsSuperAdminOrFormUser,
+)
+
+
+class FormView:
+    def __init__(self, form_id):
+        self.kwargs = {"form_id": form_id}
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True)
+class UserAccessProfileTestCase(TestCase, ProfileTestHelperMixin):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        call_command("default_roles_seeder", "--test", 1)
+        call_command("form_seeder", "--test", 1)
+        self.form = Forms.objects.filter(
+            parent__isnull=True, children__isnull=False
+        ).first()
+        self.administration = Administration.objects.filter(
+            level__level=1
+        ).first()
+
+    def get_request(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return request
+
+    def test_profile_matches_role_queries(self):
+        user = self.create_user(
+            email="approver@test.com",
+            role_level=self.IS_APPROVER,
+            administration=self.administration,
+            form=self.form,
+        )
+        profile = get_user_access(user)
+        self.assertEqual(
+            [r.administration_id for r in profile.roles],
+            list(
+                user.user_user_role.values_list(
+                    "administration_id", flat=True
+                )
+            ),
+        )
+        self.assertEqual(
+            profile.data_access,
+            set(
+                user.user_user_role.values_list(
+                    "role__role_role_access__data_access", flat=True
+                )
+            ),
+        )
+        self.assertEqual(
+            profile.first_role.administration_path,
+            f"{self.administration.path}{self.administration.id}.",
+        )
+        self.assertEqual(
+            profile.has_feature_access(
+                FeatureTypes.user_access, FeatureAccessTypes.invite_user
+            ),
+            user.user_user_role.filter(
+                role__role_role_feature_access__type=FeatureTypes.user_access,
+                role__role_role_feature_access__access=(
+                    FeatureAccessTypes.invite_user
+                ),
+            ).exists(),
+        )
+        child_ids = set(self.form.children.values_list("id", flat=True))
+        self.assertEqual(profile.form_ids, {self.form.id} | child_ids)
+        self.assertTrue(profile.has_form(str(self.form.id)))
+        self.assertFalse(profile.has_form(None))
+        self.assertTrue(profile.has_data_access(DataAccessTypes.approve))
+
+    def test_permissions_share_a_single_role_query(self):
+        user = self.create_user(
+            email="admin@test.com",
+            role_level=self.IS_ADMIN,
+            administration=self.administration,
+            form=self.form,
+        )
+        request = self.get_request(user)
+        view = FormView(form_id=self.form.id)
+        permissions = [
+            IsApprover(),
+            IsSubmitter(),
+            IsEditor(),
+            AddUserAccess(),
+        ]
+        # one query for the roles and one for the assigned forms
+        with self.assertNumQueries(2):
+            for permission in permissions:
+                permission.has_permission(request, view)
+            self.assertTrue(
+                IsSuperAdminOrFormUser().has_permission(request, view)
+            )
+            for permission in permissions:
+                permission.has_permission(request, view)
+
+    def test_anonymous_user_has_no_access(self):
+        with self.assertNumQueries(0):
+            profile = get_user_access(AnonymousUser())
+            self.assertEqual(profile.roles, [])
+            self.assertEqual(profile.form_ids, set())
+            self.assertFalse(profile.has_data_access(DataAccessTypes.read))
@@ -50,7 +50,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from utils.email_helper import send_email, EmailTypes
 from utils.custom_serializer_fields import validate_serializers_message
-from utils.custom_generator import administration_csv_delete
+from utils.custom_generator import administration_csv_delete, delete_sqlite
 from utils.custom_permissions import IsSuperAdmin
 
 
@@ -130,9 +130,7 @@ class AdministrationViewSet(ModelViewSet):
         if parent_id:
             if Administration.objects.filter(id=parent_id).exists():
                 parent = Administration.objects.only('path').get(id=parent_id)
-                queryset = queryset.filter(
-                    path__startswith=f"{parent.path or ''}{parent.id}."
-                )
+                queryset = queryset.descendants_of(parent)
 
         if level_id:
             if Levels.objects.filter(id=level_id).exists():
@@ -171,7 +169,9 @@ class AdministrationViewSet(ModelViewSet):
         instance = self.get_object()
         try:
             administration_csv_delete(id=instance.pk)
+            id = instance.pk
             instance.delete()
+            delete_sqlite(model=Administration, id=id)
         except ProtectedError:
             _, _, _, protected = get_deleted_objects(
                 [instance], cast(WSGIRequest, request), site
@@ -229,9 +229,8 @@ class EntityDataViewSet(ModelViewSet):
         if adm_id:
             try:
                 adm_root = Administration.objects.get(id=adm_id)
-                adms = Administration.objects.filter(
-                    Q(path__startswith=f"{adm_root.path or ''}{adm_root.id}.")
-                    | Q(id=adm_root.id)
+                adms = Administration.objects.descendants_of(
+                    adm_root, include_self=True
                 )
                 queryset = queryset.filter(administration__in=adms)
             except Administration.DoesNotExist:
@@ -267,6 +266,11 @@ class EntityDataViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        id = instance.pk
+        instance.delete()
+        delete_sqlite(model=EntityData, id=id)
+
 
 @extend_schema(
     tags=["File"],
@@ -3,8 +3,11 @@ from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.core import signing
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from utils.soft_deletes_model import SoftDeletes
+from utils.tiered_cache import CacheScopes, invalidate_cache
 
 # Create your models here.
 from utils.custom_manager import UserManager
@@ -81,3 +84,9 @@ class SystemUser(AbstractBaseUser, PermissionsMixin, SoftDeletes):
 
     class Meta:
         db_table = "system_user"
+
+
+@receiver(post_save, sender=Organisation)
+@receiver(post_delete, sender=Organisation)
+def invalidate_cascade_cache(sender, **_):
+    invalidate_cache(CacheScopes.cascades)
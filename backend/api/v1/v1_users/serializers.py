@@ -1,7 +1,7 @@
 from django.core import signing
 from django.core.signing import BadSignature
 from django.utils import timezone
-from django.db.models import Q, Min
+from django.db.models import Min
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
@@ -18,6 +18,7 @@ from api.v1.v1_profile.models import (
     Levels,
     Role,
     UserRole,
+    administration_tree,
 )
 from api.v1.v1_users.models import SystemUser, \
         Organisation, OrganisationAttribute
@@ -205,40 +206,68 @@ class ListAdministrationChildrenSerializer(serializers.ModelSerializer):
 
 
 class ListAdministrationSerializer(serializers.ModelSerializer):
+    """
+    An administration with its children, read from the administration
+    tree. With the depth context above 1, every child carries its own
+    children down to that many levels.
+    """
     full_name = serializers.SerializerMethodField()
     children = serializers.SerializerMethodField()
     level_name = serializers.ReadOnlyField(source='level.name')
     level = serializers.ReadOnlyField(source='level.level')
     children_level_name = serializers.SerializerMethodField()
 
+    def get_child(self, tree, id: int, depth: int) -> dict:
+        # same fields as ListAdministrationChildrenSerializer
+        child = {
+            'id': id,
+            'parent': tree.get_parent_id(id),
+            'path': tree.get_path(id),
+            'level': tree.get_level_id(id),
+            'name': tree.get_name(id),
+            'full_name': tree.get_path_name(id),
+        }
+        if depth > 1:
+            child['children'] = self.get_tree_children(
+                tree, id, depth - 1
+            )
+        return child
+
+    def get_tree_children(self, tree, id: int, depth: int) -> list:
+        max_level = self.context.get('max_level')
+        if max_level and int(max_level) <= tree.get_level(id):
+            return []
+        return [
+            self.get_child(tree, c, depth) for c in tree.get_children(id)
+        ]
+
     @extend_schema_field(ListAdministrationChildrenSerializer(many=True))
     def get_children(self, instance: Administration):
         max_level = self.context.get('max_level')
         filter_children = self.context.get('filter_children')
+        depth = self.context.get('depth') or 1
         if max_level:
             if int(max_level) <= instance.level.level:
                 return []
+        tree = administration_tree.get()
         filter = self.context.get('filter')
         if filter:
-            filtered_administration = Administration.objects.filter(
-                id=filter).all().order_by('name')
-            return ListAdministrationChildrenSerializer(
-                filtered_administration, many=True).data
-        children = instance.parent_administration.all().order_by('name')
+            if int(filter) not in tree:
+                return []
+            return [self.get_child(tree, int(filter), depth)]
+        children = tree.get_children(instance.id)
         if len(filter_children):
-            children = instance.parent_administration.filter(
-                pk__in=filter_children
-            ).all().order_by('name')
-        return ListAdministrationChildrenSerializer(
-            instance=children,
-            many=True
-        ).data
+            filter_children = [int(c) for c in filter_children]
+            children = [c for c in children if c in filter_children]
+        return [self.get_child(tree, c, depth) for c in children]
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_children_level_name(self, instance: Administration):
-        child: Administration = instance.parent_administration.first()
-        if child:
-            return child.level.name
+        tree = administration_tree.get()
+        children = tree.get_children(instance.id)
+        if children:
+            # the level of the first child, as parent_administration.first()
+            return tree.get_level_name(min(children))
         return None
 
     @extend_schema_field(OpenApiTypes.STR)
@@ -827,16 +856,13 @@ class UserDetailSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_pending_approval(self, instance: SystemUser):
-        batch_q = Q(approved=False)
-        for ur in instance.user_user_role.all():
-            adm = ur.administration
-            path = adm.path \
-                if hasattr(adm, 'path') and adm.path else f"{adm.id}."
-            batch_q |= Q(
-                administration__path__startswith=path,
-                approved=False,
-            )
-        total_batches = DataBatch.objects.filter(batch_q).count()
+        total_batches = DataBatch.objects.filter(
+            administration__in=Administration.objects.descendants_of(
+                *[ur.administration for ur in instance.user_user_role.all()],
+                include_self=True,
+            ),
+            approved=False,
+        ).count()
         return total_batches
 
     @extend_schema_field(OpenApiTypes.INT)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.utils import timezone
+
+from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
+from api.v1.v1_users.models import SystemUser
+
+
+@override_settings(USE_TZ=False, TEST_ENV=True, USER_ACTIVITY_INTERVAL=5)
+class UserActivityTestCase(TestCase, ProfileTestHelperMixin):
+    def setUp(self):
+        call_command("administration_seeder", "--test")
+        self.user = self.create_user(
+            email="super@akvo.org",
+            role_level=self.IS_SUPER_ADMIN,
+        )
+        self.token = self.get_auth_token(self.user.email)
+
+    def get_profile(self):
+        return self.client.get(
+            "/api/v1/profile",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def get_user_updates(self, queries):
+        return [
+            q["sql"] for q in queries
+            if q["sql"].startswith('UPDATE "system_user"')
+        ]
+
+    def test_last_login_is_updated_once_per_interval(self):
+        SystemUser.objects.filter(pk=self.user.pk).update(last_login=None)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.get_profile().status_code, 200)
+        updates = self.get_user_updates(ctx.captured_queries)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "last_login"', updates[0])
+        self.assertNotIn('"email"', updates[0])
+        last_login = SystemUser.objects.get(pk=self.user.pk).last_login
+        self.assertIsNotNone(last_login)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.get_profile()
+        self.assertEqual(self.get_user_updates(ctx.captured_queries), [])
+        self.assertEqual(
+            SystemUser.objects.get(pk=self.user.pk).last_login, last_login
+        )
+
+    def test_last_login_is_updated_after_interval(self):
+        expired = timezone.now() - timedelta(minutes=6)
+        SystemUser.objects.filter(pk=self.user.pk).update(last_login=expired)
+        self.get_profile()
+        last_login = SystemUser.objects.get(pk=self.user.pk).last_login
+        self.assertGreater(last_login, expired)
+
+    def test_anonymous_requests_do_not_query_users(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/v1/forms/")
+        self.assertFalse([
+            q for q in ctx.captured_queries if "system_user" in q["sql"]
+        ])
@@ -32,6 +32,7 @@ from api.v1.v1_profile.models import (
     Administration,
     Levels,
     Role,
+    administration_tree,
 )
 from api.v1.v1_profile.constants import FeatureAccessTypes, FeatureTypes
 from api.v1.v1_users.models import (
@@ -58,11 +59,14 @@ from api.v1.v1_users.serializers import (
     UpdateProfileSerializer,
 )
 from mis.settings import REST_FRAMEWORK, WEBDOMAIN
+from utils.cached_response import cached_response
+from utils.custom_generator import delete_sqlite
 from utils.custom_permissions import AddUserAccess, IsSuperAdmin
 from utils.custom_serializer_fields import validate_serializers_message
 from utils.default_serializers import DefaultResponseSerializer
 from utils.email_helper import send_email
 from utils.email_helper import ListEmailTypeRequestSerializer, EmailTypes
+from utils.tiered_cache import CacheScopes
 
 
 def send_email_to_user(type, user, request):
@@ -186,7 +190,7 @@ def login(request, version):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
         user.last_login = timezone.now()
-        user.save()
+        user.save(update_fields=["last_login"])
         refresh = RefreshToken.for_user(user)
         # Get the expiration time of the new token
         expiration_time = datetime.datetime.fromtimestamp(
@@ -321,25 +325,64 @@ def set_user_password(request, version):
             type=OpenApiTypes.NUMBER,
             location=OpenApiParameter.QUERY,
         ),
+        OpenApiParameter(
+            name="depth",
+            required=False,
+            type=OpenApiTypes.NUMBER,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Levels of children to return, 1 by default, at most "
+                "the number of levels"
+            ),
+        ),
     ],
     summary="Get list of administration",
 )
 @api_view(["GET"])
 def list_administration(request, version, administration_id):
-    instance = get_object_or_404(Administration, pk=administration_id)
     filter = request.GET.get("filter")
     max_level = request.GET.get("max_level")
     filter_children = request.GET.getlist("filter_children")
-    return Response(
-        ListAdministrationSerializer(
+    depth = request.GET.get("depth") or "1"
+    params = [filter or "0", max_level or "0", depth, *filter_children]
+    if not all([p.isdigit() for p in params]) or int(depth) < 1:
+        return Response(
+            {"message": "Invalid filter, max_level, depth or children"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    filter_children = sorted(set([int(c) for c in filter_children]))
+    # no administration has children deeper than the levels
+    depth = min(
+        int(depth), max(administration_tree.get().get_level_count(), 1)
+    )
+    cache_name = "administration-{0}-{1}-{2}-{3}-{4}".format(
+        administration_id,
+        filter,
+        max_level,
+        ".".join([str(c) for c in filter_children]),
+        depth,
+    )
+
+    def serialize():
+        instance = get_object_or_404(
+            Administration.objects.select_related("level"),
+            pk=administration_id,
+        )
+        return ListAdministrationSerializer(
             instance=instance,
             context={
                 "filter": filter,
                 "max_level": max_level,
                 "filter_children": filter_children,
+                "depth": depth,
             },
-        ).data,
-        status=status.HTTP_200_OK,
+        ).data
+
+    return cached_response(
+        request,
+        cache_name=cache_name,
+        scopes=(CacheScopes.administrations,),
+        serialize=serialize,
     )
 
 
@@ -497,42 +540,21 @@ def list_users(request, version):
         )
         if not filter_adm and user_adm_queryset.exists():
             # Handle multiple user roles - collect accessible administrations
-            all_accessible_adm_ids = set()
-            for user_role in user_adm_queryset:
-                adm = user_role.administration
-                # Add the administration itself
-                all_accessible_adm_ids.add(adm.id)
-                # Add all descendants of this administration
-                filter_path = "{0}{1}.".format(
-                    adm.path, adm.id
-                ) if adm.path else f"{adm.id}."
-                descendants = Administration.objects.filter(
-                    path__startswith=filter_path
-                ).values_list("id", flat=True)
-                all_accessible_adm_ids.update(descendants)
-
-            # Apply filter by all accessible administration IDs
-            filter_data["user_user_role__administration_id__in"] = list(
-                all_accessible_adm_ids
+            # The administrations with all their descendants
+            filter_data["user_user_role__administration__in"] = (
+                Administration.objects.descendants_of(
+                    *[ur.administration for ur in user_adm_queryset],
+                    include_self=True,
+                )
             )
         elif filter_adm:
             # Handle single administration filter (when explicitly specified)
-            filter_path = "{0}{1}.".format(
-                filter_adm.path, filter_adm.id
-            ) if filter_adm.path else f"{filter_adm.id}."
-            filter_descendants = list(
-                Administration.objects.filter(
-                    path__startswith=filter_path
-                ).values_list("id", flat=True)
-            )
-            filter_descendants.append(filter_adm.id)
-            final_set = set(filter_descendants)
-
-            # Apply filter by administration IDs
             # Only apply filtering if administration level > 0 (not national)
             if filter_adm.level.level > 0:
-                filter_data["user_user_role__administration_id__in"] = list(
-                    final_set
+                filter_data["user_user_role__administration__in"] = (
+                    Administration.objects.descendants_of(
+                        filter_adm, include_self=True
+                    )
                 )
     if serializer.validated_data.get("trained") is not None:
         trained = (
@@ -807,6 +829,7 @@ class OrganisationEditDeleteView(APIView):
     def delete(self, request, organisation_id, version):
         instance = get_object_or_404(Organisation, pk=organisation_id)
         instance.delete()
+        delete_sqlite(model=Organisation, id=organisation_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
@@ -0,0 +1,10 @@
+class StatsBuckets:
+    day = "day"
+    week = "week"
+    month = "month"
+
+    FieldStr = {
+        day: "day",
+        week: "week",
+        month: "month",
+    }
@@ -1,11 +1,345 @@
+import time
+from django.core.cache import cache
+from datetime import timezone
 from django.db import transaction, connection
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    DateField,
+    Exists,
+    ExpressionWrapper,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import (
+    Cast,
+    Concat,
+    Substr,
+    Trunc,
+    TruncDate,
+)
+
+from api.v1.v1_data.models import FormData, Answers
+from api.v1.v1_forms.models import Forms, Questions, QuestionTypes
+
+# Option answers of the latest approved, not deleted, submission per
+# parent datapoint and monitoring form, in the same shape the former
+# materialized view produced ("<question_id>||[<option ids>]").
+DATA_OPTIONS_SELECT = """
+    SELECT
+        d.parent_id as parent_data_id,
+        tmp.data_id,
+        d.administration_id,
+        d.form_id,
+        to_jsonb(array_agg(
+            concat(tmp.question_id, '||',
+                lower(tmp.option_ids::text))
+            ORDER BY tmp.question_id
+        )) as options
+    FROM (
+        SELECT
+            a.data_id,
+            a.question_id,
+            a.id as answer_id,
+            jsonb_agg(qo.id ORDER BY qo.id) as option_ids
+        FROM answer a
+        LEFT JOIN question q on q.id = a.question_id
+        LEFT JOIN option qo ON qo.question_id = a.question_id
+            AND qo.value = ANY(SELECT jsonb_array_elements_text(a.options))
+        WHERE (q.type = 5 OR q.type = 6) AND a.options IS NOT NULL
+            {answer_filter}
+        GROUP BY a.data_id, a.question_id, a.id
+    ) tmp
+    LEFT JOIN (
+        SELECT *,
+            ROW_NUMBER() OVER (
+                PARTITION BY parent_id, form_id ORDER BY created DESC
+            ) as rn
+        FROM data
+        WHERE parent_id IS NOT NULL
+            AND is_pending = FALSE
+            AND is_draft = FALSE
+            AND deleted_at IS NULL
+            {data_filter}
+    ) d ON d.id = tmp.data_id AND d.rn = 1
+    LEFT JOIN form f ON f.id = d.form_id
+    WHERE f.parent_id IS NOT NULL
+    GROUP BY tmp.data_id, d.administration_id, d.form_id, d.parent_id
+"""
+
+DATA_OPTIONS_INSERT = """
+    INSERT INTO view_data_options (
+        parent_data_id, data_id, administration_id, form_id, options
+    )
+    {select}
+    ON CONFLICT (data_id) DO UPDATE SET
+        parent_data_id = EXCLUDED.parent_data_id,
+        administration_id = EXCLUDED.administration_id,
+        form_id = EXCLUDED.form_id,
+        options = EXCLUDED.options
+"""
 
 
 @transaction.atomic
 def refresh_materialized_data():
+    """
+    Rebuild the whole view_data_options table. Only needed after bulk
+    imports; regular submissions are kept up to date by
+    refresh_data_options.
+    """
     with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM view_data_options;")
+        cursor.execute(
+            DATA_OPTIONS_INSERT.format(
+                select=DATA_OPTIONS_SELECT.format(
+                    answer_filter="", data_filter=""
+                )
+            )
+        )
+
+
+@transaction.atomic
+def refresh_data_options(parent_id: int, form_id: int):
+    """
+    Recompute the view_data_options row of a single parent datapoint and
+    monitoring form after one of its submissions has changed.
+    """
+    if not parent_id:
+        return
+    params = {"parent_id": parent_id, "form_id": form_id}
+    with connection.cursor() as cursor:
+        # serialize concurrent refreshes of the same datapoint
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%(parent_id)s);",
+            params,
+        )
         cursor.execute(
             """
-            REFRESH MATERIALIZED VIEW view_data_options;
-            """
+            DELETE FROM view_data_options
+            WHERE parent_data_id = %(parent_id)s
+                AND form_id = %(form_id)s;
+            """,
+            params,
+        )
+        cursor.execute(
+            DATA_OPTIONS_INSERT.format(
+                select=DATA_OPTIONS_SELECT.format(
+                    answer_filter="""
+                    AND a.data_id IN (
+                        SELECT id FROM data
+                        WHERE parent_id = %(parent_id)s
+                            AND form_id = %(form_id)s
+                    )
+                    """,
+                    data_filter="""
+                    AND parent_id = %(parent_id)s
+                    AND form_id = %(form_id)s
+                    """,
+                )
+            ),
+            params,
+        )
+
+
+FORMDATA_STATS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# option ids picked per approved registration datapoint
+REGISTRATION_OPTIONS_SELECT = """
+    SELECT a.data_id, qo.id
+    FROM answer a
+    INNER JOIN data d ON d.id = a.data_id
+    CROSS JOIN LATERAL jsonb_array_elements_text(a.options)
+        WITH ORDINALITY AS v(value, position)
+    INNER JOIN option qo ON qo.question_id = a.question_id
+        AND qo.value = v.value
+    WHERE a.question_id = %(question_id)s
+        AND d.form_id = %(form_id)s
+        AND d.is_pending = FALSE
+        AND d.is_draft = FALSE
+        AND d.deleted_at IS NULL
+        AND jsonb_typeof(a.options) = 'array'
+    ORDER BY a.data_id, a.id, v.position
+"""
+
+# option ids of the latest monitoring submission per parent datapoint,
+# as listed by view_data_options: NULL for an answer without a matching
+# option
+MONITORING_OPTIONS_SELECT = """
+    SELECT vdo.parent_data_id, NULLIF(option_id.value, 'null')::int
+    FROM view_data_options vdo
+    CROSS JOIN LATERAL jsonb_array_elements_text(vdo.options)
+        WITH ORDINALITY AS o(value, position)
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        split_part(o.value, '||', 2)::jsonb
+    ) WITH ORDINALITY AS option_id(value, position)
+    WHERE vdo.form_id = %(form_id)s
+        AND split_part(o.value, '||', 1) = %(question_id)s::text
+    ORDER BY vdo.parent_data_id, o.position, option_id.position
+"""
+
+
+def get_formdata_stats_version(form_id: int) -> int:
+    """
+    Data-version stamp of a form, changed whenever its approved data
+    changes (see invalidate_formdata_stats).
+    """
+    version_key = f"formdata-stats-version-{form_id}"
+    version = cache.get(version_key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(version_key, version, timeout=None)
+        version = cache.get(version_key, version)
+    return version
+
+
+def invalidate_formdata_stats(form_id: int):
+    cache.set(
+        f"formdata-stats-version-{form_id}", time.time_ns(), timeout=None
+    )
+
+
+def get_formdata_stats_cache_key(form: Forms, question_id: int) -> str:
+    versions = [get_formdata_stats_version(form_id=form.id)]
+    if form.parent_id:
+        # monitoring stats are listed per registration datapoint
+        versions.append(get_formdata_stats_version(form_id=form.parent_id))
+    versions = "-".join([str(v) for v in versions])
+    return f"formdata-stats-{form.id}-{question_id}-{versions}"
+
+
+def get_formdata_stats_data(form: Forms, question: Questions) -> list:
+    """
+    Values of a question per approved registration datapoint; monitoring
+    forms only count the latest submission of each datapoint.
+    """
+    params = {"form_id": form.id, "question_id": question.id}
+    if question.type == QuestionTypes.number:
+        data = FormData.objects.filter(
+            form=form,
+            is_pending=False,
+            is_draft=False,
+        )
+        id_field = "data_id"
+        if form.parent_id:
+            data = data.filter(
+                parent__in=FormData.objects.filter(
+                    form_id=form.parent_id,
+                    is_pending=False,
+                    is_draft=False,
+                )
+            ).order_by("parent_id", "-id").distinct("parent_id")
+            id_field = "data__parent_id"
+        answers = Answers.objects.filter(
+            question=question,
+            data_id__in=data.values("id"),
+        ).order_by(id_field, "id").values_list(id_field, "value")
+        return [
+            {"id": data_id, "value": value}
+            for data_id, value in answers
+        ]
+    query = MONITORING_OPTIONS_SELECT
+    if not form.parent_id:
+        query = REGISTRATION_OPTIONS_SELECT
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return [
+            {"id": data_id, "value": option_id}
+            for data_id, option_id in cursor.fetchall()
+        ]
+
+
+def get_answer_date(field: str):
+    """
+    Date of the YYYY-MM-DD prefix of a date answer (NULL without one),
+    built from the first day of its month plus its day: a day past the
+    end of the month rolls over instead of failing the query.
+    """
+    return Case(
+        When(
+            **{
+                f"{field}__regex": (
+                    r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])"
+                )
+            },
+            then=ExpressionWrapper(
+                Cast(
+                    Concat(Substr(field, 1, 7), Value("-01")), DateField()
+                ) + Cast(Substr(field, 9, 2), IntegerField()) - Value(1),
+                output_field=DateField(),
+            ),
+        ),
+        default=None,
+        output_field=DateField(),
+    )
+
+
+def get_monitoring_stats(
+    parent_id: int,
+    question_id: int,
+    question_date_id: int = None,
+    bucket: str = None,
+):
+    """
+    Values of a number question across the monitoring submissions of a
+    datapoint, dated by submission or by an optional date question, and
+    optionally aggregated per day, week or month.
+    """
+    def answer_of(question):
+        return Answers.objects.filter(
+            data_id=OuterRef("pk"), question_id=question
+        ).order_by("id")
+
+    answer = answer_of(question_id)
+    data = FormData.objects.filter(parent_id=parent_id).annotate(
+        value=Subquery(answer.values("value")[:1]),
+        submitted=TruncDate("created", tzinfo=timezone.utc),
+    ).filter(Exists(answer))
+    if question_date_id:
+        data = data.annotate(
+            date_answer=Subquery(
+                answer_of(question_date_id).values("name")[:1]
+            ),
+        ).annotate(
+            answer_date=get_answer_date("date_answer"),
+        ).annotate(
+            date=Case(
+                # not rolled over: a valid date (2024-02-30 isn't)
+                When(
+                    answer_date__month=Cast(
+                        Substr("date_answer", 6, 2), IntegerField()
+                    ),
+                    then="answer_date",
+                ),
+                default="submitted",
+                output_field=DateField(),
+            )
         )
+    else:
+        data = data.annotate(date=Cast("submitted", DateField()))
+    if not bucket:
+        data = data.annotate(
+            text=Subquery(answer.values("name")[:1]),
+            options=Subquery(answer.values("options")[:1]),
+        ).order_by("date", "id").values("date", "value", "text", "options")
+        # the answer as stored for the question type
+        return [
+            {
+                "date": d["date"],
+                "value": d["text"] or d["value"] or d["options"],
+            }
+            for d in data
+        ]
+    return data.annotate(
+        period=Trunc("date", bucket, output_field=DateField())
+    ).order_by("period").values("period").annotate(
+        avg=Avg("value"),
+        min=Min("value"),
+        max=Max("value"),
+        count=Count("value"),
+    ).values("period", "avg", "min", "max", "count")
@@ -0,0 +1,141 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of v1_visualization.functions.DATA_OPTIONS_SELECT (without
+# its filters): the migration must not change with the live query.
+DATA_OPTIONS_SELECT = """
+    SELECT
+        d.parent_id as parent_data_id,
+        tmp.data_id,
+        d.administration_id,
+        d.form_id,
+        to_jsonb(array_agg(
+            concat(tmp.question_id, '||',
+                lower(tmp.option_ids::text))
+            ORDER BY tmp.question_id
+        )) as options
+    FROM (
+        SELECT
+            a.data_id,
+            a.question_id,
+            a.id as answer_id,
+            jsonb_agg(qo.id ORDER BY qo.id) as option_ids
+        FROM answer a
+        LEFT JOIN question q on q.id = a.question_id
+        LEFT JOIN option qo ON qo.question_id = a.question_id
+            AND qo.value = ANY(SELECT jsonb_array_elements_text(a.options))
+        WHERE (q.type = 5 OR q.type = 6) AND a.options IS NOT NULL
+        GROUP BY a.data_id, a.question_id, a.id
+    ) tmp
+    LEFT JOIN (
+        SELECT *,
+            ROW_NUMBER() OVER (
+                PARTITION BY parent_id, form_id ORDER BY created DESC
+            ) as rn
+        FROM data
+        WHERE parent_id IS NOT NULL
+            AND is_pending = FALSE
+            AND is_draft = FALSE
+            AND deleted_at IS NULL
+    ) d ON d.id = tmp.data_id AND d.rn = 1
+    LEFT JOIN form f ON f.id = d.form_id
+    WHERE f.parent_id IS NOT NULL
+    GROUP BY tmp.data_id, d.administration_id, d.form_id, d.parent_id
+"""
+
+
+# Materialized view of 0001_create_view_data_options, restored when this
+# migration is reversed.
+VIEW_DATA_OPTIONS_SQL = """
+    CREATE MATERIALIZED VIEW view_data_options as
+        SELECT
+            row_number() over (partition by true) as id,
+            d.parent_id as parent_data_id,
+            tmp.data_id,
+            d.administration_id,
+            d.form_id,
+            to_jsonb(array_agg(
+                concat(tmp.question_id, '||',
+                    lower(tmp.option_ids::text))
+            )) as options
+        FROM (
+            SELECT
+                a.data_id,
+                a.question_id,
+                a.id as answer_id,
+                jsonb_agg(qo.id) as option_ids
+            FROM answer a
+            LEFT JOIN question q on q.id = a.question_id
+            LEFT JOIN option qo ON qo.question_id = a.question_id
+                AND qo.value = ANY(
+                    SELECT jsonb_array_elements_text(a.options)
+                )
+            WHERE (q.type = 5 OR q.type = 6) AND a.options IS NOT NULL
+            GROUP BY a.data_id, a.question_id, a.id
+        ) tmp
+        LEFT JOIN (
+            SELECT *,
+                ROW_NUMBER() OVER (
+                    PARTITION BY parent_id, form_id ORDER BY created DESC
+                ) as rn
+            FROM data
+            WHERE parent_id IS NOT NULL
+                AND is_pending = FALSE
+                AND is_draft = FALSE
+        ) d ON d.id = tmp.data_id AND d.rn = 1
+        LEFT JOIN form f ON f.id = d.form_id
+        WHERE f.parent_id IS NOT NULL
+        GROUP BY tmp.data_id, d.administration_id, d.form_id, d.parent_id
+"""
+
+def populate_view_data_options(apps, schema_editor):
+    schema_editor.execute(
+        """
+        INSERT INTO view_data_options (
+            parent_data_id, data_id, administration_id, form_id, options
+        )
+        {0}
+        """.format(DATA_OPTIONS_SELECT)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('v1_data', '0002_formdata_is_draft'),
+        ('v1_forms', '0005_questions_dependency_rule'),
+        ('v1_profile', '0004_rolefeatureaccess'),
+        ('v1_visualization', '0001_create_view_data_options'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "DROP MATERIALIZED VIEW IF EXISTS view_data_options;",
+            VIEW_DATA_OPTIONS_SQL,
+        ),
+        migrations.DeleteModel(
+            name='ViewDataOptions',
+        ),
+        migrations.CreateModel(
+            name='ViewDataOptions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('options', models.JSONField(default=None, null=True)),
+                ('administration', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='administration_view_data_options', to='v1_profile.administration')),
+                ('data', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='data_view_data_options', to='v1_data.formdata')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='form_view_data_options', to='v1_forms.forms')),
+                ('parent_data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='data_view_parent_data_options', to='v1_data.formdata')),
+            ],
+            options={
+                'db_table': 'view_data_options',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='viewdataoptions',
+            index=models.Index(fields=['form', 'parent_data'], name='view_data_o_form_id_2a0dce_idx'),
+        ),
+        migrations.RunPython(
+            populate_view_data_options,
+            migrations.RunPython.noop,
+        ),
+    ]
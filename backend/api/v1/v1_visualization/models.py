@@ -1,20 +1,30 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from api.v1.v1_forms.models import Forms
 from api.v1.v1_data.models import FormData
 from api.v1.v1_profile.models import Administration
+from api.v1.v1_visualization.functions import (
+    refresh_data_options,
+    invalidate_formdata_stats,
+)
 
 
 class ViewDataOptions(models.Model):
-    id = models.BigIntegerField(primary_key=True)
+    """
+    Option answers of the latest approved (not deleted) monitoring
+    submission per parent datapoint and monitoring form, kept up to date by
+    refresh_data_options.
+    """
     parent_data = models.ForeignKey(
         to=FormData,
-        on_delete=models.DO_NOTHING,
+        on_delete=models.CASCADE,
         related_name="data_view_parent_data_options",
     )
-    data = models.ForeignKey(
+    data = models.OneToOneField(
         to=FormData,
-        on_delete=models.DO_NOTHING,
+        on_delete=models.CASCADE,
         related_name="data_view_data_options",
     )
     administration = models.ForeignKey(
@@ -24,11 +34,48 @@ class ViewDataOptions(models.Model):
     )
     form = models.ForeignKey(
         to=Forms,
-        on_delete=models.DO_NOTHING,
+        on_delete=models.CASCADE,
         related_name="form_view_data_options",
     )
     options = models.JSONField(default=None, null=True)
 
     class Meta:
-        managed = False
         db_table = "view_data_options"
+        indexes = [
+            models.Index(fields=["form", "parent_data"]),
+        ]
+
+
+@receiver(post_delete, sender=FormData)
+def refresh_deleted_data_options(sender, instance: FormData, **_):
+    # A previous submission may become the latest one
+    if instance.parent_id:
+        refresh_data_options(
+            parent_id=instance.parent_id, form_id=instance.form_id
+        )
+
+
+@receiver(post_save, sender=FormData)
+def refresh_soft_deleted_data_options(
+    sender, instance: FormData, update_fields=None, **_
+):
+    # Soft deleted or restored: the latest submission may change
+    if not instance.parent_id:
+        return
+    if update_fields and "deleted_at" in update_fields:
+        refresh_data_options(
+            parent_id=instance.parent_id, form_id=instance.form_id
+        )
+
+
+@receiver(post_save, sender=FormData)
+def invalidate_soft_deleted_formdata_stats(
+    sender, instance: FormData, update_fields=None, **_
+):
+    if update_fields and "deleted_at" in update_fields:
+        invalidate_formdata_stats(form_id=instance.form_id)
+
+
+@receiver(post_delete, sender=FormData)
+def invalidate_deleted_formdata_stats(sender, instance: FormData, **_):
+    invalidate_formdata_stats(form_id=instance.form_id)
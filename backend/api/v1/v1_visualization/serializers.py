@@ -8,9 +8,11 @@ from api.v1.v1_forms.models import (
     QuestionOptions,
     QuestionTypes,
 )
+from api.v1.v1_visualization.constants import StatsBuckets
 from utils.custom_serializer_fields import (
     CustomPrimaryKeyRelatedField,
     CustomIntegerField,
+    CustomChoiceField,
 )
 
 
@@ -77,11 +79,29 @@ class FormDataStatsFilterSerializer(serializers.Serializer):
         ]
 
 
+class MonitoringStatsFilterSerializer(serializers.Serializer):
+    parent_id = CustomIntegerField()
+    question_id = CustomIntegerField()
+    question_date = CustomIntegerField(required=False)
+    bucket = CustomChoiceField(
+        choices=list(StatsBuckets.FieldStr.keys()), required=False
+    )
+
+    class Meta:
+        fields = ["parent_id", "question_id", "question_date", "bucket"]
+
+
 class MonitoringStatSerializer(serializers.Serializer):
     date = serializers.DateField()
     value = serializers.FloatField()
 
 
+class MonitoringBucketStatSerializer(MonitoringStatSerializer):
+    min = serializers.FloatField()
+    max = serializers.FloatField()
+    count = serializers.IntegerField()
+
+
 class GeoLocationListSerializer(serializers.ModelSerializer):
     class Meta:
         model = FormData
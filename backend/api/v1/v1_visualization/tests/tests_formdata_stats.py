@@ -1,5 +1,6 @@
 from django.core.management import call_command
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
 from rest_framework.test import APITestCase
 from django.utils.timezone import make_aware
 from datetime import datetime
@@ -11,7 +12,12 @@ from api.v1.v1_forms.models import (
     QuestionGroup,
 )
 from api.v1.v1_data.models import FormData
-from api.v1.v1_visualization.functions import refresh_materialized_data
+from api.v1.v1_data.tasks import seed_approved_data
+from api.v1.v1_visualization.functions import (
+    refresh_materialized_data,
+    refresh_data_options,
+)
+from api.v1.v1_visualization.models import ViewDataOptions
 from api.v1.v1_profile.tests.mixins import ProfileTestHelperMixin
 
 
@@ -488,6 +494,106 @@ class FormDataStatsAPITestCases(APITestCase, ProfileTestHelperMixin):
             810601
         )
 
+    def get_option_stats(self, reg_data_id):
+        response = self.client.get(
+            f"{self.base_url}/?question_id={self.option_question.id}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            d["value"] for d in response.json()["data"]
+            if d["id"] == reg_data_id
+        ]
+
+    def test_refresh_data_options_matches_full_refresh(self):
+        fields = [
+            "parent_data_id", "data_id", "administration_id",
+            "form_id", "options",
+        ]
+        expected = list(
+            ViewDataOptions.objects.order_by("data_id").values(*fields)
+        )
+        self.assertEqual(len(expected), 2)
+        ViewDataOptions.objects.all().delete()
+        for data in FormData.objects.filter(parent__isnull=False):
+            refresh_data_options(
+                parent_id=data.parent_id, form_id=data.form_id
+            )
+        self.assertEqual(
+            list(
+                ViewDataOptions.objects.order_by("data_id").values(*fields)
+            ),
+            expected,
+        )
+
+    def test_seed_approved_data_refreshes_data_options(self):
+        self.assertEqual(self.get_option_stats(9100), [810202])
+        data = self.create_monitoring_data(
+            parent_data=self.reg_data_1,
+            created_date=datetime(2025, 9, 1),
+            answers={"option_question": "option_1"},
+        )
+        data.is_pending = True
+        data.save()
+        # pending data is not part of the statistics yet
+        self.assertEqual(self.get_option_stats(9100), [810202])
+
+        seed_approved_data(data)
+        self.assertEqual(self.get_option_stats(9100), [810201])
+        self.assertEqual(self.get_option_stats(9101), [810202])
+
+    def test_deleting_latest_data_refreshes_data_options(self):
+        latest = self.reg_data_1.children.order_by("-created").first()
+        latest.delete(hard=True)
+        self.assertEqual(self.get_option_stats(9100), [810201])
+
+    def test_soft_deleting_latest_data_refreshes_data_options(self):
+        latest = self.reg_data_1.children.order_by("-created").first()
+        latest.delete()
+        self.assertEqual(self.get_option_stats(9100), [810201])
+        latest.restore()
+        self.assertEqual(self.get_option_stats(9100), [810202])
+
+    def test_form_data_stats_are_cached_per_data_version(self):
+        url = f"{self.base_url}/?question_id={self.number_question.id}"
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        uncached_queries = len(ctx.captured_queries)
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url)
+        self.assertLess(len(ctx.captured_queries), uncached_queries)
+        self.assertEqual(cached.json(), response.json())
+
+        data = self.create_monitoring_data(
+            parent_data=self.reg_data_1,
+            created_date=datetime(2025, 9, 1),
+            answers={"number_question": 10},
+        )
+        seed_approved_data(data)
+        values = {
+            d["id"]: d["value"] for d in self.client.get(url).json()["data"]
+        }
+        self.assertEqual(values[self.reg_data_1.id], 10)
+
+    def test_soft_deleting_data_invalidates_form_data_stats(self):
+        self.assertEqual(self.get_option_stats(9101), [810202])
+        for data in self.reg_data_2.children.all():
+            data.delete()
+        self.assertEqual(self.get_option_stats(9101), [])
+
+    def test_unknown_option_is_listed_without_value(self):
+        data = self.create_monitoring_data(
+            parent_data=self.reg_data_2,
+            created_date=datetime(2025, 9, 1),
+        )
+        data.data_answer.create(
+            question=self.option_question,
+            created_by=self.user,
+            index=0,
+            options=["unknown"],
+        )
+        seed_approved_data(data)
+        self.assertEqual(self.get_option_stats(9101), [None])
+
     def create_monitoring_data(
         self,
         parent_data,
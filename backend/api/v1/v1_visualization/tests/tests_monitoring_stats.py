@@ -1,4 +1,5 @@
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from api.v1.v1_data.models import FormData, Answers
@@ -118,3 +119,143 @@ class MonitoringStatsAPITest(APITestCase):
         url = "/api/v1/visualization/monitoring-stats/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def create_monitoring_data(self, created, value):
+        data = FormData.objects.create(
+            parent=self.reg_data,
+            administration=self.administration,
+            created_by=self.user,
+            form=self.monitoring,
+        )
+        FormData.objects.filter(id=data.id).update(
+            created=make_aware(created)
+        )
+        Answers.objects.create(
+            value=value,
+            data=data,
+            question=self.question,
+            created_by=self.user,
+        )
+        return data
+
+    def test_stats_query_count_does_not_grow_with_data(self):
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+            f"&question_date={self.date_question.id}"
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        for day in range(2, 6):
+            self.create_monitoring_data(datetime(2023, 8, day), day)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [d["date"] for d in response.json()],
+            [
+                "02-08-2023",
+                "03-08-2023",
+                "04-08-2023",
+                "05-08-2023",
+                "01-06-2025",
+            ],
+        )
+
+    def test_stats_with_month_bucket(self):
+        self.create_monitoring_data(datetime(2023, 8, 15), 3)
+        self.create_monitoring_data(datetime(2023, 9, 2), 8)
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+            f"&bucket=month"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "date": "01-08-2023",
+                    "value": 2.0,
+                    "min": 1.0,
+                    "max": 3.0,
+                    "count": 2,
+                },
+                {
+                    "date": "01-09-2023",
+                    "value": 8.0,
+                    "min": 8.0,
+                    "max": 8.0,
+                    "count": 1,
+                },
+            ],
+        )
+
+    def test_stats_with_week_bucket(self):
+        # 2023-08-01 is a Tuesday, 2023-08-06 a Sunday of the same week
+        self.create_monitoring_data(datetime(2023, 8, 6), 5)
+        self.create_monitoring_data(datetime(2023, 8, 7), 7)
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+            f"&bucket=week"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(d["date"], d["count"]) for d in response.json()],
+            [("31-07-2023", 2), ("07-08-2023", 1)],
+        )
+
+    def test_invalid_bucket(self):
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+            f"&bucket=year"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_with_invalid_question_date(self):
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+            f"&question_date={self.date_question.id}"
+        )
+        # not a date: the submission date is used
+        for date, expected in [
+            ("2024-02-30T00:00:00.000Z", "01-08-2023"),
+            ("2023-02-29", "01-08-2023"),
+            ("2024-13-01", "01-08-2023"),
+            ("2024-02-29T00:00:00.000Z", "29-02-2024"),
+            ("2024-04-30", "30-04-2024"),
+        ]:
+            Answers.objects.filter(question=self.date_question).update(
+                name=date
+            )
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()[0]["date"], expected, date)
+            response = self.client.get(f"{url}&bucket=day")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()[0]["date"], expected, date)
+
+    def test_stats_with_text_answer(self):
+        # the stored text of the answer comes first, as the value
+        Answers.objects.filter(question=self.question).update(
+            name="5", value=None
+        )
+        url = (
+            f"/api/v1/visualization/monitoring-stats/"
+            f"?parent_id={self.reg_data.id}"
+            f"&question_id={self.question.id}"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [{"date": "01-08-2023", "value": 5}])
@@ -1,19 +1,26 @@
-import json
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime
-from django.db.models import Q
-from api.v1.v1_data.models import FormData, Answers
+from django.core.cache import cache
 from api.v1.v1_forms.models import Forms, QuestionTypes
 from api.v1.v1_visualization.serializers import (
     MonitoringStatSerializer,
+    MonitoringBucketStatSerializer,
+    MonitoringStatsFilterSerializer,
     GeoLocationListSerializer,
     GeoLocationFilterSerializer,
     FormDataStatSerializer,
     FormDataStatsFilterSerializer,
 )
-from api.v1.v1_visualization.models import ViewDataOptions
+from api.v1.v1_profile.functions import get_user_access
+from api.v1.v1_profile.models import Administration
+from api.v1.v1_visualization.constants import StatsBuckets
+from api.v1.v1_visualization.functions import (
+    FORMDATA_STATS_CACHE_TIMEOUT,
+    get_formdata_stats_cache_key,
+    get_formdata_stats_data,
+    get_monitoring_stats,
+)
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from rest_framework.generics import get_object_or_404
@@ -52,112 +59,26 @@ def formdata_stats(request, form_id, version):
             status=status.HTTP_400_BAD_REQUEST,
         )
     question = serializer.validated_data.get("question_id")
+    cache_key = get_formdata_stats_cache_key(
+        form=form, question_id=question.id
+    )
+    cache_data = cache.get(cache_key)
+    if cache_data is not None:
+        return Response(cache_data, status=status.HTTP_200_OK)
     options = []
-    if not form.parent:
-        if question.type in [
-            QuestionTypes.option,
-            QuestionTypes.multiple_option,
-        ]:
-            options = question.options.all()
-        data = []
-        for d in form.form_form_data.filter(
-            is_pending=False,
-            is_draft=False,
-        ).all():
-            if question.type == QuestionTypes.number:
-                data.extend([
-                    {
-                        "id": d.id,
-                        "value": a.value,
-                    }
-                    for a in d.data_answer.filter(
-                        question_id=question.id
-                    ).all()
-                ])
-            if question.type in [
-                QuestionTypes.option,
-                QuestionTypes.multiple_option,
-            ]:
-                for a in d.data_answer.filter(
-                    question_id=question.id
-                ).all():
-                    for v in a.options:
-                        v_data = question.options.filter(value=v).first()
-                        if v_data:
-                            data.append({
-                                "id": d.id,
-                                "value": v_data.id,
-                            })
-        return Response(
-            FormDataStatSerializer(
-                instance={
-                    "options": options,
-                    "data": data,
-                }
-            ).data,
-            status=status.HTTP_200_OK,
-        )
-    if question.type == QuestionTypes.number:
-        parent_form = form.parent
-        form_data = parent_form.form_form_data.filter(
-            is_pending=False,
-            is_draft=False,
-        ).all()
-        data = [
-            {
-                "id": fd.id,
-                "value": a.value,
-            }
-            for fd in form_data
-            for ld in [fd.children.filter(
-                form_id=form_id,
-                is_pending=False,
-                is_draft=False,
-            ).last()] if ld
-            for a in ld.data_answer.filter(
-                question_id=question.id
-            ).all()
-        ]
-        return Response(
-            FormDataStatSerializer(
-                instance={
-                    "options": options,
-                    "data": data,
-                }
-            ).data,
-            status=status.HTTP_200_OK,
-        )
     if question.type in [
         QuestionTypes.option,
         QuestionTypes.multiple_option,
     ]:
         options = question.options.all()
-    data_options = ViewDataOptions.objects.filter(
-        form=form,
-    ).all()
-    data = [
-        {
-            "id": do.parent_data_id,
-            "value": v,
-            "question_id": int(o.split("||")[0]),
+    instance = FormDataStatSerializer(
+        instance={
+            "options": options,
+            "data": get_formdata_stats_data(form=form, question=question),
         }
-        for do in data_options
-        for o in do.options
-        for v in json.loads(o.split("||")[1])
-    ]
-    # filter data based on the question_id
-    data = list(filter(
-        lambda x: x["question_id"] == question.id, data
-    ))
-    return Response(
-        FormDataStatSerializer(
-            instance={
-                "options": options,
-                "data": data,
-            }
-        ).data,
-        status=status.HTTP_200_OK,
-    )
+    ).data
+    cache.set(cache_key, instance, timeout=FORMDATA_STATS_CACHE_TIMEOUT)
+    return Response(instance, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -186,60 +107,52 @@ def formdata_stats(request, form_id, version):
             location=OpenApiParameter.QUERY,
             description="the question to extract the date from (optional)",
         ),
+        OpenApiParameter(
+            name="bucket",
+            required=False,
+            enum=list(StatsBuckets.FieldStr.keys()),
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Aggregate the values per day, week or month (optional)"
+            ),
+        ),
     ],
 )
 @api_view(["GET"])
 def monitoring_stats(request, version):
-    parent_id = request.query_params.get("parent_id")
-    question_id = request.query_params.get("question_id")
-    question_date_key = request.query_params.get("question_date")
-
-    if not parent_id or not question_id:
+    serializer = MonitoringStatsFilterSerializer(data=request.GET)
+    if not serializer.is_valid():
         return Response(
-            {"detail": "Missing required parameters."},
+            {"message": validate_serializers_message(serializer.errors)},
             status=status.HTTP_400_BAD_REQUEST,
         )
-
-    try:
-        formdata_qs = FormData.objects.filter(parent_id=parent_id)
-        stats = []
-
-        for formdata in formdata_qs:
-            answer = Answers.objects.filter(
-                data=formdata, question_id=question_id
-            ).first()
-            if not answer:
-                continue
-
-            # Default date
-            date = formdata.created
-
-            # Optional override from another question
-            if question_date_key:
-                date_answer = Answers.objects.filter(
-                    data=formdata, question_id=question_date_key
-                ).first()
-                if date_answer and date_answer.name:
-                    parsed_date = datetime.strptime(
-                        date_answer.name, "%Y-%m-%dT%H:%M:%S.%fZ"
-                    )
-                    if parsed_date:
-                        date = parsed_date
-
-            stats.append(
-                {
-                    "date": date.date(),
-                    "value": answer.name or answer.value or answer.options,
-                }
-            )
-
-        serializer = MonitoringStatSerializer(stats, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    except Exception as e:
+    bucket = serializer.validated_data.get("bucket")
+    stats = get_monitoring_stats(
+        parent_id=serializer.validated_data["parent_id"],
+        question_id=serializer.validated_data["question_id"],
+        question_date_id=serializer.validated_data.get("question_date"),
+        bucket=bucket,
+    )
+    if bucket:
+        stats = [
+            {
+                "date": s["period"],
+                "value": s["avg"],
+                "min": s["min"],
+                "max": s["max"],
+                "count": s["count"],
+            }
+            for s in stats
+        ]
         return Response(
-            {"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            MonitoringBucketStatSerializer(stats, many=True).data,
+            status=status.HTTP_200_OK,
         )
+    return Response(
+        MonitoringStatSerializer(stats, many=True).data,
+        status=status.HTTP_200_OK,
+    )
 
 
 class GeolocationListView(APIView):
@@ -276,31 +189,25 @@ class GeolocationListView(APIView):
         )
         if serializer.validated_data.get("administration"):
             adm = serializer.validated_data.get("administration")
-            adm_path = f"{adm.id}."
-            if adm.path:
-                adm_path = f"{adm.path}{adm.id}."
             queryset = queryset.filter(
-                Q(administration=adm) |
-                Q(administration__path__startswith=adm_path)
+                administration__in=Administration.objects.descendants_of(
+                    adm, include_self=True
+                )
             )
         if (
             not request.user.is_superuser and
             not serializer.validated_data.get("administration")
         ):
-            user_role = request.user.user_user_role.order_by(
-                "administration__level__level"
-            ).first()
-            adm = user_role.administration if user_role else None
-            if not adm:
+            user_role = get_user_access(request.user).top_role
+            if not user_role:
                 return Response(
                     data=[],
                     status=status.HTTP_200_OK,
                 )
-            if adm.path:
-                adm_path = f"{adm.path}{adm.id}."
             queryset = queryset.filter(
-                Q(administration=adm) |
-                Q(administration__path__startswith=adm_path)
+                administration__in=Administration.objects.descendants_of(
+                    user_role.administration, include_self=True
+                )
             )
         queryset = queryset.values(
             "id", "name", "geo", "administration_id"
@@ -14,6 +14,8 @@ for file in "$dir"/*.prod.json; do
 done
 echo "FINISHED"
 
+./manage.py purge_submission_receipts
+
 # The directory containing the result files
 cron_dir="./storage/cronjob_results"
 output_html="./storage/cronjob_results/index.html"
@@ -1,23 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.utils import timezone
 
-# from rest_framework.response import Response
-# from rest_framework import status
 from api.v1.v1_users.models import SystemUser
 
 
 class UserActivity(object):
+    """
+    Track the last activity of authenticated users in last_login. The
+    column is written at most once per USER_ACTIVITY_INTERVAL minutes
+    per user, using the user already loaded by the authentication.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
-        try:
-            # auth_header = request.headers.get('Authorization')
-            # get user detail
-            user = SystemUser.objects.get(email=request.user)
-            # update last login here
-            user.last_login = timezone.now()
-            user.save()
+        user = getattr(request, "user", None)
+        if not user or not user.is_authenticated:
             return response
-        except SystemUser.DoesNotExist:
+        now = timezone.now()
+        interval = timedelta(minutes=settings.USER_ACTIVITY_INTERVAL)
+        if user.last_login and now - user.last_login < interval:
             return response
+        SystemUser.objects.filter(pk=user.pk).update(last_login=now)
+        user.last_login = now
+        return response
@@ -212,15 +212,41 @@ USE_TZ = True
 
 STATIC_URL = "static-files/"
 
-# For Caching API call
+# For Caching API call: an in-process LRU in front of a cache shared by
+# all workers (the database cache table unless SHARED_CACHE_BACKEND is set)
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": "/var/tmp/cache",
-    }
+        "BACKEND": "utils.tiered_cache.TieredCache",
+        "OPTIONS": {
+            "LOCAL": "local",
+            "SHARED": "shared",
+            "LOCAL_TIMEOUT": 30,
+        },
+    },
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "mis-local",
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+    "shared": {
+        "BACKEND": environ.get(
+            "SHARED_CACHE_BACKEND",
+            "django.core.cache.backends.db.DatabaseCache",
+        ),
+        "LOCATION": environ.get("SHARED_CACHE_LOCATION", "cache_table"),
+        # culling drops entries by key order, cache-scope-* versions
+        # included: keep room for every form, assignment and response
+        "OPTIONS": {
+            "MAX_ENTRIES": int(environ.get("SHARED_CACHE_MAX_ENTRIES", 50000)),
+            "CULL_FREQUENCY": 10,
+        },
+    },
 }
 CACHE_FOLDER = "/tmp/cache/"
 
+# Minutes between two last_login updates of the same user
+USER_ACTIVITY_INTERVAL = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -234,6 +260,18 @@ APK_UPLOAD_SECRET = environ.get("APK_UPLOAD_SECRET")
 MASTER_DATA = "./source"
 STORAGE_PATH = environ.get("STORAGE_PATH", "./storage")
 
+# Days a device submission can be replayed without being stored again
+SUBMISSION_RECEIPT_RETENTION = 7
+# Seconds a submission being processed blocks its retries (409)
+SUBMISSION_RECEIPT_PENDING_TIMEOUT = 300
+# Async device submissions processed per worker transaction
+SUBMISSION_INTAKE_BATCH_SIZE = 20
+# Seconds before an async submission claimed by a worker is queued again
+SUBMISSION_INTAKE_LEASE = 600
+# Seconds of datapoint changes sent again by the next cursor sync, so a
+# change committed after a newer one was synced is not skipped
+DATAPOINT_SYNC_SAFETY_WINDOW = 60
+
 FORM_GEO_VALUE = {"lat": -18.1236015, "lng": 178.3805867}  # Fiji coordinates
 
 BUCKET_NAME = "mis"
@@ -247,6 +285,8 @@ EMAIL_FROM = environ.get("EMAIL_FROM", "noreply@akvo.org")
 COUNTRY_NAME = "fiji"
 
 TEST_ENV = False
+# starts every test with empty in-process caches
+TEST_RUNNER = "utils.test_runner.TestRunner"
 
 Q_CLUSTER = {
     "name": "DjangORM",
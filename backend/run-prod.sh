@@ -4,6 +4,7 @@
 set -eu
 
 python manage.py migrate
+python manage.py createcachetable
 python manage.py generate_sqlite >/dev/null &
 python manage.py generate_config >/dev/null &
 python manage.py download_all_administrations >/dev/null &
@@ -0,0 +1,118 @@
+from threading import Lock
+
+from utils.tiered_cache import CacheScopes, get_scope_version
+
+
+class AdministrationTree:
+    """
+    Parent, level, name and ancestors of every administration, to render
+    ancestor chains and path names without querying the database.
+    """
+
+    def __init__(self, rows):
+        # id -> (parent id, level, name, ancestor ids ordered by level,
+        # level id)
+        self.nodes = {}
+        self.paths = {}
+        # level id -> level name
+        self.level_names = {}
+        # parent id -> child ids in the order of the rows, sorted by name
+        # by the database: same collation as order_by("name")
+        self.children = {}
+        for id, parent_id, level_id, level, level_name, name, path in rows:
+            self.nodes[id] = (parent_id, level, name, (), level_id)
+            self.paths[id] = path
+            self.level_names[level_id] = level_name
+            self.children.setdefault(parent_id, []).append(id)
+        for id, path in self.paths.items():
+            if not path:
+                continue
+            # same as Administration.ancestors: the existing ids of the
+            # path ordered by level
+            ancestors = [
+                int(p) for p in path.split(".")
+                if p and int(p) in self.nodes
+            ]
+            ancestors.sort(key=lambda a: self.nodes[a][1])
+            parent_id, level, name, _, level_id = self.nodes[id]
+            self.nodes[id] = (
+                parent_id, level, name, tuple(ancestors), level_id
+            )
+
+    def __contains__(self, id) -> bool:
+        return id in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get_name(self, id):
+        return self.nodes[id][2]
+
+    def get_level(self, id):
+        return self.nodes[id][1]
+
+    def get_level_id(self, id):
+        return self.nodes[id][4]
+
+    def get_level_name(self, id):
+        return self.level_names[self.nodes[id][4]]
+
+    def get_level_count(self) -> int:
+        return len(self.level_names)
+
+    def get_parent_id(self, id):
+        return self.nodes[id][0]
+
+    def get_children(self, id) -> list:
+        return list(self.children.get(id, []))
+
+    def get_path(self, id):
+        return self.paths.get(id)
+
+    def get_ancestor_ids(self, id) -> list:
+        return list(self.nodes[id][3])
+
+    def get_ancestor_names(self, id) -> list:
+        return [self.nodes[a][2] for a in self.nodes[id][3]]
+
+    def get_path_name(self, id, separator: str = "|"):
+        """
+        Names of the ancestors and the administration itself, like
+        Administration.full_path_name; None for an unknown id.
+        """
+        if id not in self.nodes:
+            return None
+        name = self.get_name(id)
+        if not self.paths[id]:
+            return name
+        names = separator.join(self.get_ancestor_names(id))
+        return f"{names}{separator}{name}"
+
+
+class AdministrationTreeCache:
+    """
+    Process-wide AdministrationTree, loaded once and reloaded when the
+    administrations cache scope is invalidated (by any worker).
+    """
+
+    def __init__(self, load):
+        # load() returns the (id, parent id, level id, level, level name,
+        # name, path) rows ordered by name
+        self.load = load
+        self.current = (None, None)
+        self.lock = Lock()
+
+    def get(self) -> AdministrationTree:
+        version = get_scope_version(CacheScopes.administrations)
+        current_version, tree = self.current
+        if current_version == version:
+            return tree
+        with self.lock:
+            current_version, tree = self.current
+            if current_version != version:
+                tree = AdministrationTree(self.load())
+                self.current = (version, tree)
+        return tree
+
+    def clear(self):
+        self.current = (None, None)
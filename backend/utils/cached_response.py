@@ -0,0 +1,38 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from utils.tiered_cache import get_cache_key
+
+
+def cached_response(request, cache_name, scopes, serialize):
+    """
+    Response of serialize(), cached until one of the scopes is
+    invalidated (see utils.tiered_cache.CacheScopes) and served with ETag
+    / Last-Modified headers, answering 304 when the client already has
+    the current version.
+    """
+    cache_key = get_cache_key(cache_name, scopes=scopes)
+    cache_data = cache.get(cache_key)
+    if not cache_data:
+        cache_data = {
+            "etag": quote_etag(hashlib.md5(cache_key.encode()).hexdigest()),
+            "last_modified": int(time.time()),
+            "data": serialize(),
+        }
+        cache.add(cache_key, cache_data, timeout=None)
+    response = get_conditional_response(
+        request,
+        etag=cache_data["etag"],
+        last_modified=cache_data["last_modified"],
+    )
+    if response is None:
+        response = Response(cache_data["data"], status=status.HTTP_200_OK)
+    response["ETag"] = cache_data["etag"]
+    response["Last-Modified"] = http_date(cache_data["last_modified"])
+    return response
@@ -0,0 +1,127 @@
+import requests
+from django.core.cache import cache
+
+from api.v1.v1_forms.models import Questions
+from api.v1.v1_profile.models import EntityData
+from api.v1.v1_users.models import Organisation
+from utils.tiered_cache import CacheScopes, get_cache_key
+
+CASCADE_CACHE_TIMEOUT = 60 * 60
+# Seconds to wait for a cascade endpoint outside of this application
+CASCADE_REMOTE_TIMEOUT = 10
+
+# source name -> function(ids, endpoint) returning {id: name}
+_resolvers = {}
+
+
+def register_cascade_resolver(source: str):
+    """
+    Register the function resolving the answer names of a cascade source:
+
+    @register_cascade_resolver("organisation")
+    def resolve_organisations(ids: list, endpoint: str) -> dict:
+        ...
+    """
+    def decorator(resolver):
+        _resolvers[source] = resolver
+        return resolver
+    return decorator
+
+
+def resolve_names(queryset, ids: list) -> dict:
+    """
+    Names of the rows of the ids, keyed by the ids as given: answers
+    store them as numbers or strings ("5", "5.0").
+    """
+    pks = {}
+    for id in ids:
+        try:
+            pks[id] = int(float(id))
+        except (TypeError, ValueError):
+            continue
+    names = dict(
+        queryset.filter(pk__in=set(pks.values())).values_list("id", "name")
+    )
+    return {id: names[pk] for id, pk in pks.items() if pk in names}
+
+
+@register_cascade_resolver("organisation")
+def resolve_organisations(ids: list, endpoint: str = None) -> dict:
+    return resolve_names(Organisation.objects, ids)
+
+
+@register_cascade_resolver("entity")
+def resolve_entity_data(ids: list, endpoint: str = None) -> dict:
+    return resolve_names(EntityData.objects, ids)
+
+
+@register_cascade_resolver("remote")
+def resolve_remote(ids: list, endpoint: str = None) -> dict:
+    endpoint = endpoint.split("?")[0]
+    names = {}
+    for id in ids:
+        res = requests.get(
+            f"{endpoint}?id={id}", timeout=CASCADE_REMOTE_TIMEOUT
+        )
+        names[id] = res.json()[0].get("name")
+    return names
+
+
+def get_cascade_source(question: Questions):
+    """
+    Resolver name and endpoint of a cascade question; the source is None
+    when its answers have no name.
+    """
+    if question.extra and question.extra.get("type") == "entity":
+        return "entity", None
+    if not question.api:
+        return None, None
+    endpoint = question.api.get("endpoint")
+    if "organisation" in endpoint:
+        return "organisation", endpoint
+    if "entity-data" in endpoint:
+        return "entity", endpoint
+    return "remote", endpoint
+
+
+def resolve_cascade_names(answers: list) -> dict:
+    """
+    Names of cascade answers given as (question, id) pairs, resolved in
+    bulk per source and cached: {(question id, id): name}. Answers
+    without id are left out.
+    """
+    answers = [(q, id) for q, id in answers if id not in [None, ""]]
+    sources = {}
+    for question, id in answers:
+        source, endpoint = get_cascade_source(question)
+        if source:
+            sources.setdefault((source, endpoint), set()).add(id)
+    names = {}
+    for (source, endpoint), ids in sources.items():
+        keys = {
+            id: get_cache_key(
+                f"cascade-{source}-{endpoint or ''}-{id}",
+                scopes=(CacheScopes.cascades,),
+            )
+            for id in ids
+        }
+        cached = cache.get_many(keys.values())
+        resolved = {
+            id: cached[key] for id, key in keys.items() if key in cached
+        }
+        missing = [id for id in ids if id not in resolved]
+        if missing:
+            found = _resolvers[source](missing, endpoint=endpoint)
+            cache.set_many(
+                {keys[id]: name for id, name in found.items()},
+                timeout=CASCADE_CACHE_TIMEOUT,
+            )
+            resolved.update(found)
+        names[(source, endpoint)] = resolved
+    result = {}
+    for question, id in answers:
+        source, endpoint = get_cascade_source(question)
+        result[(question.id, id)] = (
+            names[(source, endpoint)].get(id) if source else None
+        )
+    return result
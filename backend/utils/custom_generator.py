@@ -1,38 +1,113 @@
+import csv
+import gzip
+import json
 import os
+import shutil
 import sqlite3
+import time
 import pandas as pd
 import logging
+from contextlib import contextmanager
 from django.conf import settings
+from django_q.tasks import async_task
 from mis.settings import MASTER_DATA, STORAGE_PATH, COUNTRY_NAME
 from api.v1.v1_profile.models import Administration
+from utils.file_helper import file_lock, get_temp_file
 
 logger = logging.getLogger(__name__)
 
 
-def generate_sqlite(model, test: bool = False):
-    if not test:
-        test = settings.TEST_ENV
-    table_name = model._meta.db_table
-    field_names = [f.name for f in model._meta.fields]
-    objects = model.objects.all()
-    file_name = "{0}/{1}{2}.sqlite".format(
+def get_sqlite_file(model, test: bool = False) -> str:
+    return "{0}/{1}{2}.sqlite".format(
         MASTER_DATA,
         "test_" if test else "",
-        table_name,
+        model._meta.db_table,
     )
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    data = pd.DataFrame(list(objects.values(*field_names)))
+
+
+def get_published_sqlite(file_name: str) -> str:
+    # apart from the requested files: names with "/" are not served
+    return os.path.join(
+        os.path.dirname(file_name), "published", os.path.basename(file_name)
+    )
+
+
+def publish_sqlite(file_name: str) -> str:
+    """
+    Copy of a master-data file, along with its gzipped variant, that is
+    served to devices. Edits change the file in place, so the copy is
+    only made again by the first download after them, i.e. when its meta
+    version is behind the one of the file (files without versions are
+    copied on every call). Call it under file_lock(file_name).
+    """
+    published = get_published_sqlite(file_name)
+    version = get_sqlite_version(file_name)
+    if version and os.path.exists(published):
+        published_version = get_sqlite_version(published)
+        if published_version and (
+            published_version["version"] == version["version"]
+        ):
+            return published
+    os.makedirs(os.path.dirname(published), exist_ok=True)
+    temp_file = get_temp_file(published, suffix=".sqlite.tmp")
+    gz_file = get_temp_file(published, suffix=".sqlite.tmp.gz")
+    try:
+        shutil.copy2(file_name, temp_file)
+        with open(temp_file, "rb") as src, gzip.open(gz_file, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(temp_file, published)
+        os.replace(gz_file, f"{published}.gz")
+    finally:
+        for path in [temp_file, gz_file]:
+            if os.path.exists(path):
+                os.remove(path)
+    return published
+
+
+def get_next_version(current: int = 0) -> int:
+    return max(int(time.time() * 1000), current + 1)
+
+
+def get_full_path_names(rows: list) -> dict:
+    """
+    " - " separated names from the root down to each administration,
+    computed in a single walk over (id, name, parent) rows.
+    """
+    names = {row["id"]: row["name"] for row in rows}
+    parents = {row["id"]: row["parent"] for row in rows}
+    full_path_names = {}
+    for id in names:
+        chain = []
+        current = id
+        while current in names and current not in full_path_names:
+            if current in chain:
+                # stop at administrations set as their own ancestor
+                current = None
+                break
+            chain.append(current)
+            current = parents[current]
+        prefix = full_path_names.get(current)
+        for node in reversed(chain):
+            prefix = f"{prefix} - {names[node]}" if prefix else names[node]
+            full_path_names[node] = prefix
+    return full_path_names
+
+
+def write_sqlite(model, file_name: str):
+    field_names = [f.name for f in model._meta.fields]
+    data = pd.DataFrame(list(model.objects.values(*field_names)))
     no_rows = data.shape[0]
     if no_rows < 1:
+        published = get_published_sqlite(file_name)
+        for path in [file_name, published, f"{published}.gz"]:
+            if os.path.exists(path):
+                os.remove(path)
         return
     # Add full_path_name for Administration model
     if model.__name__ == "Administration":
-        # Get all Administration objects with their full_path_name property
-        full_path_names = {
-            obj.id: obj.full_path_name.replace("|", " - ") for obj in objects
-        }
-        # Add the full_path_name column to the DataFrame
+        full_path_names = get_full_path_names(
+            list(model.objects.values("id", "name", "parent"))
+        )
         data["full_path_name"] = data["id"].apply(
             lambda id_: full_path_names.get(id_, "")
         )
@@ -47,144 +122,456 @@ def generate_sqlite(model, test: bool = False):
         )
     else:
         data["parent"] = 0
-    conn = sqlite3.connect(file_name)
-    data.to_sql("nodes", conn, if_exists="replace", index=False)
-    conn.close()
+    current = None
+    if os.path.exists(file_name):
+        current = get_sqlite_version(file_name)
+    version = get_next_version((current or {}).get("version", 0))
+    data["version"] = version
+    temp_file = get_temp_file(file_name, suffix=".sqlite.tmp")
+    try:
+        conn = sqlite3.connect(temp_file)
+        try:
+            data.to_sql("nodes", conn, if_exists="replace", index=False)
+            with conn:
+                conn.execute("CREATE INDEX nodes_id ON nodes(id)")
+                conn.execute("CREATE INDEX nodes_parent ON nodes(parent)")
+                conn.execute("CREATE INDEX nodes_version ON nodes(version)")
+                conn.execute(
+                    "CREATE TABLE deleted "
+                    "(id INTEGER PRIMARY KEY, version INTEGER)"
+                )
+                conn.execute(
+                    "CREATE TABLE meta (name TEXT PRIMARY KEY, value INTEGER)"
+                )
+                conn.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    [("base_version", version), ("version", version)],
+                )
+        finally:
+            conn.close()
+        os.replace(temp_file, file_name)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
     return file_name
 
 
+def generate_sqlite(model, test: bool = False):
+    """
+    Rebuild the master-data file of a model. Every row is stamped with
+    the new file version, so devices on an older version download the
+    whole file again.
+    """
+    if not test:
+        test = settings.TEST_ENV
+    file_name = get_sqlite_file(model=model, test=test)
+    with file_lock(file_name):
+        return write_sqlite(model=model, file_name=file_name)
+
+
+def bump_sqlite_version(conn) -> int:
+    current = conn.execute(
+        "SELECT value FROM meta WHERE name = 'version'"
+    ).fetchone()[0]
+    version = get_next_version(current)
+    conn.execute(
+        "UPDATE meta SET value = ? WHERE name = 'version'", (version,)
+    )
+    return version
+
+
+def refresh_full_path_names(conn, version: int, id: int):
+    """
+    full_path_name of an administration and its descendants, from the
+    names in the file: only the subtree of the changed administration is
+    walked.
+    """
+    row = conn.execute(
+        "SELECT parent, name FROM nodes WHERE id = ?", (id,)
+    ).fetchone()
+    if not row:
+        return
+    parent = conn.execute(
+        "SELECT full_path_name FROM nodes WHERE id = ?", (row[0],)
+    ).fetchone()
+    full_path_names = {
+        id: f"{parent[0]} - {row[1]}" if parent and parent[0] else row[1]
+    }
+    queue = [id]
+    while queue:
+        current = queue.pop()
+        conn.execute(
+            "UPDATE nodes SET full_path_name = ?, version = ? "
+            "WHERE id = ? AND full_path_name IS NOT ?",
+            (
+                full_path_names[current],
+                version,
+                current,
+                full_path_names[current],
+            ),
+        )
+        for child, name in conn.execute(
+            "SELECT id, name FROM nodes WHERE parent = ?", (current,)
+        ).fetchall():
+            if child in full_path_names:
+                # stop at administrations set as their own ancestor
+                continue
+            full_path_names[child] = f"{full_path_names[current]} - {name}"
+            queue.append(child)
+
+
+def change_sqlite(model, change):
+    """
+    Apply change(conn, version) to the master-data file in a single
+    transaction; the file is rebuilt when it can't be changed. Devices
+    get the changes from the copy made by their next download, see
+    publish_sqlite.
+    """
+    file_name = get_sqlite_file(model=model, test=settings.TEST_ENV)
+    with file_lock(file_name):
+        if not os.path.exists(file_name):
+            write_sqlite(model=model, file_name=file_name)
+            return
+        conn = sqlite3.connect(file_name)
+        try:
+            with conn:
+                version = bump_sqlite_version(conn)
+                change(conn, version)
+        except sqlite3.OperationalError:
+            write_sqlite(model=model, file_name=file_name)
+        finally:
+            conn.close()
+
+
 def update_sqlite(model, data, id=None):
-    test = settings.TEST_ENV
-    table_name = model._meta.db_table
-    fields = data.keys()
+    fields = list(data.keys()) + ["version"]
     field_names = ", ".join([f for f in fields])
     placeholders = ", ".join(["?" for _ in range(len(fields))])
     update_placeholders = ", ".join([f"{f} = ?" for f in fields])
-    params = list(data.values())
-    if id:
-        params += [id]
-    file_name = "{0}/{1}{2}.sqlite".format(
-        MASTER_DATA,
-        "test_" if test else "",
-        table_name,
-    )
-    conn = sqlite3.connect(file_name)
+
+    def change(conn, version):
+        params = list(data.values()) + [version]
+        c = conn.cursor()
+        if id:
+            c.execute("SELECT * FROM nodes WHERE id = ?", (id,))
+            if c.fetchone():
+                query = f"UPDATE nodes \
+                    SET {update_placeholders} WHERE id = ?"
+                c.execute(query, params + [id])
+        if not id:
+            query = f"INSERT INTO nodes({field_names}) \
+                VALUES ({placeholders})"
+            c.execute(query, params)
+            c.execute("DELETE FROM deleted WHERE id = ?", (data.get("id"),))
+        if model.__name__ == "Administration":
+            refresh_full_path_names(conn, version, id or data.get("id"))
+
+    change_sqlite(model=model, change=change)
+
+
+def delete_sqlite(model, id):
+    def change(conn, version):
+        conn.execute("DELETE FROM nodes WHERE id = ?", (id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO deleted VALUES (?, ?)", (id, version)
+        )
+
+    change_sqlite(model=model, change=change)
+
+
+def get_sqlite_version(file_name: str):
+    """
+    {"base_version": ..., "version": ...} of a master-data file, None for
+    files written before they were versioned or without these versions.
+    """
+    conn = sqlite3.connect(f"file:{file_name}?mode=ro", uri=True)
     try:
-        with conn:
-            c = conn.cursor()
-            if id:
-                c.execute("SELECT * FROM nodes WHERE id = ?", (id,))
-                if c.fetchone():
-                    query = f"UPDATE nodes \
-                        SET {update_placeholders} WHERE id = ?"
-                    c.execute(query, params)
-            if not id:
-                query = f"INSERT INTO nodes({field_names}) \
-                    VALUES ({placeholders})"
-                c.execute(query, params)
-    except sqlite3.OperationalError:
-        generate_sqlite(model=model, test=test)
+        meta = dict(conn.execute("SELECT name, value FROM meta"))
+    except sqlite3.DatabaseError:
+        return None
     finally:
         conn.close()
+    if "base_version" not in meta or "version" not in meta:
+        return None
+    return meta
+
+
+def generate_sqlite_delta(file_name: str, since: int) -> str:
+    """
+    Temporary file holding the nodes changed and the ids deleted after
+    version `since`, along with the meta table of the file and the
+    `since` version. The caller removes the file.
+    """
+    delta_file = get_temp_file(file_name, suffix=".sqlite.tmp")
+    try:
+        conn = sqlite3.connect(delta_file)
+        try:
+            conn.execute("ATTACH DATABASE ? AS source", (file_name,))
+            with conn:
+                conn.execute(
+                    "CREATE TABLE nodes AS "
+                    "SELECT * FROM source.nodes WHERE version > ?",
+                    (since,),
+                )
+                conn.execute(
+                    "CREATE TABLE deleted AS "
+                    "SELECT * FROM source.deleted WHERE version > ?",
+                    (since,),
+                )
+                conn.execute("CREATE TABLE meta AS SELECT * FROM source.meta")
+                conn.execute("INSERT INTO meta VALUES ('since', ?)", (since,))
+            conn.execute("DETACH DATABASE source")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        os.remove(delta_file)
+        raise
+    return delta_file
 
 
-def administration_csv_add(data: dict):
-    test = settings.TEST_ENV
+def get_administration_csv_file(test: bool = None) -> str:
+    if test is None:
+        test = settings.TEST_ENV
     filename = "{0}-administration.csv".format(
         "test" if test else COUNTRY_NAME
     )
-    filepath = f"{STORAGE_PATH}/master_data/{filename}"
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        new_data = {}
-        if data.path:
-            parent_ids = list(filter(lambda path: path, data.path.split(".")))
-            parents = Administration.objects.filter(
-                pk__in=parent_ids, level__id__gt=1
-            ).all()
-            for p in parents:
-                new_data[p.level.name.lower()] = p.name
-                new_data[f"{p.level.name.lower()}_id"] = p.id
-        new_data[data.level.name.lower()] = data.name
-        new_data[f"{data.level.name.lower()}_id"] = data.id
-        new_df = pd.DataFrame([new_data])
-        df = pd.concat([df, new_df], ignore_index=True)
-        df.to_csv(filepath, index=False)
-        return filepath
-    else:
-        logger.error(
-            {
-                "context": "insert_administration_row_csv",
-                "message": (
-                    f"{('test' if test else COUNTRY_NAME)}-administration.csv"
-                    " doesn't exist"
-                ),
-            }
-        )  # pragma: no cover
-    return None
+    return f"{STORAGE_PATH}/master_data/{filename}"
 
 
-def find_index_by_id(df, id):
-    for idx, row in df.iterrows():
-        last_non_null_col = row.last_valid_index()
-        last_non_null_value = row[last_non_null_col]
-        if last_non_null_value == id:
-            return idx
-    return None
+class AdministrationCSVStore:
+    """
+    Rows of the administration CSV kept in SQLite, keyed by the id of the
+    last administration of the row, so an edit is a single upsert or
+    delete. The CSV is written from the store by export(), which only
+    does something when the rows changed.
+    """
 
+    def __init__(self, conn, csv_file: str):
+        self.conn = conn
+        self.csv_file = csv_file
 
-def administration_csv_update(data: dict):
-    test = settings.TEST_ENV
-    filename = "{0}-administration.csv".format(
-        "test" if test else COUNTRY_NAME
-    )
-    filepath = f"{STORAGE_PATH}/master_data/{filename}"
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        index = find_index_by_id(df=df, id=data.pk)
-        if index is not None:
-            if data.path:
-                parent_ids = list(
-                    filter(lambda path: path, data.path.split("."))
+    def get_csv_stat(self) -> str:
+        if not os.path.exists(self.csv_file):
+            return None
+        stat = os.stat(self.csv_file)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def get_meta(self, name: str):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value)
+        )
+
+    def sync(self):
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows (position INTEGER PRIMARY KEY,"
+            " id INTEGER UNIQUE, data TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS columns (position INTEGER PRIMARY KEY,"
+            " name TEXT UNIQUE)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)"
+        )
+        csv_stat = self.get_csv_stat()
+        if csv_stat and csv_stat != self.get_meta("csv_stat"):
+            # the CSV was written by something else, e.g. the
+            # download_all_administrations command
+            self.load_csv()
+
+    def load_csv(self):
+        self.conn.execute("DELETE FROM rows")
+        self.conn.execute("DELETE FROM columns")
+        with open(self.csv_file, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            self.add_columns(header)
+            for row in reader:
+                values = [v for v in row if v != ""]
+                if not values:
+                    continue
+                data = {c: v for c, v in zip(header, row) if v != ""}
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rows (id, data) VALUES (?, ?)",
+                    (int(float(values[-1])), json.dumps(data)),
                 )
-                parents = Administration.objects.filter(
-                    pk__in=parent_ids, level__id__gt=1
-                ).all()
-                for p in parents:
-                    df.loc[index, p.level.name.lower()] = p.name
-                    df.loc[index, f"{p.level.name.lower()}_id"] = p.id
-            df.loc[index, data.level.name.lower()] = data.name
-            df.loc[index, f"{data.level.name.lower()}_id"] = data.id
-        df.to_csv(filepath, index=False)
-        return filepath
-    else:
+        self.set_meta("csv_stat", self.get_csv_stat())
+        self.set_meta("changed", 0)
+
+    def add_columns(self, columns: list):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO columns (name) VALUES (?)",
+            [(c,) for c in columns],
+        )
+
+    def upsert(self, id: int, values: dict, update_only: bool = False):
+        row = self.conn.execute(
+            "SELECT data FROM rows WHERE id = ?", (id,)
+        ).fetchone()
+        if not row and update_only:
+            return
+        data = json.loads(row[0]) if row else {}
+        data.update(values)
+        self.add_columns(list(values))
+        self.conn.execute(
+            "INSERT INTO rows (id, data) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+            (id, json.dumps(data)),
+        )
+        self.set_meta("changed", 1)
+
+    def delete(self, id: int):
+        self.conn.execute("DELETE FROM rows WHERE id = ?", (id,))
+        self.set_meta("changed", 1)
+
+    def export(self) -> str:
+        if not self.get_meta("changed") and self.get_csv_stat():
+            return self.csv_file
+        columns = [
+            c for c, in self.conn.execute(
+                "SELECT name FROM columns ORDER BY position"
+            )
+        ]
+        temp_file = get_temp_file(self.csv_file, suffix=".csv.tmp")
+        try:
+            with open(temp_file, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for data, in self.conn.execute(
+                    "SELECT data FROM rows ORDER BY position"
+                ):
+                    data = json.loads(data)
+                    writer.writerow([data.get(c, "") for c in columns])
+            os.replace(temp_file, self.csv_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        self.set_meta("csv_stat", self.get_csv_stat())
+        self.set_meta("changed", 0)
+        return self.csv_file
+
+
+def get_administration_csv_store_file(csv_file: str) -> str:
+    # next to the CSV: files of MASTER_DATA are served to devices
+    name = os.path.splitext(os.path.basename(csv_file))[0]
+    return os.path.join(os.path.dirname(csv_file), f"{name}.sqlite")
+
+
+@contextmanager
+def administration_csv_store(csv_file: str):
+    """
+    The store of an administration CSV, locked against other writers for
+    the block; every change made in the block is one transaction, so bulk
+    edits are batched:
+
+    with administration_csv_store(csv_file) as store:
+        for adm in administrations:
+            store.upsert(adm.id, get_administration_csv_values(adm))
+    """
+    file_name = get_administration_csv_store_file(csv_file)
+    # stores were kept in MASTER_DATA before, where devices can download them
+    legacy_file = f"{MASTER_DATA}/{os.path.basename(file_name)}"
+    for legacy in [legacy_file, f"{legacy_file}.lock"]:
+        if os.path.exists(legacy):
+            os.remove(legacy)
+    with file_lock(file_name):
+        conn = sqlite3.connect(file_name)
+        try:
+            with conn:
+                store = AdministrationCSVStore(conn=conn, csv_file=csv_file)
+                store.sync()
+                yield store
+        finally:
+            conn.close()
+
+
+def export_administration_csv(csv_file: str) -> str:
+    with administration_csv_store(csv_file) as store:
+        return store.export()
+
+
+def get_administration_csv(test: bool = None) -> str:
+    """
+    Path of the administration CSV, written first when it is behind the
+    edits made since the last export.
+    """
+    csv_file = get_administration_csv_file(test=test)
+    if os.path.exists(csv_file):
+        export_administration_csv(csv_file)
+    return csv_file
+
+
+def get_administration_csv_values(data: Administration) -> dict:
+    values = {}
+    if data.path:
+        parent_ids = list(filter(lambda path: path, data.path.split(".")))
+        parents = Administration.objects.filter(
+            pk__in=parent_ids, level__id__gt=1
+        ).select_related("level").order_by("level__level")
+        for p in parents:
+            values[p.level.name.lower()] = p.name
+            values[f"{p.level.name.lower()}_id"] = p.id
+    values[data.level.name.lower()] = data.name
+    values[f"{data.level.name.lower()}_id"] = data.id
+    return values
+
+
+def change_administration_csv(context: str, change):
+    csv_file = get_administration_csv_file()
+    if not os.path.exists(csv_file):
         logger.error(
             {
-                "context": "update_administration_row_csv",
-                "message": f"{filename} doesn't exist",
+                "context": context,
+                "message": f"{os.path.basename(csv_file)} doesn't exist",
             }
         )  # pragma: no cover
-    return None
+        return None
+    with administration_csv_store(csv_file) as store:
+        change(store)
+    # edits queued before the export runs are written together
+    async_task("utils.custom_generator.export_administration_csv", csv_file)
+    return csv_file
+
+
+def administration_csv_add(data: Administration):
+    return change_administration_csv(
+        context="insert_administration_row_csv",
+        change=lambda store: store.upsert(
+            data.id, get_administration_csv_values(data)
+        ),
+    )
+
+
+def administration_csv_add_many(administrations: list):
+    # one transaction and one export for a bulk upload
+    def change(store):
+        for data in administrations:
+            store.upsert(data.id, get_administration_csv_values(data))
+
+    if not administrations:
+        return None
+    return change_administration_csv(
+        context="insert_administration_rows_csv", change=change
+    )
+
+
+def administration_csv_update(data: Administration):
+    return change_administration_csv(
+        context="update_administration_row_csv",
+        change=lambda store: store.upsert(
+            data.id, get_administration_csv_values(data), update_only=True
+        ),
+    )
 
 
 def administration_csv_delete(id: int):
-    test = settings.TEST_ENV
-    filename = "{0}-administration.csv".format(
-        "test" if test else COUNTRY_NAME
+    return change_administration_csv(
+        context="delete_administration_row_csv",
+        change=lambda store: store.delete(id),
     )
-    filepath = f"{STORAGE_PATH}/master_data/{filename}"
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        ix = find_index_by_id(df=df, id=id)
-        if ix is not None:
-            df.drop(index=ix, inplace=True)
-        df.to_csv(filepath, index=False)
-        return filepath
-    else:
-        logger.error(
-            {
-                "context": "delete_administration_row_csv",
-                "message": f"{filename} doesn't exist",
-            }
-        )  # pragma: no cover
-    return None
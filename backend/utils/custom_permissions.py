@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission
 
-from django.db.models import Q
+from api.v1.v1_profile.functions import get_user_access
 from api.v1.v1_profile.constants import (
     DataAccessTypes,
     FeatureAccessTypes,
@@ -12,11 +12,9 @@ class AddUserAccess(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_superuser:
             # Check if the user has invite user access
-            invite_user = FeatureAccessTypes.invite_user
-            return request.user.user_user_role.filter(
-                role__role_role_feature_access__type=FeatureTypes.user_access,
-                role__role_role_feature_access__access=invite_user,
-            ).exists()
+            return get_user_access(request.user).has_feature_access(
+                FeatureTypes.user_access, FeatureAccessTypes.invite_user
+            )
         return request.user.is_superuser
 
 
@@ -24,12 +22,10 @@ class IsEditor(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_superuser:
             # Check if the user has edit or delete access
-            return request.user.user_user_role.filter(
-                role__role_role_access__data_access__in=[
-                    DataAccessTypes.edit,
-                    DataAccessTypes.delete,
-                ]
-            ).exists()
+            return get_user_access(request.user).has_data_access(
+                DataAccessTypes.edit,
+                DataAccessTypes.delete,
+            )
         return request.user.is_superuser
 
 
@@ -37,9 +33,9 @@ class IsApprover(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_superuser:
             # Check if the user has approve access
-            return request.user.user_user_role.filter(
-                role__role_role_access__data_access=DataAccessTypes.approve
-            ).exists()
+            return get_user_access(request.user).has_data_access(
+                DataAccessTypes.approve
+            )
         return request.user.is_superuser
 
 
@@ -47,9 +43,9 @@ class IsSubmitter(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_superuser:
             # Check if the user has submit access
-            return request.user.user_user_role.filter(
-                role__role_role_access__data_access=DataAccessTypes.submit
-            ).exists()
+            return get_user_access(request.user).has_data_access(
+                DataAccessTypes.submit
+            )
         return request.user.is_superuser
 
 
@@ -62,14 +58,9 @@ class IsSuperAdminOrFormUser(BasePermission):
     # Check if the user is a super admin or has form access
     def has_permission(self, request, view):
         if not request.user.is_superuser:
-            has_form_access = request.user.user_form.filter(
-                Q(
-                    form_id=view.kwargs.get("form_id")
-                ) | Q(
-                    form__children__id=view.kwargs.get("form_id")
-                )
-            ).exists()
-            return has_form_access
+            return get_user_access(request.user).has_form(
+                view.kwargs.get("form_id")
+            )
         # Check if user is super admin
         return request.user.is_superuser
 
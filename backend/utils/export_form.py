@@ -30,9 +30,19 @@ def get_question_names(form: Forms):
 def get_definition(form: Forms):
     questions = (
         Questions.objects.filter(form=form)
+        .select_related("question_group", "form")
+        .prefetch_related("options")
         .order_by("question_group__order", "order")
         .all()
     )
+    dependency_ids = [
+        d["id"] for q in questions for d in (q.dependency or [])
+    ]
+    dependency_names = dict(
+        Questions.objects.filter(pk__in=dependency_ids).values_list(
+            "id", "name"
+        )
+    )
     framed = []
     for i, q in enumerate([qs.to_definition() for qs in questions]):
         rule = ""
@@ -46,7 +56,7 @@ def get_definition(form: Forms):
         if q["dependency"]:
             dependency = []
             for d in q["dependency"]:
-                did = Questions.objects.get(pk=d["id"]).name
+                did = dependency_names[d["id"]]
                 if d.get("options"):
                     options = "|".join(d["options"])
                     dtext = f"{did}: " + options
@@ -0,0 +1,202 @@
+import fcntl
+import os
+import re
+import tempfile
+import mimetypes
+from contextlib import contextmanager
+
+import requests
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@contextmanager
+def file_lock(file_name: str):
+    """
+    Exclusive lock on a file path, shared by every worker and thread that
+    writes it.
+    """
+    with open(f"{file_name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def get_temp_file(file_name: str, suffix: str = ".tmp") -> str:
+    # same directory as the file, so os.replace stays atomic
+    fd, temp_file = tempfile.mkstemp(
+        dir=os.path.dirname(file_name) or ".", suffix=suffix
+    )
+    os.close(fd)
+    return temp_file
+
+
+def fetch_file(url: str, file_name: str, timeout: int = 60) -> bool:
+    """
+    Download url to file_name in chunks; the file only appears once it is
+    complete. Returns False when the url can't be downloaded.
+    """
+    download = requests.get(
+        url, allow_redirects=True, stream=True, timeout=timeout
+    )
+    if download.status_code != 200:
+        return False
+    temp_file = get_temp_file(file_name)
+    try:
+        with open(temp_file, "wb") as f:
+            for chunk in download.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(temp_file, file_name)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return True
+
+
+def get_etag(stat: os.stat_result, suffix: str = "") -> str:
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}")
+
+
+def get_range(request, size: int, etag: str = None):
+    """
+    (start, end) of a single `Range: bytes=` request, None to send the
+    whole file and False when the range can't be satisfied. A range sent
+    with an If-Range that isn't the current etag gets the whole file.
+    """
+    header = request.META.get("HTTP_RANGE")
+    if not header:
+        return None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range and if_range.strip() != etag:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # multiple ranges or another unit: send the whole file
+        return None
+    start, end = match.groups()
+    if start == "":
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def iter_file_range(file, start: int, length: int):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def accepts_encoding(request, encoding: str) -> bool:
+    """
+    Whether Accept-Encoding allows the encoding, named or through "*",
+    with a non-zero q-value.
+    """
+    qvalues = {}
+    for coding in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, *params = [p.strip() for p in coding.split(";")]
+        if not name:
+            continue
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[name.lower()] = qvalue
+    return qvalues.get(encoding, qvalues.get("*", 0.0)) > 0
+
+
+def get_precompressed(request, file_path: str, stat: os.stat_result):
+    """
+    Gzipped variant of the file, when the client accepts it and it was
+    written after the file itself.
+    """
+    if not accepts_encoding(request, "gzip"):
+        return None
+    if request.META.get("HTTP_RANGE"):
+        return None
+    try:
+        gz_stat = os.stat(f"{file_path}.gz")
+    except FileNotFoundError:
+        return None
+    if gz_stat.st_mtime_ns < stat.st_mtime_ns:
+        return None
+    return f"{file_path}.gz"
+
+
+def serve_file(
+    request, file_path: str, file_name: str, precompressed: bool = False
+):
+    """
+    Stream a file as an attachment, answering If-None-Match with 304 and
+    a single byte Range with 206 (unless If-Range names an older etag).
+    With precompressed, the gzipped variant written next to the file
+    (<file>.gz) is sent to clients accepting it.
+    """
+    file = open(file_path, "rb")
+    stat = os.fstat(file.fileno())
+    content_type, _ = mimetypes.guess_type(file_path)
+    content_type = content_type or "application/octet-stream"
+    etag = get_etag(stat)
+    gz_path = None
+    if precompressed:
+        gz_path = get_precompressed(request, file_path, stat)
+    if gz_path:
+        etag = get_etag(stat, suffix="-gz")
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match and etag in parse_etags(if_none_match):
+        file.close()
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    if gz_path:
+        file.close()
+        response = FileResponse(
+            open(gz_path, "rb"), content_type=content_type
+        )
+        response["Content-Encoding"] = "gzip"
+    else:
+        byte_range = get_range(request, stat.st_size, etag=etag)
+        if byte_range is False:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(file, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Length"] = end - start + 1
+            response["Content-Range"] = (
+                f"bytes {start}-{end}/{stat.st_size}"
+            )
+        else:
+            response = FileResponse(file, content_type=content_type)
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    if precompressed:
+        response["Vary"] = "Accept-Encoding"
+    response["Content-Disposition"] = "attachment; filename=%s" % file_name
+    return response
@@ -1,7 +1,7 @@
 from django.utils import timezone
 from api.v1.v1_data.models import Answers, AnswerHistory
 from api.v1.v1_forms.constants import QuestionTypes
-from api.v1.v1_profile.models import Administration
+from api.v1.v1_profile.models import Administration, administration_tree
 
 
 def update_date_time_format(date):
@@ -24,6 +24,14 @@ def get_answer_value(answer: Answers, webform: bool = False):
         return answer.value
     elif answer.question.type == QuestionTypes.administration:
         if webform:
+            tree = administration_tree.get()
+            adm_id = int(answer.value) if answer.value else None
+            if adm_id in tree:
+                return [
+                    a for a in tree.get_ancestor_ids(adm_id)
+                    if tree.get_parent_id(a) is not None
+                ] + [adm_id]
+            # created after the tree was loaded
             adm = Administration.objects.filter(id=answer.value).first()
             if adm:
                 return [
@@ -0,0 +1,67 @@
+import unittest
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test.runner import (
+    DiscoverRunner,
+    ParallelTestSuite,
+    RemoteTestResult,
+    RemoteTestRunner,
+)
+
+LOCAL_CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def clear_local_caches():
+    """
+    Empty the in-process caches: unlike the database cache they aren't
+    rolled back with a test, and would keep its entries (and cache scope
+    versions, see utils.tiered_cache) for the next test.
+    """
+    for alias, config in settings.CACHES.items():
+        if config["BACKEND"] == LOCAL_CACHE_BACKEND:
+            caches[alias].clear()
+
+
+class LocalCacheResetMixin:
+    def startTest(self, test):
+        clear_local_caches()
+        super().startTest(test)
+
+
+class TextTestResult(LocalCacheResetMixin, unittest.TextTestResult):
+    pass
+
+
+class LocalCacheResetRemoteTestResult(
+    LocalCacheResetMixin, RemoteTestResult
+):
+    pass
+
+
+class LocalCacheResetRemoteTestRunner(RemoteTestRunner):
+    resultclass = LocalCacheResetRemoteTestResult
+
+
+class LocalCacheResetParallelTestSuite(ParallelTestSuite):
+    runner_class = LocalCacheResetRemoteTestRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner starting every test, in serial and parallel runs,
+    with empty in-process caches.
+    """
+
+    parallel_test_suite = LocalCacheResetParallelTestSuite
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass()
+        if resultclass is None:
+            return TextTestResult
+        # --debug-sql / --pdb results
+        return type(
+            resultclass.__name__,
+            (LocalCacheResetMixin, resultclass),
+            {},
+        )
@@ -0,0 +1,226 @@
+import re
+import time
+from collections import Counter
+from threading import Lock
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Hit / miss counters of the current process, shared by all threads
+_stats = Counter()
+_stats_lock = Lock()
+
+
+def count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cache_stats() -> dict:
+    with _stats_lock:
+        return {
+            "local_hits": _stats["local_hits"],
+            "shared_hits": _stats["shared_hits"],
+            "misses": _stats["misses"],
+        }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache backend: an in-process LRU (LOCAL, usually LocMemCache)
+    in front of a cache shared by every worker (SHARED, e.g. the database
+    or redis cache). Local entries live at most LOCAL_TIMEOUT seconds, so
+    an invalidation done by another worker is picked up within that time.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "utils.tiered_cache.TieredCache",
+            "OPTIONS": {
+                "LOCAL": "local",
+                "SHARED": "shared",
+                "LOCAL_TIMEOUT": 30,
+            },
+        },
+        "local": {...},
+        "shared": {...},
+    }
+
+    The local tier isn't part of the database transaction: in tests it
+    would keep the entries (and scope versions) of a rolled back test, so
+    utils.test_runner.TestRunner empties it before every test.
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        self.local_alias = options.get("LOCAL", "local")
+        self.shared_alias = options.get("SHARED", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 30)
+        super().__init__(params)
+
+    @property
+    def local(self) -> BaseCache:
+        return caches[self.local_alias]
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    def get_local_timeout(self, timeout=DEFAULT_TIMEOUT):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, self, version=version)
+        if value is not self:
+            count("local_hits")
+            return value
+        value = self.shared.get(key, self, version=version)
+        if value is self:
+            count("misses")
+            return default
+        count("shared_hits")
+        self.local.set(
+            key, value, timeout=self.local_timeout, version=version
+        )
+        return value
+
+    def get_many(self, keys, version=None):
+        values = self.local.get_many(keys, version=version)
+        count_hits = len(values)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self.local.set(
+                    key, value, timeout=self.local_timeout, version=version
+                )
+            values.update(shared)
+        with _stats_lock:
+            _stats["local_hits"] += count_hits
+            _stats["shared_hits"] += len(values) - count_hits
+            _stats["misses"] += len(keys) - len(values)
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self.local.set(
+            key,
+            value,
+            timeout=self.get_local_timeout(timeout),
+            version=version,
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self.local.set(
+                key,
+                value,
+                timeout=self.get_local_timeout(timeout),
+                version=version,
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.touch(
+            key, timeout=self.get_local_timeout(timeout), version=version
+        )
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        # BaseCache.has_key, not the dict method W601 is about
+        return self.local.has_key(key, version=version) or (  # noqa: W601
+            self.shared.has_key(key, version=version)
+        )
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta=delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def get_scope_version(scope: str):
+    """
+    Current version of a cache scope; entries stored under a scope are
+    dropped together by invalidate_cache(scope). A version culled from
+    the shared cache is replaced by a new one, dropping its entries too.
+    """
+    version_key = f"cache-scope-{scope}"
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def get_shared_tier() -> BaseCache:
+    # the default cache itself when it isn't a TieredCache
+    return getattr(cache, "shared", cache)
+
+
+def get_shared_scope_versions(scopes: tuple, values: dict) -> list:
+    return [values.get(f"cache-scope-{s}") for s in scopes]
+
+
+def get_shared(key: str, scopes: tuple = ()):
+    """
+    Entry stored by set_shared, read from the shared tier along with the
+    versions of its scopes in one get_many: for entries a worker must not
+    serve from its local tier once another worker changed them. None when
+    missing or stored under an older scope version.
+    """
+    values = get_shared_tier().get_many(
+        [key] + [f"cache-scope-{s}" for s in scopes]
+    )
+    versions = get_shared_scope_versions(scopes, values)
+    if key not in values or None in versions:
+        return None
+    stored_versions, value = values[key]
+    return value if stored_versions == versions else None
+
+
+def set_shared(key: str, value, scopes: tuple = (), timeout=DEFAULT_TIMEOUT):
+    shared = get_shared_tier()
+    versions = get_shared_scope_versions(
+        scopes, shared.get_many([f"cache-scope-{s}" for s in scopes])
+    )
+    versions = [
+        v if v is not None else get_scope_version(s)
+        for s, v in zip(scopes, versions)
+    ]
+    shared.set(key, (versions, value), timeout=timeout)
+
+
+def invalidate_cache(scope: str):
+    cache.set(f"cache-scope-{scope}", time.time_ns(), timeout=None)
+
+
+def get_cache_key(name: str, scopes: tuple = ()) -> str:
+    name = re.sub(r"[\W_]+", "_", name)
+    versions = "-".join([str(get_scope_version(s)) for s in scopes])
+    return f"{versions}-{name}" if versions else name
+
+
+class CacheScopes:
+    forms = "forms"
+    administrations = "administrations"
+    roles = "roles"
+    cascades = "cascades"
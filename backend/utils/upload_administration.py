@@ -2,7 +2,6 @@ import os
 from typing import List
 from django.db.models import QuerySet
 from django.utils import timezone
-from django.db.models import Q
 
 import pandas as pd
 from api.v1.v1_profile.models import (
@@ -11,10 +10,9 @@ from api.v1.v1_profile.models import (
     Administration,
     Entity,
 )
-from api.v1.v1_profile.constants import ADMINISTRATION_CSV_FILE
 from api.v1.v1_users.models import SystemUser
+from utils.custom_generator import get_administration_csv
 from utils.storage import upload
-from mis.settings import STORAGE_PATH
 
 
 def generate_template(
@@ -97,14 +95,9 @@ def generate_administration_template(
         worksheet.write(0, col_num, value, header_format)
     # get administrations with path
     filter_administration = Administration.objects.get(pk=adm_id)
-    filter_path = f"{filter_administration.id}."
-    if filter_administration.path:
-        filter_path = "{0}{1}.".format(
-            filter_administration.path, filter_administration.id
-        )
-    administrations = Administration.objects.filter(
-        Q(path__startswith=filter_path) | Q(pk=adm_id)
-    ).all()
+    administrations = Administration.objects.descendants_of(
+        filter_administration, include_self=True
+    )
     # EOL get administrations with path
     aggregate_type = AdministrationAttribute.Type.AGGREGATE
     multiple_type = AdministrationAttribute.Type.MULTIPLE_OPTION
@@ -173,13 +166,7 @@ def fill_administration_data(
     administration: Administration = None,
     testing: bool = False,
 ):
-    filename = ADMINISTRATION_CSV_FILE
-    if testing:
-        filename = "test-administration.csv"
-    source_file = "{0}/master_data/{1}".format(
-        STORAGE_PATH,
-        filename
-    )
+    source_file = get_administration_csv(test=testing)
 
     # Read the CSV file into a DataFrame
     df = pd.read_csv(source_file)
@@ -31,18 +31,11 @@ def generate_list_of_entities(
         )
         if adm_id:
             administration = Administration.objects.get(id=adm_id)
-            if administration.path:
-                administration_path = (
-                    administration.path + str(administration.id) + "."
-                )
-            else:
-                administration_path = str(administration.id) + "."
-            filter_entity_data = filter_entity_data.filter(
-                administration__path__startswith=administration_path
-            )
             # includes the administration itself
-            filter_entity_data |= EntityData.objects.filter(
-                administration=administration
+            filter_entity_data = filter_entity_data.filter(
+                administration__in=Administration.objects.descendants_of(
+                    administration, include_self=True
+                )
             )
         for entity_data in filter_entity_data:
             administrations = entity_data.administration.full_path_name.split(